@@ -44,6 +44,13 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser.add_argument("--cycles", type=int, default=10, help="Number of profile cycles to record.")
     parser.add_argument("--skip-cycles", type=int, default=3, help="Number of initial cycles to discard.")
     parser.add_argument("--meta", type=str, help="Metadata JSON string or path to JSON file.")
+    parser.add_argument("--fsync", action="store_true", help="fsync the run log after every group commit.")
+    parser.add_argument(
+        "--log-format",
+        choices=["csv", "arrow"],
+        default="csv",
+        help="Run log format: CSV, or Arrow IPC with run metadata stored once in the header.",
+    )
     parser.add_argument("--log-level", type=str, default="INFO")
     return parser.parse_args(argv)
 
@@ -80,6 +87,8 @@ def run_headless(args: argparse.Namespace) -> Path:
             backend=backend,
             profile_hash=profile.hash(),
             skip_cycles=skip_cycles,
+            log_fsync=bool(args.fsync),
+            log_format=args.log_format,
         )
     )
     return runner.run()
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import abc
 import csv
-from datetime import datetime, timezone
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, List, Optional
 
+import pyarrow as pa
+
+
+LOGGER = logging.getLogger(__name__)
 
 CSV_HEADER = [
     "timestamp_utc",
@@ -31,23 +42,319 @@ CSV_HEADER = [
 ]
 
 
-class CsvLogger:
-    def __init__(self, path: Path) -> None:
+_HEADER = object()
+_CLOSE = object()
+_TIMEOUT = object()
+
+
+# Columns that stay constant for a whole run; the Arrow log stores them once in its schema metadata.
+RUN_CONSTANT_COLUMNS = [
+    "backend",
+    "i2c_addr",
+    "sample_name",
+    "specimen_id",
+    "storage",
+    "notes",
+    "profile_name",
+    "profile_hash",
+]
+
+ARROW_COLUMNS = [
+    ("timestamp_utc", "timestamp[ns, UTC]"),
+    ("elapsed_time_s", "float64"),
+    ("cycle_index", "int32"),
+    ("step_index", "int32"),
+    ("commanded_heater_temp_C", "float64"),
+    ("step_duration_ticks", "int32"),
+    ("step_duration_ms", "int32"),
+    ("heater_heat_stable", "bool"),
+    ("sensor_status_raw", "int32"),
+    ("gas_resistance_ohm", "float64"),
+    ("sensor_temperature_C", "float64"),
+    ("sensor_humidity_RH", "float64"),
+    ("pressure_Pa", "float64"),
+]
+
+LOG_SUFFIXES = {"csv": ".csv", "arrow": ".arrow"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class GroupCommitLogger(abc.ABC):
+    """Run logger whose disk I/O happens on a dedicated writer thread.
+
+    ``write_row`` only enqueues the row, so acquisition timing does not depend on
+    storage latency. The writer commits in groups: it flushes once ``commit_rows``
+    rows are pending or ``commit_interval_s`` seconds after the first uncommitted
+    row, whichever comes first, so a crash loses at most one commit interval. With
+    ``fsync=True`` each commit is also forced to stable storage. ``close`` drains
+    the queue before closing the file.
+
+    Rows the format rejects are dropped and counted in ``dropped_rows``; only I/O
+    failures are re-raised on the caller's thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        commit_rows: int = 64,
+        commit_interval_s: float = 1.0,
+        fsync: bool = False,
+    ) -> None:
         self.path = path
+        self.commit_rows = max(1, int(commit_rows))
+        self.commit_interval_s = max(0.0, float(commit_interval_s))
+        self.fsync = fsync
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._fp = self.path.open("w", newline="", encoding="utf-8")
-        self._writer = csv.DictWriter(self._fp, fieldnames=CSV_HEADER, extrasaction="ignore")
+        self._open()
+        self._queue: queue.Queue[object] = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self.dropped_rows = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-{path.name}", daemon=True)
+        self._thread.start()
 
     def write_header(self) -> None:
-        self._writer.writeheader()
+        self._raise_pending_error()
+        self._queue.put(_HEADER)
 
     def write_row(self, payload: Dict[str, object]) -> None:
-        self._writer.writerow(payload)
-        self._fp.flush()
+        self._raise_pending_error()
+        self._queue.put(dict(payload))
 
     def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        try:
+            self._close_file()
+        finally:
+            if self.dropped_rows:
+                LOGGER.warning("Dropped %d row(s) of %s", self.dropped_rows, self.path)
+            self._raise_pending_error()
+
+    def _raise_pending_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise OSError(f"Log writer for {self.path} failed: {error}") from error
+
+    def _run(self) -> None:
+        pending = 0
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _TIMEOUT
+            try:
+                if item is _CLOSE:
+                    if pending:
+                        self._commit()
+                    return
+                if item is not _TIMEOUT:
+                    if item is _HEADER:
+                        self._write_header_item()
+                    else:
+                        try:
+                            self._write_row_item(item)  # type: ignore[arg-type]
+                            pending += 1
+                        except (TypeError, ValueError) as exc:
+                            # A row the format rejects is dropped; the rows around it are still committed.
+                            LOGGER.error("Dropped a row of %s: %s", self.path, exc)
+                            self.dropped_rows += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.commit_interval_s
+                    if pending < self.commit_rows and time.monotonic() < deadline:
+                        continue
+                if pending:
+                    self._commit()
+                pending = 0
+                deadline = None
+            except Exception as exc:  # pragma: no cover - disk failures
+                LOGGER.error("Failed to write %s: %s", self.path, exc)
+                self._error = exc
+                pending = 0
+                deadline = None
+
+    def _commit(self) -> None:
+        self._fp.flush()
+        if self.fsync:
+            os.fsync(self._fp.fileno())
+
+    # Hooks implemented by concrete formats; all but ``_open`` run on the writer thread.
+    @abc.abstractmethod
+    def _open(self) -> None:
+        """Open ``self._fp`` (and any format state) for a new run."""
+
+    @abc.abstractmethod
+    def _write_header_item(self) -> None:
+        """Write the header, if the format has one."""
+
+    @abc.abstractmethod
+    def _write_row_item(self, payload: Dict[str, object]) -> None:
+        """Buffer or write one row; it reaches disk at the next ``_commit``."""
+
+    def _close_file(self) -> None:
         self._fp.close()
 
+
+class CsvLogger(GroupCommitLogger):
+    """Group-commit logger that writes the ``CSV_HEADER`` layout."""
+
+    def _open(self) -> None:
+        self._fp = self.path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._fp, fieldnames=CSV_HEADER, extrasaction="ignore")
+
+    def _write_header_item(self) -> None:
+        self._writer.writeheader()
+
+    def _write_row_item(self, payload: Dict[str, object]) -> None:
+        self._writer.writerow(payload)
+
     @staticmethod
     def timestamp_string() -> str:
         return datetime.now(timezone.utc).isoformat()
+
+
+class ArrowLogger(GroupCommitLogger):
+    """Group-commit logger that streams a run into an Arrow IPC file.
+
+    The ``RUN_CONSTANT_COLUMNS`` are taken from the first row and stored once in
+    the schema metadata; every commit appends one record batch of the numeric
+    ``ARROW_COLUMNS``, with ``timestamp_utc`` as epoch nanoseconds.
+    """
+
+    def _open(self) -> None:
+        self._base_schema = arrow_schema()
+        self._schema = self._base_schema
+        self._stream = None
+        self._fp = self.path.open("wb")
+        self._columns: Dict[str, List[object]] = {name: [] for name, _ in ARROW_COLUMNS}
+
+    def _write_header_item(self) -> None:
+        # The schema (and with it the run metadata) is written together with the first row.
+        pass
+
+    def _write_row_item(self, payload: Dict[str, object]) -> None:
+        # Convert the whole row before buffering it, so a bad value fails only this row.
+        row = {name: _arrow_value(kind, payload.get(name)) for name, kind in ARROW_COLUMNS}
+        if self._stream is None:
+            self._start_stream(payload)
+        for name, value in row.items():
+            self._columns[name].append(value)
+
+    def _start_stream(self, payload: Dict[str, object]) -> None:
+        metadata = {name: str(payload.get(name, "")) for name in RUN_CONSTANT_COLUMNS}
+        self._schema = self._base_schema.with_metadata(metadata)
+        compression = "zstd" if pa.Codec.is_available("zstd") else None
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        self._stream = pa.ipc.new_stream(self._fp, self._schema, options=options)
+
+    def _commit(self) -> None:
+        if self._stream is not None and self._columns["timestamp_utc"]:
+            try:
+                arrays = [
+                    pa.array(self._columns[name], type=self._schema.field(name).type) for name, _ in ARROW_COLUMNS
+                ]
+                self._stream.write_batch(pa.record_batch(arrays, schema=self._schema))
+            finally:
+                # A batch Arrow rejects is reported once and dropped rather than retried on every commit.
+                for values in self._columns.values():
+                    values.clear()
+        super()._commit()
+
+    def _close_file(self) -> None:
+        if self._stream is None:
+            self._stream = pa.ipc.new_stream(self._fp, self._schema)
+        self._stream.close()
+        self._fp.close()
+
+
+def arrow_schema():
+    """Return the pyarrow schema of ``ARROW_COLUMNS`` (without run metadata)."""
+    types = {
+        "timestamp[ns, UTC]": pa.timestamp("ns", tz="UTC"),
+        "float64": pa.float64(),
+        "int32": pa.int32(),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in ARROW_COLUMNS])
+
+
+def _arrow_value(kind: str, value: object) -> object:
+    if kind.startswith("timestamp"):
+        return _epoch_ns(value)
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if kind == "bool":
+        return str(value).strip().lower() in {"true", "1"}
+    if kind == "int32":
+        number = int(float(value))  # type: ignore[arg-type]
+        if not -(2**31) <= number < 2**31:
+            raise ValueError(f"{number} does not fit in int32")
+        return number
+    return float(value)  # type: ignore[arg-type]
+
+
+def _epoch_ns(value: object) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        stamp = value
+    else:
+        stamp = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return (stamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+class ArrowLogReader:
+    """Incrementally read record batches from an Arrow run log that may still be growing.
+
+    Messages are read from the last complete byte offset, so repeated calls only
+    touch newly appended batches and a batch cut short by a crash is ignored.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.offset = 0
+        self.schema = None
+
+    @property
+    def run_metadata(self) -> Dict[str, str]:
+        if self.schema is None or not self.schema.metadata:
+            return {}
+        return {key.decode("utf-8"): value.decode("utf-8") for key, value in self.schema.metadata.items()}
+
+    def reset(self) -> None:
+        self.offset = 0
+        self.schema = None
+
+    def read_new(self) -> list:
+        """Return the record batches that were completed since the previous call."""
+        batches = []
+        with self.path.open("rb") as fp:
+            fp.seek(self.offset)
+            while True:
+                try:
+                    message = pa.ipc.read_message(fp)
+                except (pa.ArrowInvalid, EOFError, OSError):
+                    break
+                if self.schema is None:
+                    self.schema = pa.ipc.read_schema(message)
+                else:
+                    batches.append(pa.ipc.read_record_batch(message, self.schema))
+                self.offset = fp.tell()
+        return batches
+
+
+def open_run_logger(path: Path, log_format: str = "csv", **options: object) -> GroupCommitLogger:
+    """Return the group-commit logger for ``log_format`` (``"csv"`` or ``"arrow"``)."""
+    if log_format == "csv":
+        return CsvLogger(path, **options)  # type: ignore[arg-type]
+    if log_format == "arrow":
+        return ArrowLogger(path, **options)  # type: ignore[arg-type]
+    raise ValueError(f"Unsupported log format '{log_format}'")
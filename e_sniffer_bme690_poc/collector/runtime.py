@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import Callable, Dict, Optional
 
 from .device import BackendBME68xI2C, BackendBase, BackendCOINES, BackendError, SensorReading
-from .logger import CsvLogger
+from .logger import LOG_SUFFIXES, CsvLogger, GroupCommitLogger, open_run_logger
 from .profiles import Profile, ProfileStep
 
 LOGGER = logging.getLogger(__name__)
@@ -68,6 +68,10 @@ class RunConfig:
     stop_event: threading.Event = field(default_factory=threading.Event)
     status_callback: Optional[Callable[[Dict[str, object]], None]] = None
     output_root: Optional[Path] = None
+    log_commit_rows: int = 64
+    log_commit_interval_s: float = 1.0
+    log_fsync: bool = False
+    log_format: str = "csv"
 
     def stop(self) -> None:
         self.stop_event.set()
@@ -80,7 +84,7 @@ class CollectorRunner:
     def __init__(self, config: RunConfig) -> None:
         self.config = config
         self.consecutive_failures = 0
-        self.logger: Optional[CsvLogger] = None
+        self.logger: Optional[GroupCommitLogger] = None
 
     def run(self) -> Path:
         profile = self.config.profile
@@ -94,7 +98,13 @@ class CollectorRunner:
             self.config.skip_cycles,
         )
         out_path = self._build_log_path(metadata)
-        self.logger = CsvLogger(out_path)
+        self.logger = open_run_logger(
+            out_path,
+            self.config.log_format,
+            commit_rows=self.config.log_commit_rows,
+            commit_interval_s=self.config.log_commit_interval_s,
+            fsync=self.config.log_fsync,
+        )
         self.logger.write_header()
 
         total_cycles_needed = max(0, self.config.skip_cycles) + self.config.cycles_target
@@ -161,6 +171,7 @@ class CollectorRunner:
             self.config.backend.close()
             if self.logger:
                 self.logger.close()
+        self._record_in_catalog(out_path)
         LOGGER.info(
             "Run finished. Captured %d cycles (warmup skipped %d). CSV stored at %s",
             captured_cycles,
@@ -197,15 +208,31 @@ class CollectorRunner:
                 if time.time() >= end_time:
                     break
 
+    def _logs_root(self) -> Path:
+        return Path(self.config.output_root) if self.config.output_root else Path("logs")
+
+    def _record_in_catalog(self, out_path: Path) -> None:
+        """Add the finished log to the run catalogue in the logs root, when dataprep is installed."""
+        try:
+            from dataprep.catalog import RunCatalog
+        except ImportError:
+            LOGGER.debug("dataprep is not installed; run catalogue not updated")
+            return
+        try:
+            with RunCatalog(self._logs_root()) as catalog:
+                catalog.record(out_path)
+        except Exception as exc:
+            LOGGER.warning("Could not add %s to the run catalogue: %s", out_path, exc)
+
     def _build_log_path(self, metadata: Metadata) -> Path:
-        base_root = self.config.output_root if self.config.output_root else Path("logs")
+        base_root = self._logs_root()
         timestamp = datetime.now(timezone.utc).strftime("%H%M%S")
         date_dir = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
         def _sanitize(value: str) -> str:
             return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in value.strip())
 
-        root = Path(base_root)
+        root = base_root
         if metadata.category:
             root = root / _sanitize(metadata.category)
         if metadata.primary_label:
@@ -214,7 +241,8 @@ class CollectorRunner:
         root.mkdir(parents=True, exist_ok=True)
 
         safe_sample = _sanitize(metadata.sample_name)
-        return root / f"bme690_{safe_sample}_{timestamp}.csv"
+        suffix = LOG_SUFFIXES.get(self.config.log_format, ".csv")
+        return root / f"bme690_{safe_sample}_{timestamp}{suffix}"
 
     def _build_row(
         self,
@@ -2,9 +2,13 @@ from pathlib import Path
 
 import json
 import math
+import time
+
+import pyarrow as pa
+import pytest
 
 from collector.profiles import Profile, ProfileStep, profile_from_default
-from collector.logger import CsvLogger, CSV_HEADER
+from collector.logger import ArrowLogger, CsvLogger, CSV_HEADER, GroupCommitLogger
 
 
 def test_profile_validation_bounds(tmp_path: Path) -> None:
@@ -42,3 +46,50 @@ def test_csv_logger_writes_header(tmp_path: Path) -> None:
     contents = out.read_text(encoding="utf-8").strip().splitlines()
     assert contents[0] == ",".join(CSV_HEADER)
     assert contents[1].startswith("timestamp_utc")
+
+
+def test_csv_logger_commits_after_interval(tmp_path: Path) -> None:
+    out = tmp_path / "grouped.csv"
+    logger = CsvLogger(out, commit_rows=1000, commit_interval_s=0.05)
+    logger.write_header()
+    logger.write_row({key: key for key in CSV_HEADER})
+    deadline = time.monotonic() + 5.0
+    while len(out.read_text(encoding="utf-8").splitlines()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2
+    logger.close()
+
+
+def test_csv_logger_close_drains_queue(tmp_path: Path) -> None:
+    out = tmp_path / "drained.csv"
+    logger = CsvLogger(out, commit_rows=7, commit_interval_s=60.0, fsync=True)
+    logger.write_header()
+    for idx in range(20):
+        logger.write_row({"cycle_index": idx})
+    logger.close()
+    logger.close()
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 21
+    assert lines[-1].split(",")[CSV_HEADER.index("cycle_index")] == "19"
+
+
+def test_group_commit_logger_is_abstract(tmp_path: Path) -> None:
+    with pytest.raises(TypeError):
+        GroupCommitLogger(tmp_path / "base.log")  # type: ignore[abstract]
+    assert not (tmp_path / "base.log").exists()
+
+
+def test_arrow_logger_drops_a_bad_row_once(tmp_path: Path) -> None:
+    out = tmp_path / "run.arrow"
+    logger = ArrowLogger(out, commit_rows=1000, commit_interval_s=60.0)
+    logger.write_header()
+    stamp = "2025-10-20T12:00:00+00:00"
+    logger.write_row({"timestamp_utc": stamp, "cycle_index": 0, "gas_resistance_ohm": 1.0})
+    logger.write_row({"timestamp_utc": stamp, "cycle_index": 1, "gas_resistance_ohm": "open circuit"})
+    logger.write_row({"timestamp_utc": stamp, "cycle_index": 2, "gas_resistance_ohm": 3.0})
+    logger.write_row({"timestamp_utc": stamp, "cycle_index": 3, "gas_resistance_ohm": 4.0})
+    logger.close()
+    assert logger.dropped_rows == 1
+    with out.open("rb") as fp:
+        table = pa.ipc.open_stream(fp).read_all()
+    assert table.column("cycle_index").to_pylist() == [0, 2, 3]
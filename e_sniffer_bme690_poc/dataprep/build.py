@@ -3,14 +3,30 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .io import load_run_log
+from .layout import PARTITION_DIR, PARTITION_INDEX, SNAPSHOT_DIR, SNAPSHOT_POINTER
+from .manifest import fingerprint, has_shard, load_manifest, prune_shards, read_shard, save_manifest, write_shard
+
 LOGGER = logging.getLogger("dataprep")
 
+LOG_PATTERNS: Tuple[str, ...] = ("bme690_*.csv", "bme690_*.arrow")
+
+SEQUENCE_FORMATS: Tuple[str, ...] = ("npz", "npy")
+SEQUENCE_SHARD_DIR = "sequences"
+
+SNAPSHOTS_KEPT = 2
+FLAT_OUTPUTS: Tuple[str, ...] = ("sequences.npz", SEQUENCE_SHARD_DIR, "index.csv", "label_map.json", "summary.json")
+
 FEATURE_COLUMNS: Tuple[str, ...] = (
     "gas_resistance_ohm",
     "sensor_temperature_C",
@@ -19,6 +35,11 @@ FEATURE_COLUMNS: Tuple[str, ...] = (
     "commanded_heater_temp_C",
 )
 
+METADATA_COLUMNS: Tuple[str, ...] = ("specimen_id", "sample_name", "profile_name", "profile_hash", "storage", "notes")
+
+# Columns read from each run log; everything else in CSV_HEADER is never parsed.
+BUILD_COLUMNS: Tuple[str, ...] = ("cycle_index", "step_index", "heater_heat_stable") + FEATURE_COLUMNS + METADATA_COLUMNS
+
 
 def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Convert collector CSV logs into cycle tensors for 1D CNN training.")
@@ -26,7 +47,7 @@ def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
         "--logs-root",
         type=Path,
         default=Path("logs"),
-        help="Root directory that contains collector CSV files (searched recursively).",
+        help="Root directory that contains collector CSV or Arrow run logs (searched recursively).",
     )
     parser.add_argument(
         "--out",
@@ -38,20 +59,84 @@ def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
         "--expected-steps",
         type=int,
         default=None,
-        help="Optional number of heater steps per cycle. If omitted the value is inferred from the first valid cycle.",
+        help=(
+            "Optional number of heater steps per cycle. If omitted the value is inferred from the first valid cycle. "
+            "With --partition-by-profile only partitions with this step count are built."
+        ),
     )
     parser.add_argument(
         "--drop-unstable",
         action="store_true",
         help="Discard rows where heater_heat_stable is False before grouping cycles.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse run logs and assemble cycles (default: 1).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=SEQUENCE_FORMATS,
+        default="npz",
+        help="Tensor layout: one compressed sequences.npz, or memory-mappable .npy shards under sequences/.",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=16384,
+        help="Cycles per .npy shard when --format npy is used (default: 16384).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and publish a new snapshot whenever run logs under --logs-root change.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=30.0,
+        help="Seconds between polls of --logs-root in --watch mode (default: 30).",
+    )
+    parser.add_argument(
+        "--partition-by-profile",
+        action="store_true",
+        help="Write one prepared directory per profile hash and step count under <out>/partitions/.",
+    )
+    parser.add_argument("--profile", type=str, default=None, help="Only use runs of this profile name or hash (glob).")
+    parser.add_argument("--label", type=str, default=None, help="Only use runs whose label path contains this text.")
+    parser.add_argument("--specimen", type=str, default=None, help="Only use runs of this specimen id (glob).")
+    parser.add_argument("--since", type=str, default=None, help="Only use runs started on or after this UTC date.")
+    parser.add_argument("--until", type=str, default=None, help="Only use runs started before this UTC date.")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore the manifest in --out and re-process every run log.",
+    )
     return parser.parse_args(args)
 
 
-def discover_csv_files(root: Path) -> List[Path]:
+def discover_log_files(root: Path) -> List[Path]:
     if not root.exists():
         return []
-    return sorted(p for p in root.rglob("bme690_*.csv") if p.is_file())
+    found = {p for pattern in LOG_PATTERNS for p in root.rglob(pattern) if p.is_file()}
+    return sorted(found)
+
+
+def select_log_files(logs_root: Path, jobs: int = 1, **filters: Optional[str]) -> List[Path]:
+    """Run logs under ``logs_root``, narrowed through the run catalogue when filters are given.
+
+    ``filters`` are the :meth:`dataprep.catalog.RunCatalog.select` arguments. The
+    catalogue is refreshed first, which only parses logs it has not seen yet.
+    """
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if not filters:
+        return discover_log_files(logs_root)
+    from .catalog import RunCatalog  # the catalogue reuses this module's parsing helpers
+
+    with RunCatalog(logs_root) as catalog:
+        catalog.update(jobs=jobs)
+        return sorted(path for path in catalog.paths(**filters) if path.exists())
 
 
 def extract_label_fields(sample_name: str) -> Dict[str, str]:
@@ -99,46 +184,67 @@ def build_cycle_samples(
         LOGGER.warning("CSV %s has no usable rows after filtering.", source)
         return [], [], expected_steps
 
-    sequences: List[np.ndarray] = []
-    metadata_rows: List[Dict[str, object]] = []
-    inferred_steps = expected_steps
+    # groupby() ignores rows without a cycle index; mirror that before sorting once.
+    df = df.loc[df["cycle_index"].notna()]
+    if df.empty:
+        return [], [], expected_steps
+    order = np.lexsort((df["step_index"].to_numpy(), df["cycle_index"].to_numpy()))
+    df = df.iloc[order]
 
-    grouped = df.groupby("cycle_index", sort=True)
-    for cycle_idx, cycle_df in grouped:
-        cycle_df = cycle_df.sort_values("step_index")
-        if inferred_steps is None:
-            inferred_steps = int(cycle_df.shape[0])
-            LOGGER.debug("Inferred %s steps per cycle from %s", inferred_steps, source)
-        if cycle_df.shape[0] != inferred_steps:
-            LOGGER.info(
-                "Skipping cycle %s in %s because step count %s != expected %s",
-                cycle_idx,
-                source,
-                cycle_df.shape[0],
-                inferred_steps,
-            )
-            continue
-        if cycle_df[list(FEATURE_COLUMNS)].isna().any().any():
-            LOGGER.info("Skipping cycle %s in %s due to NaN feature values.", cycle_idx, source)
-            continue
+    cycle_values = df["cycle_index"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, cycle_values[1:] != cycle_values[:-1]])
+    counts = np.diff(np.r_[starts, len(df)])
 
-        signal = cycle_df[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float32)
-        labels = extract_label_fields(str(cycle_df["sample_name"].iloc[0]))
-        metadata = {
+    inferred_steps = expected_steps
+    if inferred_steps is None:
+        inferred_steps = int(counts[0])
+        LOGGER.debug("Inferred %s steps per cycle from %s", inferred_steps, source)
+
+    for pos in np.flatnonzero(counts != inferred_steps):
+        LOGGER.info(
+            "Skipping cycle %s in %s because step count %s != expected %s",
+            cycle_values[starts[pos]],
+            source,
+            counts[pos],
+            inferred_steps,
+        )
+    starts = starts[counts == inferred_steps]
+    if starts.size == 0:
+        return [], [], inferred_steps
+
+    features = df[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float32)
+    signals = features[starts[:, None] + np.arange(inferred_steps)]
+    has_nan = np.isnan(signals).any(axis=(1, 2))
+    for pos in np.flatnonzero(has_nan):
+        LOGGER.info("Skipping cycle %s in %s due to NaN feature values.", cycle_values[starts[pos]], source)
+    starts = starts[~has_nan]
+    signals = signals[~has_nan]
+
+    first_rows = df.iloc[starts]
+    columns = {
+        name: [str(value) for value in first_rows[name].tolist()]
+        for name in METADATA_COLUMNS
+    }
+    label_cache: Dict[str, Dict[str, str]] = {}
+    metadata_rows: List[Dict[str, object]] = []
+    for row, cycle_idx in enumerate(first_rows["cycle_index"].tolist()):
+        sample_name = columns["sample_name"][row]
+        if sample_name not in label_cache:
+            label_cache[sample_name] = extract_label_fields(sample_name)
+        metadata: Dict[str, object] = {
             "source_file": str(source),
             "cycle_index": int(cycle_idx),
-            "specimen_id": str(cycle_df["specimen_id"].iloc[0]),
-            "sample_name": str(cycle_df["sample_name"].iloc[0]),
-            "profile_name": str(cycle_df["profile_name"].iloc[0]),
-            "profile_hash": str(cycle_df["profile_hash"].iloc[0]),
-            "storage": str(cycle_df["storage"].iloc[0]),
-            "notes": str(cycle_df["notes"].iloc[0]),
+            "specimen_id": columns["specimen_id"][row],
+            "sample_name": sample_name,
+            "profile_name": columns["profile_name"][row],
+            "profile_hash": columns["profile_hash"][row],
+            "storage": columns["storage"][row],
+            "notes": columns["notes"][row],
         }
-        metadata.update(labels)
-        sequences.append(signal)
+        metadata.update(label_cache[sample_name])
         metadata_rows.append(metadata)
 
-    return sequences, metadata_rows, inferred_steps
+    return list(signals), metadata_rows, inferred_steps
 
 
 def _stack_signals(signals: List[np.ndarray], expected_steps: int) -> np.ndarray:
@@ -155,22 +261,62 @@ def _encode_labels(metadata_rows: Iterable[Dict[str, object]]) -> Tuple[np.ndarr
     return encoded, mapping
 
 
+def _write_sequence_shards(out_root: Path, signals: np.ndarray, labels: np.ndarray, shard_size: int) -> None:
+    """Write ``signals`` as uncompressed ``.npy`` shards plus ``sequences/index.json``.
+
+    Each shard can be opened with ``np.load(..., mmap_mode="r")`` so readers only
+    page in the cycles they touch.
+    """
+    shard_dir = out_root / SEQUENCE_SHARD_DIR
+    if shard_dir.exists():
+        shutil.rmtree(shard_dir)
+    shard_dir.mkdir(parents=True)
+
+    shard_size = max(1, int(shard_size))
+    shards: List[Dict[str, object]] = []
+    for start in range(0, signals.shape[0], shard_size):
+        name = f"signals_{len(shards):05d}.npy"
+        block = np.ascontiguousarray(signals[start : start + shard_size], dtype=np.float32)
+        np.save(shard_dir / name, block)
+        shards.append({"file": name, "start": start, "rows": int(block.shape[0])})
+    np.save(shard_dir / "labels.npy", labels)
+
+    index = {
+        "format": "npy-shards",
+        "version": 1,
+        "samples": int(signals.shape[0]),
+        "steps_per_cycle": int(signals.shape[1]),
+        "feature_names": list(FEATURE_COLUMNS),
+        "dtype": "float32",
+        "shards": shards,
+    }
+    (shard_dir / "index.json").write_text(json.dumps(index, indent=2), encoding="utf-8")
+
+
 def _write_outputs(
     out_root: Path,
     signals: np.ndarray,
     labels: np.ndarray,
     metadata_rows: List[Dict[str, object]],
     label_map: Dict[str, int],
+    sequence_format: str = "npz",
+    shard_size: int = 16384,
 ) -> None:
     out_root.mkdir(parents=True, exist_ok=True)
 
     tensors_path = out_root / "sequences.npz"
-    np.savez_compressed(
-        tensors_path,
-        signals=signals,
-        labels=labels,
-        feature_names=np.array(FEATURE_COLUMNS, dtype="U50"),
-    )
+    if sequence_format == "npy":
+        _write_sequence_shards(out_root, signals, labels, shard_size)
+        # Leave only one tensor layout behind so loaders never pick up a stale one.
+        tensors_path.unlink(missing_ok=True)
+    else:
+        np.savez_compressed(
+            tensors_path,
+            signals=signals,
+            labels=labels,
+            feature_names=np.array(FEATURE_COLUMNS, dtype="U50"),
+        )
+        shutil.rmtree(out_root / SEQUENCE_SHARD_DIR, ignore_errors=True)
 
     metadata_df = pd.DataFrame(metadata_rows)
     metadata_df["label_index"] = labels
@@ -190,34 +336,209 @@ def _write_outputs(
     summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    ns = parse_args(argv)
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+def _process_log(
+    path: Path,
+    expected_steps: Optional[int],
+    drop_unstable: bool,
+) -> Optional[Tuple[List[np.ndarray], List[Dict[str, object]], Optional[int]]]:
+    LOGGER.info("Processing %s", path)
+    try:
+        df = load_run_log(path, columns=BUILD_COLUMNS)
+    except Exception as exc:
+        LOGGER.error("Failed to read %s: %s", path, exc)
+        return None
+    return build_cycle_samples(df, path, expected_steps, drop_unstable=drop_unstable)
 
-    csv_files = discover_csv_files(ns.logs_root)
-    if not csv_files:
-        LOGGER.warning("No collector CSV files found under %s", ns.logs_root)
 
-    expected_steps = ns.expected_steps
+CycleResult = Tuple[List[np.ndarray], List[Dict[str, object]], Optional[int]]
+
+
+def _cycle_files(
+    log_files: Sequence[Path],
+    expected_steps: Optional[int],
+    drop_unstable: bool,
+    jobs: int = 1,
+) -> Tuple[List[Optional[CycleResult]], Optional[int]]:
+    results: List[Optional[CycleResult]] = []
+    pending = list(log_files)
+
+    while pending and (expected_steps is None or jobs <= 1):
+        result = _process_log(pending.pop(0), expected_steps, drop_unstable)
+        results.append(result)
+        if result is not None:
+            expected_steps = result[2]
+
+    if pending:
+        workers = min(jobs, len(pending))
+        LOGGER.info("Processing %s run logs with %s workers", len(pending), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results.extend(
+                pool.map(
+                    _process_log,
+                    pending,
+                    [expected_steps] * len(pending),
+                    [drop_unstable] * len(pending),
+                )
+            )
+
+    return results, expected_steps
+
+
+def collect_cycles(
+    log_files: Sequence[Path],
+    expected_steps: Optional[int],
+    drop_unstable: bool,
+    jobs: int = 1,
+) -> CycleResult:
+    """Cycle every run log and concatenate the results in ``log_files`` order.
+
+    When ``expected_steps`` is not given it is inferred from the first usable
+    cycle, exactly as in a serial build: files are processed in order until one
+    fixes the step count, and only then are the remaining files fanned out to
+    ``jobs`` worker processes with that value.
+    """
+    results, expected_steps = _cycle_files(log_files, expected_steps, drop_unstable, jobs)
     all_signals: List[np.ndarray] = []
     all_metadata: List[Dict[str, object]] = []
-
-    for csv_path in csv_files:
-        LOGGER.info("Processing %s", csv_path)
-        try:
-            df = pd.read_csv(csv_path)
-        except Exception as exc:
-            LOGGER.error("Failed to read %s: %s", csv_path, exc)
+    for result in results:
+        if result is None:
             continue
-        signals, metadata_rows, expected_steps = build_cycle_samples(
-            df,
-            csv_path,
-            expected_steps,
-            drop_unstable=ns.drop_unstable,
-        )
+        all_signals.extend(result[0])
+        all_metadata.extend(result[1])
+    return all_signals, all_metadata, expected_steps
+
+
+def _reusable_steps(
+    manifest: Dict[str, object],
+    entries: List[Dict[str, object]],
+    explicit_steps: Optional[int],
+) -> Tuple[bool, Optional[int]]:
+    """Decide whether cached shards can be reused and with which step count.
+
+    An inferred step count stays valid only while every log up to and including
+    the one that fixed it is unchanged and still sorts first.
+    """
+    if explicit_steps is not None:
+        return True, explicit_steps
+    source = manifest.get("steps_source")
+    if source is None:
+        return False, None
+    previous = manifest.get("files", [])
+    paths = [entry["path"] for entry in previous]
+    if source not in paths:
+        return False, None
+    prefix = paths.index(source) + 1
+    if len(entries) < prefix:
+        return False, None
+    for old, new in zip(previous[:prefix], entries[:prefix]):
+        if old["path"] != new["path"] or old["sha256"] != new["sha256"] or old.get("cycles") is None:
+            return False, None
+    return True, int(manifest["expected_steps"])
+
+
+def incremental_cycles(
+    log_files: Sequence[Path],
+    out_root: Path,
+    expected_steps: Optional[int],
+    drop_unstable: bool,
+    jobs: int = 1,
+    full_rebuild: bool = False,
+) -> CycleResult:
+    """Like :func:`collect_cycles`, but reuse per-log shards cached in ``out_root``.
+
+    Each log is fingerprinted by size, mtime and SHA-256. Only new or changed logs
+    are cycled; cached shards of unchanged logs are spliced back in file order
+    and shards of removed logs are pruned. Any change to the build options, or to
+    the log that fixed an inferred step count, falls back to a full rebuild.
+    """
+    options = {
+        "expected_steps": expected_steps,
+        "drop_unstable": bool(drop_unstable),
+        "feature_columns": list(FEATURE_COLUMNS),
+    }
+    manifest = None if full_rebuild else load_manifest(out_root)
+    previous = {entry["path"]: entry for entry in manifest.get("files", [])} if manifest else {}
+    entries = [fingerprint(path, previous.get(str(path))) for path in log_files]
+
+    reuse = manifest is not None and manifest.get("options") == options
+    if reuse:
+        reuse, resolved_steps = _reusable_steps(manifest, entries, expected_steps)
+    if not reuse:
+        if manifest is not None:
+            LOGGER.info("Build options or leading logs changed; rebuilding every run log")
+        resolved_steps = expected_steps
+
+    cached = {
+        entry["sha256"]: entry["cycles"] for entry in (manifest or {}).get("files", []) if entry.get("cycles") is not None
+    }
+    dirty = [
+        idx
+        for idx, entry in enumerate(entries)
+        if not reuse or entry["sha256"] not in cached or not has_shard(out_root, entry["sha256"])
+    ]
+    LOGGER.info("%s of %s run logs need processing", len(dirty), len(entries))
+
+    results, resolved_steps = _cycle_files([log_files[idx] for idx in dirty], resolved_steps, drop_unstable, jobs)
+    fresh = dict(zip(dirty, results))
+
+    all_signals: List[np.ndarray] = []
+    all_metadata: List[Dict[str, object]] = []
+    steps_source: Optional[str] = manifest.get("steps_source") if reuse and manifest else None
+    for idx, (path, entry) in enumerate(zip(log_files, entries)):
+        if idx in fresh:
+            result = fresh[idx]
+            if result is None:
+                entry["cycles"] = None
+                continue
+            signals, metadata_rows, inferred = result
+            write_shard(out_root, entry["sha256"], signals, metadata_rows, len(FEATURE_COLUMNS))
+            if steps_source is None and expected_steps is None and inferred is not None:
+                steps_source = entry["path"]
+        else:
+            signals, metadata_rows = read_shard(out_root, entry["sha256"], path)
+        entry["cycles"] = len(signals)
         all_signals.extend(signals)
         all_metadata.extend(metadata_rows)
 
+    prune_shards(out_root, (entry["sha256"] for entry in entries if entry.get("cycles") is not None))
+    save_manifest(
+        out_root,
+        {
+            "options": options,
+            "expected_steps": resolved_steps,
+            "steps_source": steps_source,
+            "files": entries,
+        },
+    )
+    return all_signals, all_metadata, resolved_steps
+
+
+def build_prepared(
+    log_files: Sequence[Path],
+    out_root: Path,
+    expected_steps: Optional[int],
+    drop_unstable: bool,
+    jobs: int = 1,
+    full_rebuild: bool = False,
+    sequence_format: str = "npz",
+    shard_size: int = 16384,
+    snapshot: bool = False,
+) -> int:
+    """Cycle ``log_files`` into a prepared directory at ``out_root``; returns the sample count.
+
+    With ``snapshot`` (or once ``out_root`` holds a ``CURRENT`` pointer) the
+    outputs go to a new ``snapshots/<stamp>/`` directory that is published with
+    :func:`publish_snapshot`; the manifest and shard cache stay in ``out_root``.
+    """
+    all_signals, all_metadata, expected_steps = incremental_cycles(
+        log_files,
+        out_root,
+        expected_steps,
+        drop_unstable=drop_unstable,
+        jobs=jobs,
+        full_rebuild=full_rebuild,
+    )
+
     if expected_steps is None:
         expected_steps = 0
 
@@ -228,8 +549,233 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         label_array = np.zeros((0,), dtype=np.int64)
         label_map = {}
 
-    _write_outputs(ns.out, signal_tensor, label_array, all_metadata, label_map)
-    LOGGER.info("Wrote tensors and metadata to %s", ns.out)
+    target = out_root
+    if snapshot or (out_root / SNAPSHOT_POINTER).exists():
+        target = out_root / SNAPSHOT_DIR / datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    _write_outputs(
+        target,
+        signal_tensor,
+        label_array,
+        all_metadata,
+        label_map,
+        sequence_format=sequence_format,
+        shard_size=shard_size,
+    )
+    if target != out_root:
+        publish_snapshot(out_root, target)
+    return int(signal_tensor.shape[0])
+
+
+def publish_snapshot(out_root: Path, snapshot_dir: Path) -> None:
+    """Point ``CURRENT`` at a fully written ``snapshot_dir`` and drop outdated snapshots.
+
+    The pointer is replaced atomically, so readers see either the previous or
+    the new snapshot. The previous snapshot is kept as well, because a reader
+    that resolved the pointer just before the swap may still be opening it.
+    """
+    pointer = out_root / SNAPSHOT_POINTER
+    tmp_path = pointer.with_name(pointer.name + ".tmp")
+    tmp_path.write_text(snapshot_dir.relative_to(out_root).as_posix(), encoding="utf-8")
+    tmp_path.replace(pointer)
+    LOGGER.info("Published snapshot %s", snapshot_dir)
+
+    snapshots = sorted(path for path in (out_root / SNAPSHOT_DIR).iterdir() if path.is_dir())
+    for stale in snapshots[:-SNAPSHOTS_KEPT]:
+        # Files still open elsewhere (e.g. memory-mapped on Windows) are retried on the next publish.
+        shutil.rmtree(stale, ignore_errors=True)
+    for name in FLAT_OUTPUTS:
+        path = out_root / name
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+
+
+def _partition_key(profile_name: Optional[str], profile_hash: Optional[str], steps: int) -> str:
+    name = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (profile_name or "unnamed").strip())
+    return f"{name}-{(profile_hash or 'nohash')[:12]}-{steps}steps"
+
+
+def build_partitions(
+    logs_root: Path,
+    out_root: Path,
+    drop_unstable: bool,
+    jobs: int = 1,
+    full_rebuild: bool = False,
+    sequence_format: str = "npz",
+    shard_size: int = 16384,
+    snapshot: bool = False,
+    **filters: object,
+) -> List[Dict[str, object]]:
+    """Write one prepared directory per ``(profile_hash, steps_per_cycle)`` under ``out_root/partitions``.
+
+    Runs are assigned to partitions from the run catalogue, so each log is cycled
+    only with the logs of its own profile and step count instead of being
+    dropped for disagreeing with the first log. ``filters`` are
+    :meth:`dataprep.catalog.RunCatalog.select` arguments; partitions outside them
+    are neither rebuilt nor removed. ``partitions.json`` lists every partition.
+    """
+    from .catalog import RunCatalog  # the catalogue reuses this module's parsing helpers
+
+    with RunCatalog(logs_root) as catalog:
+        catalog.update(jobs=jobs)
+        runs = catalog.select(**filters)
+    runs = runs[runs["steps_per_cycle"].notna() & runs["path"].map(lambda value: Path(value).exists())]
+
+    index_path = out_root / PARTITION_INDEX
+    previous: Dict[str, Dict[str, object]] = {}
+    if index_path.exists():
+        previous = {entry["key"]: entry for entry in json.loads(index_path.read_text(encoding="utf-8"))["partitions"]}
+
+    built: Dict[str, Dict[str, object]] = {}
+    groups = runs.groupby(["profile_hash", "steps_per_cycle"], dropna=False, sort=True)
+    for (profile_hash, steps), group in groups:
+        steps = int(steps)
+        profile_hash = None if pd.isna(profile_hash) else str(profile_hash)
+        profile_name = next((str(name) for name in group["profile_name"] if isinstance(name, str)), None)
+        key = _partition_key(profile_name, profile_hash, steps)
+        log_files = sorted(Path(path) for path in group["path"])
+        LOGGER.info("Partition %s: %s run logs", key, len(log_files))
+        samples = build_prepared(
+            log_files,
+            out_root / PARTITION_DIR / key,
+            steps,
+            drop_unstable=drop_unstable,
+            jobs=jobs,
+            full_rebuild=full_rebuild,
+            sequence_format=sequence_format,
+            shard_size=shard_size,
+            snapshot=snapshot,
+        )
+        built[key] = {
+            "key": key,
+            "dir": f"{PARTITION_DIR}/{key}",
+            "profile_name": profile_name,
+            "profile_hash": profile_hash,
+            "steps_per_cycle": steps,
+            "runs": len(log_files),
+            "samples": samples,
+        }
+
+    if any(value is not None for value in filters.values()):
+        partitions = {**previous, **built}
+    else:
+        partitions = built
+        for key in set(previous) - set(built):
+            LOGGER.info("Removing partition %s, which no longer has run logs", key)
+            shutil.rmtree(out_root / PARTITION_DIR / key, ignore_errors=True)
+    entries = [partitions[key] for key in sorted(partitions)]
+    out_root.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"version": 1, "partitions": entries}, indent=2), encoding="utf-8")
+    tmp_path.replace(index_path)
+    return entries
+
+
+def log_state(logs_root: Path) -> Tuple[Tuple[str, int, int], ...]:
+    """Path, size and mtime of every run log; any change means there is something to ingest."""
+    state = []
+    for path in discover_log_files(logs_root):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        state.append((str(path), int(stat.st_size), int(stat.st_mtime_ns)))
+    return tuple(state)
+
+
+def watch_logs(
+    logs_root: Path,
+    rebuild: Callable[[], None],
+    interval: float,
+    stop_event: Optional[threading.Event] = None,
+    max_polls: Optional[int] = None,
+) -> None:
+    """Call ``rebuild`` on the first poll and after every change to the run logs.
+
+    Logs that are still being written are picked up too: their complete cycles
+    are ingested now and the log is re-cycled when it grows. Polling stops when
+    ``stop_event`` is set or after ``max_polls`` polls.
+    """
+    stop_event = stop_event or threading.Event()
+    last_state: Optional[Tuple[Tuple[str, int, int], ...]] = None
+    polls = 0
+    while not stop_event.is_set():
+        state = log_state(logs_root)
+        if state != last_state:
+            if last_state is not None:
+                LOGGER.info("Run logs under %s changed; updating prepared output", logs_root)
+            try:
+                rebuild()
+                last_state = state
+            except Exception:
+                LOGGER.exception("Update failed; retrying on the next poll")
+        polls += 1
+        if max_polls is not None and polls >= max_polls:
+            break
+        stop_event.wait(interval)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    filters = {
+        "profile": ns.profile,
+        "label": ns.label,
+        "specimen": ns.specimen,
+        "since": ns.since,
+        "until": ns.until,
+    }
+
+    def build_once() -> None:
+        if ns.partition_by_profile:
+            entries = build_partitions(
+                ns.logs_root,
+                ns.out,
+                drop_unstable=ns.drop_unstable,
+                jobs=max(1, ns.jobs),
+                full_rebuild=ns.full_rebuild,
+                sequence_format=ns.format,
+                shard_size=ns.shard_size,
+                snapshot=ns.watch,
+                steps_per_cycle=ns.expected_steps,
+                **filters,
+            )
+            for entry in entries:
+                LOGGER.info("%s: %s samples from %s runs", entry["key"], entry["samples"], entry["runs"])
+            LOGGER.info("Wrote %s profile partitions to %s", len(entries), ns.out)
+            return
+
+        log_files = select_log_files(ns.logs_root, jobs=max(1, ns.jobs), **filters)
+        if not log_files:
+            LOGGER.warning("No matching collector run logs found under %s", ns.logs_root)
+        build_prepared(
+            log_files,
+            ns.out,
+            ns.expected_steps,
+            drop_unstable=ns.drop_unstable,
+            jobs=max(1, ns.jobs),
+            full_rebuild=ns.full_rebuild,
+            sequence_format=ns.format,
+            shard_size=ns.shard_size,
+            snapshot=ns.watch,
+        )
+        LOGGER.info("Wrote tensors and metadata to %s", ns.out)
+
+    def update() -> None:
+        build_once()
+        # --full-rebuild applies to the first pass only; later passes stay incremental.
+        ns.full_rebuild = False
+
+    if not ns.watch:
+        build_once()
+        return 0
+
+    LOGGER.info("Watching %s every %ss; press Ctrl+C to stop", ns.logs_root, ns.interval)
+    try:
+        watch_logs(ns.logs_root, update, interval=max(0.0, ns.interval))
+    except KeyboardInterrupt:
+        LOGGER.info("Stopped watching %s", ns.logs_root)
     return 0
 
 
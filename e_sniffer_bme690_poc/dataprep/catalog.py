@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .build import FEATURE_COLUMNS, METADATA_COLUMNS, discover_log_files, extract_label_fields
+from .io import load_run_log
+from .manifest import fingerprint
+
+LOGGER = logging.getLogger("dataprep")
+
+CATALOG_NAME = "catalog.sqlite"
+CATALOG_VERSION = 1
+
+CATALOG_COLUMNS = ("timestamp_utc", "cycle_index") + FEATURE_COLUMNS + METADATA_COLUMNS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    format TEXT NOT NULL,
+    sample_name TEXT,
+    label_path TEXT,
+    category TEXT,
+    primary_label TEXT,
+    target_label TEXT,
+    specimen_id TEXT,
+    storage TEXT,
+    notes TEXT,
+    profile_name TEXT,
+    profile_hash TEXT,
+    rows INTEGER,
+    cycles INTEGER,
+    steps_per_cycle INTEGER,
+    nan_rate REAL,
+    started_utc TEXT,
+    ended_utc TEXT,
+    error TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_profile ON runs (profile_name, started_utc);
+CREATE INDEX IF NOT EXISTS runs_profile_hash ON runs (profile_hash, steps_per_cycle);
+CREATE INDEX IF NOT EXISTS runs_label ON runs (category, primary_label);
+CREATE INDEX IF NOT EXISTS runs_specimen ON runs (specimen_id);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_utc);
+"""
+
+RUN_FIELDS = (
+    "path",
+    "size",
+    "mtime_ns",
+    "sha256",
+    "format",
+    "sample_name",
+    "label_path",
+    "category",
+    "primary_label",
+    "target_label",
+    "specimen_id",
+    "storage",
+    "notes",
+    "profile_name",
+    "profile_hash",
+    "rows",
+    "cycles",
+    "steps_per_cycle",
+    "nan_rate",
+    "started_utc",
+    "ended_utc",
+    "error",
+    "indexed_at",
+)
+
+
+def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Index collector run logs and query the run catalogue.")
+    parser.add_argument("--logs-root", type=Path, default=Path("logs"), help="Root directory with collector run logs.")
+    parser.add_argument("--db", type=Path, default=None, help=f"Catalogue file (default: <logs-root>/{CATALOG_NAME}).")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes used to index new or changed logs.")
+    parser.add_argument("--profile", type=str, default=None, help="Profile name or hash (glob patterns allowed).")
+    parser.add_argument("--label", type=str, default=None, help="Case-insensitive substring of the label path.")
+    parser.add_argument("--specimen", type=str, default=None, help="Specimen id (glob patterns allowed).")
+    parser.add_argument("--since", type=str, default=None, help="Runs started on or after this UTC date/time.")
+    parser.add_argument("--until", type=str, default=None, help="Runs started before this UTC date/time.")
+    return parser.parse_args(args)
+
+
+def _timestamp(value: object) -> Optional[str]:
+    if value is None or pd.isna(value):
+        return None
+    stamp = pd.Timestamp(value)
+    stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+    return stamp.isoformat()
+
+
+def describe_log(path: Path) -> Dict[str, object]:
+    """Parse one run log and return its catalogue fields (without the file fingerprint)."""
+    record: Dict[str, object] = {"format": path.suffix.lower().lstrip(".")}
+    try:
+        frame = load_run_log(path, columns=CATALOG_COLUMNS)
+    except Exception as exc:
+        LOGGER.error("Failed to index %s: %s", path, exc)
+        record["error"] = str(exc)
+        return record
+    record["rows"] = int(len(frame))
+    if frame.empty:
+        return record
+
+    first = frame.iloc[0]
+    for name in METADATA_COLUMNS:
+        value = first.get(name)
+        record[name] = None if value is None or pd.isna(value) else str(value)
+    if record.get("sample_name") is not None:
+        record.update(extract_label_fields(str(record["sample_name"])))
+
+    counts = frame["cycle_index"].dropna().value_counts()
+    record["cycles"] = int(counts.size)
+    if counts.size:
+        # Most common step count; ties resolve to the smaller value.
+        step_counts = counts.value_counts()
+        record["steps_per_cycle"] = int(step_counts[step_counts == step_counts.max()].index.min())
+    features = frame[list(FEATURE_COLUMNS)].to_numpy(dtype=float)
+    record["nan_rate"] = float(np.isnan(features).any(axis=1).mean())
+    stamps = frame["timestamp_utc"].dropna() if "timestamp_utc" in frame else pd.Series(dtype=object)
+    if not stamps.empty:
+        record["started_utc"] = _timestamp(stamps.iloc[0])
+        record["ended_utc"] = _timestamp(stamps.iloc[-1])
+    return record
+
+
+class RunCatalog:
+    """SQLite index with one row per run log under ``logs_root``.
+
+    Paths are stored relative to ``logs_root`` so the archive can be moved
+    together with its catalogue. :meth:`update` only parses logs whose size,
+    mtime and content hash changed since they were last indexed, and
+    :meth:`select` answers label/profile/date queries from the indexes without
+    touching the logs.
+    """
+
+    def __init__(self, logs_root: Path, db_path: Optional[Path] = None) -> None:
+        self.logs_root = Path(logs_root)
+        self.db_path = Path(db_path) if db_path is not None else self.logs_root / CATALOG_NAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets the collector append while dataprep or the workflow UI read.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_VERSION):
+            LOGGER.info("Catalogue %s has an unsupported version; re-indexing", self.db_path)
+            self._conn.execute("DROP TABLE IF EXISTS runs")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        self._conn.commit()
+
+    def __enter__(self) -> "RunCatalog":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _key(self, path: Path) -> str:
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.logs_root.resolve()).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    def _known(self) -> Dict[str, Dict[str, object]]:
+        rows = self._conn.execute("SELECT path, size, mtime_ns, sha256 FROM runs")
+        return {row["path"]: dict(row) for row in rows}
+
+    def _store(self, key: str, entry: Dict[str, object], record: Dict[str, object]) -> None:
+        values = {name: None for name in RUN_FIELDS}
+        values.update(record)
+        values.update(
+            path=key,
+            size=entry["size"],
+            mtime_ns=entry["mtime_ns"],
+            sha256=entry["sha256"],
+            indexed_at=datetime.now(timezone.utc).isoformat(),
+        )
+        placeholders = ", ".join("?" for _ in RUN_FIELDS)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({placeholders})",
+            [values[name] for name in RUN_FIELDS],
+        )
+
+    def record(self, path: Path) -> bool:
+        """Index a single log (e.g. one the collector just closed); returns True if it was parsed."""
+        key = self._key(path)
+        previous = self._known().get(key)
+        entry = fingerprint(Path(path), previous)
+        if previous is not None and previous["sha256"] == entry["sha256"]:
+            return False
+        self._store(key, entry, describe_log(Path(path)))
+        self._conn.commit()
+        return True
+
+    def update(self, jobs: int = 1, log_files: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """Bring the catalogue in line with the logs on disk.
+
+        Unchanged logs are recognised from their size and mtime alone; logs that
+        were only touched keep their row, and removed logs are dropped.
+        """
+        files = sorted(log_files) if log_files is not None else discover_log_files(self.logs_root)
+        known = self._known()
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        dirty: List[Path] = []
+        entries: Dict[str, Dict[str, object]] = {}
+        seen = set()
+        for path in files:
+            key = self._key(path)
+            seen.add(key)
+            previous = known.get(key)
+            entry = fingerprint(path, previous)
+            if previous is not None and previous["sha256"] == entry["sha256"]:
+                if (previous["size"], previous["mtime_ns"]) != (entry["size"], entry["mtime_ns"]):
+                    self._conn.execute(
+                        "UPDATE runs SET size = ?, mtime_ns = ? WHERE path = ?",
+                        (entry["size"], entry["mtime_ns"], key),
+                    )
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if previous is not None else "added"] += 1
+            entries[key] = entry
+            dirty.append(path)
+
+        if dirty:
+            LOGGER.info("Indexing %s new or changed run logs", len(dirty))
+        if jobs > 1 and len(dirty) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(dirty))) as pool:
+                records = list(pool.map(describe_log, dirty))
+        else:
+            records = [describe_log(path) for path in dirty]
+        for path, record in zip(dirty, records):
+            key = self._key(path)
+            self._store(key, entries[key], record)
+
+        for key in set(known) - seen:
+            self._conn.execute("DELETE FROM runs WHERE path = ?", (key,))
+            stats["removed"] += 1
+        self._conn.commit()
+        return stats
+
+    def select(
+        self,
+        profile: Optional[str] = None,
+        label: Optional[str] = None,
+        specimen: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        steps_per_cycle: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Return matching runs, ordered by start time, with absolute ``path`` values.
+
+        ``profile`` matches the profile name or hash and ``specimen`` the specimen
+        id, both as glob patterns; ``label`` is a case-insensitive substring of the
+        label path; ``since``/``until`` bound the UTC start time (``until`` is
+        exclusive) and may be dates such as ``2025-10-01``.
+        """
+        clauses: List[str] = []
+        params: List[object] = []
+        if profile is not None:
+            clauses.append("(profile_name GLOB ? OR profile_hash GLOB ?)")
+            params.extend([profile, profile])
+        if label is not None:
+            clauses.append("label_path LIKE ?")
+            params.append(f"%{label}%")
+        if specimen is not None:
+            clauses.append("specimen_id GLOB ?")
+            params.append(specimen)
+        if since is not None:
+            clauses.append("started_utc >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("started_utc < ?")
+            params.append(_timestamp(until))
+        if steps_per_cycle is not None:
+            clauses.append("steps_per_cycle = ?")
+            params.append(int(steps_per_cycle))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT * FROM runs{where} ORDER BY started_utc, path"
+        frame = pd.read_sql_query(query, self._conn, params=params)
+        frame["path"] = [str(self.logs_root / key) if not Path(key).is_absolute() else key for key in frame["path"]]
+        return frame
+
+    def paths(self, **filters: object) -> List[Path]:
+        return [Path(value) for value in self.select(**filters)["path"]]  # type: ignore[arg-type]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    with RunCatalog(ns.logs_root, ns.db) as catalog:
+        stats = catalog.update(jobs=max(1, ns.jobs))
+        LOGGER.info(
+            "Catalogue %s: %s added, %s updated, %s removed, %s unchanged",
+            catalog.db_path,
+            stats["added"],
+            stats["updated"],
+            stats["removed"],
+            stats["unchanged"],
+        )
+        runs = catalog.select(profile=ns.profile, label=ns.label, specimen=ns.specimen, since=ns.since, until=ns.until)
+    columns = ["path", "label_path", "specimen_id", "profile_name", "cycles", "rows", "nan_rate", "started_utc"]
+    LOGGER.info("%s matching runs", len(runs))
+    if not runs.empty:
+        print(runs[columns].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
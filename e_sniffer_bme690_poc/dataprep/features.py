@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 from .schemas import RunMetadata
 
@@ -80,3 +84,464 @@ def _quality_for_window(window: pd.DataFrame) -> str:
     if "gap_filled" in window and window["gap_filled"].any():
         return "interpolated"
     return "clean"
+
+
+def window_starts(total: int, window_samples: int, stride_samples: int) -> np.ndarray:
+    """Start offsets of the windows :func:`dataprep.utils.sliding_windows` yields."""
+    if window_samples <= 0 or stride_samples <= 0:
+        raise ValueError("Window and stride must be positive")
+    return np.arange(0, max(total - window_samples + 1, 0), stride_samples, dtype=np.int64)
+
+
+class PrefixStats:
+    """Cumulative sums over one series that answer window statistics in O(1) per window.
+
+    Values are shifted by the series mean before accumulating so that variance
+    and slope do not lose precision on large readings such as gas resistance.
+    Min/max use a strided view, one vectorised reduction for all windows.
+    A NaN in a window turns a statistic into NaN exactly when the per-window
+    reference does: always for the mean, only when it falls in the first or last
+    quintile for the early/late ratio, and never for statistics the reference
+    returns as constants for short windows.
+    """
+
+    def __init__(self, series: np.ndarray) -> None:
+        values = np.asarray(series, dtype=float)
+        finite = np.isfinite(values)
+        self.values = values
+        self.shift = float(values[finite].mean()) if finite.any() else 0.0
+        shifted = np.where(finite, values - self.shift, 0.0)
+        index = np.arange(values.size, dtype=float)
+        self._sum = np.concatenate([[0.0], np.cumsum(shifted)])
+        self._sum_sq = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+        self._sum_idx = np.concatenate([[0.0], np.cumsum(shifted * index)])
+        self._nan = np.concatenate([[0], np.cumsum(~finite)])
+        abs_diff = np.abs(np.diff(shifted)) if values.size > 1 else np.zeros(0)
+        self._abs_diff = np.concatenate([[0.0], np.cumsum(abs_diff)])
+
+    def _window_sum(self, prefix: np.ndarray, starts: np.ndarray, size: int) -> np.ndarray:
+        return prefix[starts + size] - prefix[starts]
+
+    def has_nan(self, starts: np.ndarray, size: int) -> np.ndarray:
+        return self._window_sum(self._nan, starts, size) > 0
+
+    def mean(self, starts: np.ndarray, size: int) -> np.ndarray:
+        result = self._window_sum(self._sum, starts, size) / size + self.shift
+        return np.where(self.has_nan(starts, size), np.nan, result)
+
+    def minimum(self, starts: np.ndarray, size: int) -> np.ndarray:
+        return sliding_window_view(self.values, size)[starts].min(axis=1)
+
+    def maximum(self, starts: np.ndarray, size: int) -> np.ndarray:
+        return sliding_window_view(self.values, size)[starts].max(axis=1)
+
+    def stats(self, starts: np.ndarray, size: int, sample_rate_hz: float, offset: float = 0.0) -> Dict[str, np.ndarray]:
+        """The ``add_stats`` block of :func:`compute_window_features` for every window.
+
+        ``offset`` is subtracted from the series first (e.g. a gas baseline), which
+        moves mean/min/max and the early/late means but not the spread.
+        """
+        total = self._window_sum(self._sum, starts, size)
+        mean_shifted = total / size
+        nan_mask = self.has_nan(starts, size)
+
+        if size > 1:
+            sum_sq = self._window_sum(self._sum_sq, starts, size)
+            spread = np.maximum(sum_sq - total * mean_shifted, 0.0)
+            # Differences of large prefix sums cancel; windows whose spread is within
+            # reach of that rounding error are recomputed from their samples.
+            rounding = 1e-9 * (self._sum_sq[starts + size] + self._sum_sq[starts])
+            unstable = np.flatnonzero((spread < rounding) & ~nan_mask)
+            if unstable.size:
+                windows = sliding_window_view(self.values, size)[starts[unstable]]
+                spread[unstable] = ((windows - windows.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+            std = np.where(nan_mask, np.nan, np.sqrt(spread / (size - 1)))
+        else:
+            std = np.zeros(starts.size)
+
+        if size >= 2 and sample_rate_hz > 0:
+            # OLS slope against k = 0..size-1 within the window, converted to per-second.
+            centre = (size - 1) / 2.0
+            weighted = self._window_sum(self._sum_idx, starts, size) - starts * total
+            numerator = weighted - centre * total
+            rounding = 1e-9 * (
+                np.abs(self._sum_idx[starts + size])
+                + np.abs(self._sum_idx[starts])
+                + (starts + size) * (np.abs(self._sum[starts + size]) + np.abs(self._sum[starts]))
+            )
+            unstable = np.flatnonzero((np.abs(numerator) < rounding) & ~nan_mask)
+            if unstable.size:
+                windows = sliding_window_view(self.values, size)[starts[unstable]]
+                numerator[unstable] = (windows * (np.arange(size) - centre)).sum(axis=1)
+            slope = np.where(nan_mask, np.nan, numerator / (size * (size * size - 1) / 12.0) * sample_rate_hz)
+        else:
+            slope = np.zeros(starts.size)
+
+        if size >= 2:
+            mean_abs_diff = (self._abs_diff[starts + size - 1] - self._abs_diff[starts]) / (size - 1)
+            mean_abs_diff = np.where(nan_mask, np.nan, mean_abs_diff)
+        else:
+            mean_abs_diff = np.zeros(starts.size)
+
+        if size >= 5:
+            quint = max(int(size * 0.2), 1)
+            base = self.shift - offset
+            early = (self._sum[starts + quint] - self._sum[starts]) / quint + base
+            late = (self._sum[starts + size] - self._sum[starts + size - quint]) / quint + base
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(late == 0, 0.0, early / np.where(late == 0, 1.0, late))
+            # Only NaNs inside the two quintiles reach the reference's early/late means.
+            quint_nan = (self._window_sum(self._nan, starts, quint) > 0) | (
+                self._window_sum(self._nan, starts + size - quint, quint) > 0
+            )
+            ratio = np.where(quint_nan, np.nan, ratio)
+        else:
+            ratio = np.ones(starts.size)
+
+        # Short windows keep the reference's constants (std 0, ratio 1, ...) even with NaNs.
+        return {
+            "mean": np.where(nan_mask, np.nan, mean_shifted + self.shift - offset),
+            "std": std,
+            "min": self.minimum(starts, size) - offset,
+            "max": self.maximum(starts, size) - offset,
+            "slope_per_s": slope,
+            "mean_abs_diff": mean_abs_diff,
+            "early_late_ratio": ratio,
+        }
+
+
+def compute_window_feature_table(
+    df: pd.DataFrame,
+    metadata: RunMetadata,
+    window_sec: int,
+    stride_sec: int,
+    sample_rate_hz: float,
+) -> pd.DataFrame:
+    """Columnar equivalent of ``compute_window_features`` over ``sliding_windows``.
+
+    Every statistic comes from prefix sums built once per column, so the cost no
+    longer scales with the overlap between windows. Values match the per-window
+    path to floating-point tolerance; rows and columns are in the same order.
+    """
+    size = int(round(window_sec * sample_rate_hz))
+    starts = window_starts(df.shape[0], size, int(round(stride_sec * sample_rate_hz)))
+    count = starts.size
+    timestamps = df["timestamp_ms"].to_numpy(dtype=np.int64)
+
+    columns: Dict[str, object] = {
+        "specimen_id": [metadata.specimen_id] * count,
+        "run_id": [metadata.run_id] * count,
+        "window_start_ms": timestamps[starts] if count else np.zeros(0, dtype=np.int64),
+        "window_end_ms": timestamps[starts + size - 1] if count else np.zeros(0, dtype=np.int64),
+        "quality_class": _quality_for_windows(df, starts, size),
+        "freshness_label": [metadata.label()] * count,
+        "meat_type": [metadata.meat_type] * count,
+        "age_days": np.full(count, metadata.age_days, dtype=np.int64),
+    }
+    for prefix, column in (("gas", "gas_resistance_ohms"), ("gas_delta", "gas_delta")):
+        stats = PrefixStats(df[column].to_numpy(dtype=float)).stats(starts, size, sample_rate_hz) if count else {}
+        for name in ("mean", "std", "min", "max", "slope_per_s", "mean_abs_diff", "early_late_ratio"):
+            columns[f"{prefix}_{name}"] = stats.get(name, np.zeros(0))
+    for prefix, column in (("temperature", "temperature_C"), ("humidity", "humidity_pct")):
+        if count:
+            series = PrefixStats(df[column].to_numpy(dtype=float))
+            columns[f"{prefix}_mean"] = series.mean(starts, size)
+            columns[f"{prefix}_range"] = series.maximum(starts, size) - series.minimum(starts, size)
+        else:
+            columns[f"{prefix}_mean"] = np.zeros(0)
+            columns[f"{prefix}_range"] = np.zeros(0)
+    return pd.DataFrame(columns)
+
+
+def _quality_for_windows(df: pd.DataFrame, starts: np.ndarray, size: int) -> List[str]:
+    quality = np.full(starts.size, "clean", dtype=object)
+    for column, label in (("gap_filled", "interpolated"), ("gap_unfilled", "gap")):
+        if column not in df or not starts.size:
+            continue
+        flags = np.concatenate([[0], np.cumsum(df[column].to_numpy(dtype=bool))])
+        quality[(flags[starts + size] - flags[starts]) > 0] = label
+    return quality.tolist()
+
+
+RAW_COLUMNS = [
+    "timestamp_ms",
+    "gas_resistance_ohms",
+    "temperature_C",
+    "humidity_pct",
+    "pressure_Pa",
+]
+
+
+@dataclass
+class FeatureConfig:
+    window_sec: int
+    stride_sec: int
+    baseline_sec: int
+    sample_rate_hz: float
+
+
+class _RollingStats:
+    """Running statistics over the most recent ``size`` samples of one channel.
+
+    Sums are kept relative to a shift value and re-synchronised from the ring
+    buffer every time it wraps, which bounds floating-point drift on long runs
+    while keeping the amortised cost per sample constant. NaN samples contribute
+    nothing to the sums but mark every window that contains them as NaN.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.quint = max(int(size * 0.2), 1)
+        self._values = np.full(size, np.nan)
+        self._count = 0
+        self._base = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._sum_idx = 0.0
+        self._abs_diff = 0.0
+        self._early = 0.0
+        self._late = 0.0
+        self._nan_count = 0
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def _at(self, index: int) -> float:
+        return float(self._values[index % self.size])
+
+    def _shifted(self, value: float) -> float:
+        return value - self._shift if math.isfinite(value) else 0.0
+
+    def push(self, value: float) -> None:
+        t = self._count
+        size = self.size
+        if t == 0 and math.isfinite(value):
+            self._shift = value
+        y = self._shifted(value)
+        finite = math.isfinite(value)
+
+        leaving = self._at(t - size) if t >= size else None
+        if leaving is not None:
+            y_out = self._shifted(leaving)
+            self._sum -= y_out
+            self._sum_sq -= y_out * y_out
+            self._sum_idx -= (t - size - self._base) * y_out
+            self._nan_count -= 0 if math.isfinite(leaving) else 1
+            self._early -= y_out
+            if size > 1:
+                successor = self._at(t - size + 1)
+                if math.isfinite(leaving) and math.isfinite(successor):
+                    self._abs_diff -= abs(successor - leaving)
+        if t >= 1 and size > 1:
+            previous = self._at(t - 1)
+            if finite and math.isfinite(previous):
+                self._abs_diff += abs(value - previous)
+        early_in = t - size + self.quint
+        if early_in >= 0:
+            self._early += y if early_in == t else self._shifted(self._at(early_in))
+        if t >= self.quint:
+            self._late -= self._shifted(self._at(t - self.quint))
+        self._late += y
+
+        self._sum += y
+        self._sum_sq += y * y
+        self._sum_idx += (t - self._base) * y
+        self._nan_count += 0 if finite else 1
+        self._values[t % size] = value
+        self._count = t + 1
+
+        while self._min and self._min[0][0] <= t - size:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= t - size:
+            self._max.popleft()
+        if finite:
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((t, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((t, value))
+
+        if self._count >= size and self._count % size == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        # The ring is in chronological order whenever the count is a multiple of its size.
+        values = self._values
+        finite = np.isfinite(values)
+        if finite.any():
+            self._shift = float(np.mean(values[finite]))
+        shifted = np.where(finite, values - self._shift, 0.0)
+        self._base = self._count - self.size
+        self._sum = float(shifted.sum())
+        self._sum_sq = float(np.dot(shifted, shifted))
+        self._sum_idx = float(np.dot(np.arange(self.size, dtype=float), shifted))
+        diffs = np.abs(np.diff(values))
+        self._abs_diff = float(diffs[np.isfinite(diffs)].sum())
+        self._early = float(shifted[: self.quint].sum())
+        self._late = float(shifted[-self.quint :].sum())
+        self._nan_count = int((~finite).sum())
+
+    def mean(self) -> float:
+        if self._nan_count:
+            return float("nan")
+        return self._shift + self._sum / self.size
+
+    def minimum(self) -> float:
+        return float("nan") if self._nan_count else self._min[0][1]
+
+    def maximum(self) -> float:
+        return float("nan") if self._nan_count else self._max[0][1]
+
+    def stats(self, sample_rate_hz: float, offset: float = 0.0) -> Dict[str, float]:
+        """Return the ``compute_window_features`` statistics for the current window."""
+        n = self.size
+        if self._nan_count:
+            nan = float("nan")
+            return {
+                "mean": nan,
+                "std": nan,
+                "min": nan,
+                "max": nan,
+                "slope_per_s": nan,
+                "mean_abs_diff": nan,
+                "early_late_ratio": nan,
+            }
+        mean = self._shift + self._sum / n
+        if n > 1:
+            variance = max(self._sum_sq - self._sum * self._sum / n, 0.0) / (n - 1)
+            start = self._count - n - self._base
+            sum_i = n * (n - 1) / 2.0
+            sum_ii = (n - 1) * n * (2 * n - 1) / 6.0
+            sum_iy = self._sum_idx - start * self._sum
+            slope = (n * sum_iy - sum_i * self._sum) / (n * sum_ii - sum_i * sum_i)
+            slope_per_s = float(slope * sample_rate_hz) if sample_rate_hz > 0 else 0.0
+            mean_abs_diff = self._abs_diff / (n - 1)
+        else:
+            variance = 0.0
+            slope_per_s = 0.0
+            mean_abs_diff = 0.0
+        if n < 5:
+            ratio = 1.0
+        else:
+            early = self._shift + self._early / self.quint - offset
+            late = self._shift + self._late / self.quint - offset
+            ratio = 0.0 if late == 0 else float(early / late)
+        return {
+            "mean": float(mean - offset),
+            "std": math.sqrt(variance),
+            "min": float(self._min[0][1] - offset),
+            "max": float(self._max[0][1] - offset),
+            "slope_per_s": slope_per_s,
+            "mean_abs_diff": float(mean_abs_diff),
+            "early_late_ratio": ratio,
+        }
+
+
+class RealTimeFeatureExtractor:
+    """Maintains ring-buffered running statistics and emits dataprep-equivalent features.
+
+    The per-sample cost is constant: no sample history beyond one window is kept
+    and no DataFrame is materialised per window. Features match
+    :func:`compute_window_features` to floating-point tolerance.
+    """
+
+    def __init__(self, metadata: Dict[str, object], config: FeatureConfig) -> None:
+        self.metadata = RunMetadata(**metadata)
+        self.config = config
+        self.window_samples = int(round(config.window_sec * config.sample_rate_hz))
+        self.stride_samples = int(round(config.stride_sec * config.sample_rate_hz))
+        self.baseline_samples = int(round(config.baseline_sec * config.sample_rate_hz))
+        if self.window_samples <= 0 or self.stride_samples <= 0:
+            raise ValueError("Window and stride must be positive")
+        self._gas = _RollingStats(self.window_samples)
+        self._temperature = _RollingStats(self.window_samples)
+        self._humidity = _RollingStats(self.window_samples)
+        self._timestamps = np.zeros(self.window_samples, dtype=np.int64)
+        self._baseline_value: Optional[float] = None
+        self._baseline_sum = 0.0
+        self._baseline_valid = 0
+        self._baseline_seen = 0
+        self._next_end = self.window_samples
+        self._static_features: Dict[str, object] = {
+            "specimen_id": self.metadata.specimen_id,
+            "run_id": self.metadata.run_id,
+        }
+
+    def ingest(self, chunk: pd.DataFrame) -> List[Dict[str, object]]:
+        if chunk.empty:
+            return []
+        missing_cols = [col for col in RAW_COLUMNS if col not in chunk.columns]
+        if missing_cols:
+            raise ValueError(f"Chunk missing columns: {missing_cols}")
+        timestamps = chunk["timestamp_ms"].to_numpy(dtype=np.int64)
+        gas = chunk["gas_resistance_ohms"].to_numpy(dtype=float)
+        temperature = chunk["temperature_C"].to_numpy(dtype=float)
+        humidity = chunk["humidity_pct"].to_numpy(dtype=float)
+        self._update_baseline(gas)
+
+        features: List[Dict[str, object]] = []
+        for idx in range(len(timestamps)):
+            self._timestamps[self._gas.count % self.window_samples] = timestamps[idx]
+            self._gas.push(float(gas[idx]))
+            self._temperature.push(float(temperature[idx]))
+            self._humidity.push(float(humidity[idx]))
+            if self._gas.count == self._next_end:
+                features.append(self._window_features())
+                self._next_end += self.stride_samples
+        return features
+
+    def _update_baseline(self, gas: np.ndarray) -> None:
+        # Like the batch path, the baseline is resolved per chunk, so windows completed
+        # in the chunk that finishes the baseline region already use it.
+        if self._baseline_value is not None or self.baseline_samples <= 0:
+            return
+        needed = self.baseline_samples - self._baseline_seen
+        head = gas[:needed]
+        finite = head[np.isfinite(head)]
+        self._baseline_sum += float(finite.sum())
+        self._baseline_valid += int(finite.size)
+        self._baseline_seen += int(head.size)
+        if self._baseline_seen >= self.baseline_samples:
+            self._baseline_value = (
+                self._baseline_sum / self._baseline_valid if self._baseline_valid else float("nan")
+            )
+
+    def _window_features(self) -> Dict[str, object]:
+        end_idx = self._gas.count - 1
+        start_idx = end_idx - self.window_samples + 1
+        features: Dict[str, object] = dict(self._static_features)
+        features["window_start_ms"] = int(self._timestamps[start_idx % self.window_samples])
+        features["window_end_ms"] = int(self._timestamps[end_idx % self.window_samples])
+        features["quality_class"] = "clean"
+        features["freshness_label"] = self.metadata.label()
+        features["meat_type"] = self.metadata.meat_type
+        features["age_days"] = self.metadata.age_days
+
+        rate = self.config.sample_rate_hz
+        for name, value in self._gas.stats(rate).items():
+            features[f"gas_{name}"] = value
+        if self._baseline_value is not None:
+            delta_stats = self._gas.stats(rate, offset=self._baseline_value)
+        else:
+            delta_stats = {
+                "mean": 0.0,
+                "std": 0.0,
+                "min": 0.0,
+                "max": 0.0,
+                "slope_per_s": 0.0,
+                "mean_abs_diff": 0.0,
+                "early_late_ratio": 1.0 if self.window_samples < 5 else 0.0,
+            }
+        for name, value in delta_stats.items():
+            features[f"gas_delta_{name}"] = value
+
+        features["temperature_mean"] = self._temperature.mean()
+        features["temperature_range"] = self._temperature.maximum() - self._temperature.minimum()
+        features["humidity_mean"] = self._humidity.mean()
+        features["humidity_range"] = self._humidity.maximum() - self._humidity.minimum()
+        return features
@@ -3,9 +3,14 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from collector.logger import CSV_HEADER, RUN_CONSTANT_COLUMNS, ArrowLogReader
 
 from .schemas import RunMetadata
 
@@ -46,6 +51,97 @@ def load_raw_csv(path: Path) -> pd.DataFrame:
     return df
 
 
+# Explicit dtypes for the collector ``CSV_HEADER`` layout. Integer-valued columns are
+# read as float64 so that a missing reading stays NaN instead of forcing inference,
+# and the run-constant columns become categoricals (one dictionary per file).
+RUN_LOG_DTYPES: Dict[str, str] = {
+    "timestamp_utc": "string[pyarrow]",
+    "elapsed_time_s": "float64",
+    "cycle_index": "float64",
+    "step_index": "float64",
+    "commanded_heater_temp_C": "float64",
+    "step_duration_ticks": "float64",
+    "step_duration_ms": "float64",
+    "heater_heat_stable": "boolean",
+    "sensor_status_raw": "float64",
+    "gas_resistance_ohm": "float64",
+    "sensor_temperature_C": "float64",
+    "sensor_humidity_RH": "float64",
+    "pressure_Pa": "float64",
+    **{name: "category" for name in RUN_CONSTANT_COLUMNS},
+}
+
+_ARROW_CSV_TYPES = {
+    "string[pyarrow]": pa.string(),
+    "float64": pa.float64(),
+    "boolean": pa.bool_(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+def load_run_log(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a collector run log, either CSV or the columnar Arrow format.
+
+    ``columns`` restricts the result to a subset of ``CSV_HEADER``.
+    """
+    if path.suffix.lower() == ".arrow":
+        frame = read_arrow_log(path)
+        return frame if columns is None else frame[list(columns)]
+    return read_run_csv(path, columns=columns)
+
+
+def read_run_csv(path: Path, columns: Optional[Sequence[str]] = None, engine: str = "pyarrow") -> pd.DataFrame:
+    """Read a collector CSV log with the ``RUN_LOG_DTYPES`` schema.
+
+    Only ``columns`` (default: every column present in the file) are parsed.
+    ``engine="pyarrow"`` uses the multi-threaded Arrow CSV parser and
+    ``engine="c"`` the pandas parser; both return the same frame.
+    """
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        header = fh.readline().strip().split(",")
+    if header == [""]:
+        raise ValueError(f"No columns to parse from {path}")
+    wanted = [name for name in (columns if columns is not None else header) if name in header]
+    dtypes = {name: RUN_LOG_DTYPES.get(name, "string[pyarrow]") for name in wanted}
+
+    if engine == "pyarrow":
+        table = pa_csv.read_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: _ARROW_CSV_TYPES[kind] for name, kind in dtypes.items()},
+                include_columns=wanted,
+                strings_can_be_null=True,
+            ),
+        )
+        frame = table.to_pandas(types_mapper={pa.bool_(): pd.BooleanDtype(), pa.string(): pd.StringDtype("pyarrow")}.get)
+    elif engine == "c":
+        frame = pd.read_csv(path, usecols=wanted, dtype=dtypes, engine="c")[wanted]
+    else:
+        raise ValueError(f"Unsupported CSV engine '{engine}'")
+    return frame
+
+
+def read_arrow_log(path: Path) -> pd.DataFrame:
+    """Load an Arrow run log with the collector ``CSV_HEADER`` columns.
+
+    The run-constant fields stored in the schema metadata are expanded as
+    single-category categoricals and ``timestamp_utc`` stays a UTC datetime column.
+    """
+    reader = ArrowLogReader(path)
+    batches = reader.read_new()
+    if reader.schema is None:
+        raise ValueError(f"{path} is not an Arrow run log")
+    frame = pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+    return expand_run_metadata(frame, reader.run_metadata)
+
+
+def expand_run_metadata(frame: pd.DataFrame, metadata: Dict[str, str]) -> pd.DataFrame:
+    codes = np.zeros(len(frame), dtype=np.int8)
+    for name in RUN_CONSTANT_COLUMNS:
+        frame[name] = pd.Categorical.from_codes(codes, categories=[metadata.get(name, "")])
+    return frame[CSV_HEADER]
+
+
 def load_metadata(path: Path) -> RunMetadata:
     with path.open("r", encoding="utf-8") as fp:
         payload = json.load(fp)
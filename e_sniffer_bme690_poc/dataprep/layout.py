@@ -0,0 +1,33 @@
+"""On-disk layout of a prepared directory: partition index and snapshot pointer.
+
+Only the standard library is imported here, so tools that just locate prepared
+data (such as the workflow UI) do not pull in NumPy, pandas or torch.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List
+
+PARTITION_DIR = "partitions"
+PARTITION_INDEX = "partitions.json"
+
+# Published outputs live in snapshots/<stamp>/; CURRENT names the one readers should open.
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_POINTER = "CURRENT"
+
+
+def list_partitions(prepared_dir: Path) -> List[Dict[str, object]]:
+    """Partitions written by ``dataprep.build --partition-by-profile`` (empty for a flat directory)."""
+    index_path = prepared_dir / PARTITION_INDEX
+    if not index_path.exists():
+        return []
+    return list(json.loads(index_path.read_text(encoding="utf-8"))["partitions"])
+
+
+def resolve_snapshot(prepared_dir: Path) -> Path:
+    """Follow the ``CURRENT`` pointer that ``dataprep.build --watch`` publishes, if there is one."""
+    pointer = prepared_dir / SNAPSHOT_POINTER
+    if not pointer.exists():
+        return prepared_dir
+    return prepared_dir / pointer.read_text(encoding="utf-8").strip()
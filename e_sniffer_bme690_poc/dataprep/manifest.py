@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+LOGGER = logging.getLogger("dataprep")
+
+MANIFEST_NAME = "manifest.json"
+SHARD_DIR = "shards"
+MANIFEST_VERSION = 1
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path: Path, previous: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Return size, mtime and content hash for ``path``.
+
+    The hash recorded in ``previous`` is reused when size and mtime are unchanged,
+    so an unchanged archive is not re-read on every build.
+    """
+    stat = path.stat()
+    entry: Dict[str, object] = {"path": str(path), "size": int(stat.st_size), "mtime_ns": int(stat.st_mtime_ns)}
+    if previous and previous.get("size") == entry["size"] and previous.get("mtime_ns") == entry["mtime_ns"]:
+        entry["sha256"] = previous["sha256"]
+    else:
+        entry["sha256"] = file_digest(path)
+    return entry
+
+
+def load_manifest(out_root: Path) -> Optional[Dict[str, object]]:
+    path = out_root / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        LOGGER.warning("Ignoring unreadable manifest %s: %s", path, exc)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        LOGGER.info("Manifest %s has an unsupported version; rebuilding from scratch", path)
+        return None
+    return manifest
+
+
+def save_manifest(out_root: Path, manifest: Dict[str, object]) -> None:
+    out_root.mkdir(parents=True, exist_ok=True)
+    payload = dict(manifest, version=MANIFEST_VERSION)
+    tmp_path = out_root / (MANIFEST_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    tmp_path.replace(out_root / MANIFEST_NAME)
+
+
+def shard_path(out_root: Path, sha256: str) -> Path:
+    return out_root / SHARD_DIR / f"{sha256}.npz"
+
+
+def write_shard(
+    out_root: Path,
+    sha256: str,
+    signals: List[np.ndarray],
+    metadata_rows: List[Dict[str, object]],
+    feature_count: int,
+) -> None:
+    path = shard_path(out_root, sha256)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stacked = np.stack(signals, axis=0) if signals else np.zeros((0, 0, feature_count), dtype=np.float32)
+    with path.open("wb") as fh:
+        np.savez(fh, signals=stacked, metadata=np.array(json.dumps(metadata_rows)))
+
+
+def read_shard(out_root: Path, sha256: str, source: Path) -> Tuple[List[np.ndarray], List[Dict[str, object]]]:
+    """Load cached cycles, re-pointing ``source_file`` at the current path of the log."""
+    with np.load(shard_path(out_root, sha256)) as data:
+        signals = list(data["signals"])
+        metadata_rows = json.loads(str(data["metadata"]))
+    for row in metadata_rows:
+        row["source_file"] = str(source)
+    return signals, metadata_rows
+
+
+def has_shard(out_root: Path, sha256: str) -> bool:
+    return shard_path(out_root, sha256).exists()
+
+
+def prune_shards(out_root: Path, keep: Iterable[str]) -> None:
+    shard_dir = out_root / SHARD_DIR
+    if not shard_dir.exists():
+        return
+    keep_set = set(keep)
+    for path in shard_dir.glob("*.npz"):
+        if path.stem not in keep_set:
+            path.unlink()
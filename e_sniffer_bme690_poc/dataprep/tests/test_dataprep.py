@@ -1,7 +1,11 @@
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
-from dataprep.build import FEATURE_COLUMNS, _stack_signals, build_cycle_samples, extract_label_fields
+from dataprep.build import FEATURE_COLUMNS, _stack_signals, build_cycle_samples, collect_cycles, extract_label_fields
+from dataprep.io import load_run_log
+from dataprep.utils import StreamingResampler, iter_resample_uniform, resample_uniform
 
 
 def test_extract_label_fields_parses_sample_name():
@@ -68,3 +72,467 @@ def test_build_cycle_samples_skips_incomplete_cycles(tmp_path):
 def test_stack_signals_handles_empty():
     stacked = _stack_signals([], expected_steps=0)
     assert stacked.shape == (0, 0, len(FEATURE_COLUMNS))
+
+
+def test_streaming_resampler_matches_batch_resample():
+    timestamps = np.concatenate([np.arange(0, 6000, 1000), np.arange(12000, 16000, 1000)])
+    raw = pd.DataFrame(
+        {
+            "timestamp_ms": timestamps,
+            "gas_resistance_ohms": np.linspace(100.0, 200.0, len(timestamps)),
+            "temperature_C": np.linspace(20.0, 22.0, len(timestamps)),
+        }
+    )
+    expected, _ = resample_uniform(raw, target_hz=1.0, max_gap_sec=2.0)
+
+    resampler = StreamingResampler(raw.columns, target_hz=1.0, max_gap_sec=2.0)
+    chunks = [resampler.push(raw.iloc[[idx]]) for idx in range(len(raw))]
+    streamed = pd.concat(chunks, ignore_index=True)
+
+    assert streamed["timestamp_ms"].tolist() == expected["timestamp_ms"].tolist()
+    for col in ("gas_resistance_ohms", "temperature_C"):
+        np.testing.assert_allclose(streamed[col].to_numpy(), expected[col].to_numpy(dtype=float))
+    assert streamed["gap_filled"].tolist() == expected["gap_filled"].tolist()
+    assert streamed["gap_unfilled"].tolist() == expected["gap_unfilled"].tolist()
+    assert resampler.last_timestamp_ms == 15000
+
+
+def _reference_resample_uniform(df, target_hz, max_gap_sec):
+    """pandas reindex + time interpolation used before resample_uniform moved to NumPy."""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp_ms"], unit="ms")
+    df.set_index("timestamp", inplace=True)
+    freq_ms = int(round(1000 / target_hz))
+    resampled = df.reindex(pd.date_range(df.index.min(), df.index.max(), freq=f"{freq_ms}ms"))
+    missing_before = resampled["gas_resistance_ohms"].isna()
+    limit = int(np.floor(max_gap_sec * target_hz))
+    resampled = resampled.interpolate(method="time", limit=limit if limit > 0 else None, limit_direction="both")
+    missing_after = resampled["gas_resistance_ohms"].isna()
+    resampled["timestamp_ms"] = (resampled.index.view("int64") // 1_000_000).astype("int64")
+    resampled.reset_index(drop=True, inplace=True)
+    resampled["gap_filled"] = ((~missing_after) & missing_before).to_numpy()
+    resampled["gap_unfilled"] = missing_after.to_numpy()
+    return resampled
+
+
+def test_resample_uniform_matches_pandas_reference_in_chunks():
+    rng = np.random.default_rng(11)
+    for trial in range(200):
+        steps = rng.choice([1, 1, 1, 2, 3, 6, 12], size=int(rng.integers(2, 80)))
+        timestamps = 1_760_000_000_000 + np.cumsum(steps) * 1000
+        timestamps[rng.random(timestamps.size) < 0.1] += 400  # off-grid samples are ignored
+        timestamps = np.unique(timestamps)
+        raw = pd.DataFrame(
+            {
+                "timestamp_ms": timestamps,
+                "gas_resistance_ohms": rng.normal(1e5, 5e3, timestamps.size),
+                "temperature_C": rng.normal(25.0, 1.0, timestamps.size),
+            }
+        )
+        for col in ("gas_resistance_ohms", "temperature_C"):
+            raw.loc[rng.random(timestamps.size) < 0.15, col] = np.nan
+        max_gap_sec = float(rng.choice([0.0, 1.0, 3.0, 5.5]))
+        expected = _reference_resample_uniform(raw, 1.0, max_gap_sec)
+
+        resampled, quality_mask = resample_uniform(raw.sample(frac=1.0, random_state=trial), 1.0, max_gap_sec)
+        pd.testing.assert_frame_equal(resampled, expected, check_exact=True)
+        assert quality_mask.tolist() == expected["gap_unfilled"].tolist()
+
+        bounds = [0, *np.sort(rng.integers(0, timestamps.size, size=4)), timestamps.size]
+        chunks = [raw.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        chunked = pd.concat(iter_resample_uniform(chunks, 1.0, max_gap_sec), ignore_index=True)
+        pd.testing.assert_frame_equal(chunked, expected, check_exact=True)
+
+
+def _write_run_logs(tmp_path, rows):
+    from collector.logger import ArrowLogger, CsvLogger
+
+    paths = []
+    for logger_cls, name in ((CsvLogger, "bme690_run.csv"), (ArrowLogger, "bme690_run.arrow")):
+        logger = logger_cls(tmp_path / name, commit_rows=3)
+        logger.write_header()
+        for row in rows:
+            logger.write_row(row)
+        logger.close()
+        paths.append(tmp_path / name)
+    return paths
+
+
+def test_arrow_run_log_matches_csv_cycles(tmp_path):
+    frame = _make_cycle_dataframe(steps=4)
+    frame["timestamp_utc"] = pd.date_range("2025-10-20T12:00:00Z", periods=len(frame), freq="1500ms").map(
+        lambda ts: ts.isoformat()
+    )
+    frame["elapsed_time_s"] = 1.5
+    frame["notes"] = "day1"
+    frame.loc[1, "sensor_status_raw"] = np.nan
+    rows = frame.to_dict("records")
+    csv_path, arrow_path = _write_run_logs(tmp_path, rows)
+
+    csv_df = load_run_log(csv_path)
+    arrow_df = load_run_log(arrow_path)
+    assert list(arrow_df.columns) == list(csv_df.columns)
+    assert arrow_df["profile_hash"].tolist() == ["abc123"] * len(frame)
+    assert pd.to_datetime(csv_df["timestamp_utc"], format="ISO8601").equals(arrow_df["timestamp_utc"])
+
+    csv_signals, csv_meta, _ = build_cycle_samples(csv_df, csv_path, None, drop_unstable=True)
+    arrow_signals, arrow_meta, _ = build_cycle_samples(arrow_df, csv_path, None, drop_unstable=True)
+    np.testing.assert_array_equal(np.stack(csv_signals), np.stack(arrow_signals))
+    assert csv_meta == arrow_meta
+
+
+def test_collect_cycles_parallel_matches_serial(tmp_path):
+    paths = []
+    for idx, steps in enumerate((5, 4, 5, 5)):
+        frame = _make_cycle_dataframe(steps=steps)
+        frame["sample_name"] = f"Category > Label{idx % 2}"
+        path = tmp_path / f"bme690_run{idx}.csv"
+        frame.to_csv(path, index=False)
+        paths.append(path)
+
+    serial = collect_cycles(paths, None, drop_unstable=False, jobs=1)
+    parallel = collect_cycles(paths, None, drop_unstable=False, jobs=2)
+    assert serial[2] == parallel[2] == 5
+    # The 4-step run is rejected in both modes because the first run fixed 5 steps.
+    assert len(serial[0]) == len(parallel[0]) == 6
+    np.testing.assert_array_equal(np.stack(serial[0]), np.stack(parallel[0]))
+    assert serial[1] == parallel[1]
+
+
+def test_incremental_build_reprocesses_only_new_logs(tmp_path, caplog):
+    import json
+    import logging
+
+    from dataprep.build import main
+
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    for idx in range(3):
+        frame = _make_cycle_dataframe(steps=4)
+        frame["sample_name"] = f"Category > Label{idx}"
+        frame.to_csv(logs / f"bme690_run{idx}.csv", index=False)
+
+    out = tmp_path / "prepared"
+    assert main(["--logs-root", str(logs), "--out", str(out)]) == 0
+
+    extra = _make_cycle_dataframe(steps=4)
+    extra["gas_resistance_ohm"] += 5.0
+    extra.to_csv(logs / "bme690_run3.csv", index=False)
+    (logs / "bme690_run1.csv").unlink()
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="dataprep"):
+        assert main(["--logs-root", str(logs), "--out", str(out)]) == 0
+    processed = [rec.getMessage() for rec in caplog.records if rec.getMessage().endswith(".csv")]
+    assert processed == [f"Processing {logs / 'bme690_run3.csv'}"]
+    assert any("1 of 3 run logs need processing" in rec.getMessage() for rec in caplog.records)
+
+    full = tmp_path / "full"
+    assert main(["--logs-root", str(logs), "--out", str(full), "--full-rebuild"]) == 0
+    for name in ("index.csv", "label_map.json", "summary.json"):
+        assert (out / name).read_text() == (full / name).read_text()
+    with np.load(out / "sequences.npz") as inc, np.load(full / "sequences.npz") as ref:
+        np.testing.assert_array_equal(inc["signals"], ref["signals"])
+        np.testing.assert_array_equal(inc["labels"], ref["labels"])
+    manifest = json.loads((out / "manifest.json").read_text())
+    assert [Path(entry["path"]).name for entry in manifest["files"]] == ["bme690_run0.csv", "bme690_run2.csv", "bme690_run3.csv"]
+    assert len(list((out / "shards").glob("*.npz"))) == 3
+
+
+def _reference_cycle_samples(df, source, expected_steps):
+    """Row-by-row cycle assembly used before build_cycle_samples was vectorised."""
+    df = df.dropna(subset=["gas_resistance_ohm"])
+    signals, metadata_rows = [], []
+    for cycle_idx, cycle_df in df.groupby("cycle_index", sort=True):
+        cycle_df = cycle_df.sort_values("step_index", kind="stable")
+        if expected_steps is None:
+            expected_steps = int(cycle_df.shape[0])
+        if cycle_df.shape[0] != expected_steps or cycle_df[list(FEATURE_COLUMNS)].isna().any().any():
+            continue
+        signals.append(cycle_df[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float32))
+        first = cycle_df.iloc[0]
+        metadata = {"source_file": str(source), "cycle_index": int(cycle_idx)}
+        for name in ("specimen_id", "sample_name", "profile_name", "profile_hash", "storage", "notes"):
+            metadata[name] = str(first[name])
+        metadata.update(extract_label_fields(str(first["sample_name"])))
+        metadata_rows.append(metadata)
+    return signals, metadata_rows, expected_steps
+
+
+def test_build_cycle_samples_matches_reference_on_shuffled_rows(tmp_path):
+    rng = np.random.default_rng(7)
+    steps = 6
+    cycles = 40
+    frame = pd.concat([_make_cycle_dataframe(steps=steps)] * (cycles // 2), ignore_index=True)
+    frame["cycle_index"] = np.repeat(np.arange(cycles), steps).astype(float)
+    frame["gas_resistance_ohm"] = rng.uniform(1e3, 1e5, len(frame))
+    frame["specimen_id"] = [f"SPEC-{idx // steps % 3}" for idx in range(len(frame))]
+    frame.loc[frame["cycle_index"] == 5, "gas_resistance_ohm"] = np.nan  # whole cycle dropped
+    frame.loc[frame.index[steps * 7 + 2], "gas_resistance_ohm"] = np.nan  # cycle 7 becomes short
+    frame.loc[frame.index[steps * 9 + 1], "pressure_Pa"] = np.nan  # NaN feature in cycle 9
+    frame.loc[frame.index[steps * 11], "cycle_index"] = np.nan  # row without a cycle
+    frame = frame.sample(frac=1.0, random_state=3).reset_index(drop=True)
+
+    for expected in (None, steps, steps - 1):
+        signals, metadata, inferred = build_cycle_samples(frame, tmp_path / "f.csv", expected, drop_unstable=False)
+        ref_signals, ref_metadata, ref_inferred = _reference_cycle_samples(frame, tmp_path / "f.csv", expected)
+        assert inferred == ref_inferred
+        assert len(signals) == len(ref_signals)
+        for got, want in zip(signals, ref_signals):
+            np.testing.assert_array_equal(got, want)
+        assert metadata == ref_metadata
+
+
+def test_read_run_csv_engines_agree_on_typed_schema(tmp_path):
+    from dataprep.io import read_run_csv
+
+    frame = _make_cycle_dataframe(steps=4)
+    frame["timestamp_utc"] = "2025-10-20T12:00:00+00:00"
+    frame["elapsed_time_s"] = 1.5
+    frame.loc[1, "sensor_status_raw"] = np.nan
+    frame.loc[2, "heater_heat_stable"] = False
+    path = tmp_path / "bme690_run.csv"
+    frame.to_csv(path, index=False)
+
+    arrow_df = read_run_csv(path, engine="pyarrow")
+    c_df = read_run_csv(path, engine="c")
+    pd.testing.assert_frame_equal(arrow_df, c_df)
+    assert arrow_df["sample_name"].dtype == "category"
+    assert arrow_df["heater_heat_stable"].tolist()[:3] == [True, True, False]
+    assert arrow_df["notes"].isna().all()  # empty strings read as missing, like pd.read_csv
+
+    # Identifiers are read as text: leading zeros survive (pd.read_csv would give the integer 7).
+    frame.assign(specimen_id="007").to_csv(path, index=False)
+    for engine in ("pyarrow", "c"):
+        ids = read_run_csv(path, columns=["specimen_id"], engine=engine)["specimen_id"]
+        assert ids.astype(str).unique().tolist() == ["007"]
+
+    subset = read_run_csv(path, columns=["gas_resistance_ohm", "cycle_index", "not_a_column"])
+    assert list(subset.columns) == ["gas_resistance_ohm", "cycle_index"]
+    np.testing.assert_array_equal(subset["gas_resistance_ohm"].to_numpy(), frame["gas_resistance_ohm"].to_numpy())
+
+
+def _run_metadata(**overrides):
+    from dataprep.schemas import RunMetadata
+
+    fields = dict(
+        specimen_id="SPEC-1",
+        meat_type="beef",
+        cut="ribeye",
+        age_days=3,
+        storage_condition="fridge",
+        mass_g=100.0,
+        jar_id="JAR-1",
+        run_id="RUN-1",
+        operator="OP",
+        protocol_version="1.0",
+        heater_profile_id="HP",
+        sample_rate_hz=1.0,
+        room_temp_C=21.0,
+        room_rh_pct=40.0,
+    )
+    fields.update(overrides)
+    return RunMetadata(**fields)
+
+
+def _write_run_dir(root, run_id, age_days, seed, samples=400):
+    run_dir = root / "2025-10-20" / f"SPEC-{run_id}" / run_id
+    run_dir.mkdir(parents=True)
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(samples) * 1000 + rng.integers(-50, 50, samples)
+    timestamps[0] = 0
+    raw = pd.DataFrame(
+        {
+            "timestamp_ms": timestamps,
+            "gas_resistance_ohms": 80000.0 + np.cumsum(rng.normal(0.0, 40.0, samples)),
+            "temperature_C": 25.0 + rng.normal(0.0, 0.2, samples),
+            "humidity_pct": 40.0 + rng.normal(0.0, 0.5, samples),
+            "pressure_Pa": 101325.0,
+        }
+    )
+    raw = raw.drop(index=range(200, 210)).reset_index(drop=True)  # a gap longer than max_gap_sec
+    raw.to_csv(run_dir / "raw.csv", index=False)
+    metadata = _run_metadata(run_id=run_id, specimen_id=f"SPEC-{run_id}", age_days=age_days)
+    (run_dir / "metadata.json").write_text(metadata.json(), encoding="utf-8")
+    return run_dir, raw, metadata
+
+
+def test_window_feature_stage_matches_live_pipeline(tmp_path):
+    import pyarrow.parquet as pq
+
+    from dataprep.features import RAW_COLUMNS, FeatureConfig, RealTimeFeatureExtractor
+    from dataprep.utils import StreamingResampler
+    from dataprep.windows import main as windows_main
+
+    data_root = tmp_path / "data"
+    runs = [_write_run_dir(data_root, f"RUN-{idx}", age_days=idx, seed=idx) for idx in range(3)]
+    out = tmp_path / "prepared" / "features.parquet"
+    args = ["--data-root", str(data_root), "--out", str(out), "--window-sec", "60", "--stride-sec", "20"]
+    args += ["--baseline-sec", "10", "--row-group-size", "25"]
+    assert windows_main(args + ["--jobs", "2"]) == 0
+    features = pd.read_parquet(out)
+    assert pq.ParquetFile(out).metadata.num_row_groups == int(np.ceil(len(features) / 25))
+    serial_out = tmp_path / "serial.parquet"
+    assert windows_main(args[:2] + ["--out", str(serial_out)] + args[4:]) == 0
+    pd.testing.assert_frame_equal(features, pd.read_parquet(serial_out))
+
+    # Feed the first run through the detector's live path, one sample at a time.
+    _, raw, metadata = runs[0]
+    config = FeatureConfig(window_sec=60, stride_sec=20, baseline_sec=10, sample_rate_hz=1.0)
+    resampler = StreamingResampler(RAW_COLUMNS, target_hz=1.0, max_gap_sec=3.0)
+    extractor = RealTimeFeatureExtractor(metadata.dict(), config)
+    live = []
+    for idx in range(len(raw)):
+        resampled = resampler.push(raw.iloc[idx : idx + 1])
+        if not resampled.empty:
+            live.extend(extractor.ingest(resampled[RAW_COLUMNS]))
+    live_df = pd.DataFrame(live)
+    live_df = live_df.loc[live_df["gas_mean"].notna()].reset_index(drop=True)
+    offline = features.loc[features["run_id"] == "RUN-0"].reset_index(drop=True)
+    assert 0 < len(offline) < len(live)  # windows across the unfilled gap are dropped
+    pd.testing.assert_frame_equal(offline, live_df, check_dtype=False)
+    assert set(features["freshness_label"]) == {"fresh", "aged"}
+
+
+def test_window_feature_table_matches_per_window_features():
+    from dataprep.features import compute_window_feature_table, compute_window_features
+    from dataprep.utils import baseline_correct, sliding_windows
+
+    metadata = _run_metadata(sample_rate_hz=2.0)
+    rng = np.random.default_rng(11)
+    samples = 2000
+    frame = pd.DataFrame(
+        {
+            "timestamp_ms": np.arange(samples) * 500,
+            "gas_resistance_ohms": 150000.0 + np.cumsum(rng.normal(0.0, 80.0, samples)),
+            "temperature_C": 25.0 + rng.normal(0.0, 0.2, samples),
+            "humidity_pct": 40.0 + rng.normal(0.0, 0.5, samples),
+            "pressure_Pa": 101325.0,
+            "gap_filled": rng.random(samples) < 0.002,
+            "gap_unfilled": False,
+        }
+    )
+    frame.loc[400, "gap_filled"] = True
+    frame.loc[1500, "gap_unfilled"] = True
+    frame = baseline_correct(frame, baseline_sec=30)
+
+    for window_sec, stride_sec in ((300, 30), (2, 1), (1, 1)):
+        table = compute_window_feature_table(frame, metadata, window_sec, stride_sec, sample_rate_hz=2.0)
+        expected = pd.DataFrame(
+            [
+                compute_window_features(window, metadata, sample_rate_hz=2.0)
+                for window in sliding_windows(frame, window_sec, stride_sec, sample_rate_hz=2.0)
+            ]
+        )
+        assert list(table.columns) == list(expected.columns)
+        assert {"interpolated", "gap"} <= set(table["quality_class"])
+        assert window_sec == 300 or "clean" in set(table["quality_class"])
+        pd.testing.assert_frame_equal(table, expected, check_exact=False, rtol=1e-7, atol=1e-6)
+
+
+def test_window_feature_table_matches_per_window_features_with_nans():
+    import warnings
+
+    from dataprep.features import compute_window_feature_table, compute_window_features
+    from dataprep.utils import baseline_correct, sliding_windows
+
+    metadata = _run_metadata(sample_rate_hz=2.0)
+    rng = np.random.default_rng(5)
+    samples = 400
+    frame = pd.DataFrame(
+        {
+            "timestamp_ms": np.arange(samples) * 500,
+            "gas_resistance_ohms": 150000.0 + np.cumsum(rng.normal(0.0, 80.0, samples)),
+            "temperature_C": 25.0 + rng.normal(0.0, 0.2, samples),
+            "humidity_pct": 40.0 + rng.normal(0.0, 0.5, samples),
+            "pressure_Pa": 101325.0,
+        }
+    )
+    frame = baseline_correct(frame, baseline_sec=30)
+    frame.loc[[150, 151, 300], ["gas_resistance_ohms", "gas_delta"]] = np.nan
+
+    for window_sec, stride_sec, rate in ((10, 1, 2.0), (1, 1, 2.0), (1, 1, 1.0)):
+        table = compute_window_feature_table(frame, metadata, window_sec, stride_sec, sample_rate_hz=rate)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = pd.DataFrame(
+                [
+                    compute_window_features(window, metadata, sample_rate_hz=rate)
+                    for window in sliding_windows(frame, window_sec, stride_sec, sample_rate_hz=rate)
+                ]
+            )
+        pd.testing.assert_frame_equal(table, expected, check_exact=False, rtol=1e-7, atol=1e-6)
+        if window_sec == 10:
+            # NaNs in the middle of a window leave the early/late ratio finite.
+            ratio = table["gas_early_late_ratio"]
+            assert table["gas_mean"].isna().any() and (table["gas_mean"].isna() & ratio.notna()).any()
+
+
+def test_run_prefix_features_match_live_extractor_for_any_config(tmp_path):
+    from dataprep.windows import FeatureConfig, load_run_prefix, run_window_features
+
+    run_dir, _, _ = _write_run_dir(tmp_path / "data", "RUN-P", age_days=2, seed=5, samples=900)
+    prefix = load_run_prefix(run_dir, sample_rate_hz=1.0)
+    for config in (
+        FeatureConfig(window_sec=60, stride_sec=20, baseline_sec=10, sample_rate_hz=1.0),
+        FeatureConfig(window_sec=30, stride_sec=7, baseline_sec=120, sample_rate_hz=1.0),
+        FeatureConfig(window_sec=4, stride_sec=1, baseline_sec=2000, sample_rate_hz=1.0),
+    ):
+        pd.testing.assert_frame_equal(
+            prefix.features(config),
+            run_window_features(run_dir, config),
+            check_exact=False,
+            rtol=1e-7,
+            atol=1e-6,
+            check_dtype=False,
+        )
+
+
+def test_run_catalog_indexes_incrementally_and_selects_runs(tmp_path):
+    import os
+
+    from dataprep.build import select_log_files
+    from dataprep.catalog import RunCatalog
+
+    logs = tmp_path / "logs"
+    runs = [
+        ("Meat/Beef/2025-10-03", "Meat > Beef > Day1", "HP-502", "2025-10-03T08:00:00+00:00"),
+        ("Meat/Beef/2025-11-02", "Meat > Beef > Day5", "HP-502", "2025-11-02T08:00:00+00:00"),
+        ("Meat/Pork/2025-10-04", "Meat > Pork > Day1", "HP-502", "2025-10-04T08:00:00+00:00"),
+        ("Meat/Beef/2025-10-05", "Meat > Beef > Day2", "HP-322", "2025-10-05T08:00:00+00:00"),
+    ]
+    for idx, (folder, sample_name, profile, start) in enumerate(runs):
+        frame = _make_cycle_dataframe(steps=4)
+        frame["sample_name"] = sample_name
+        frame["specimen_id"] = f"SPEC-{idx}"
+        frame["profile_name"] = profile
+        frame["timestamp_utc"] = pd.date_range(start, periods=len(frame), freq="5s").map(lambda ts: ts.isoformat())
+        frame.loc[0, "pressure_Pa"] = np.nan
+        (logs / folder).mkdir(parents=True)
+        frame.to_csv(logs / folder / f"bme690_run{idx}.csv", index=False)
+
+    with RunCatalog(logs) as catalog:
+        assert catalog.update() == {"added": 4, "updated": 0, "removed": 0, "unchanged": 0}
+        beef = catalog.select(profile="HP-502", label="beef", since="2025-10-01", until="2025-11-01")
+        assert beef["path"].tolist() == [str(logs / "Meat/Beef/2025-10-03/bme690_run0.csv")]
+        row = beef.iloc[0]
+        assert (row["cycles"], row["rows"], row["steps_per_cycle"]) == (2, 8, 4)
+        assert row["nan_rate"] == 1 / 8
+        assert row["label_path"] == "Meat / Beef / Day1"
+        assert row["specimen_id"] == "SPEC-0"
+        assert row["started_utc"] == "2025-10-03T08:00:00+00:00"
+        assert len(catalog.select(profile="HP-*")) == 4
+
+    changed = logs / "Meat/Pork/2025-10-04/bme690_run2.csv"
+    frame = pd.read_csv(changed)
+    frame.iloc[:4].to_csv(changed, index=False)
+    touched = logs / "Meat/Beef/2025-10-05/bme690_run3.csv"
+    os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10**9))
+    (logs / "Meat/Beef/2025-11-02/bme690_run1.csv").unlink()
+    with RunCatalog(logs) as catalog:
+        assert catalog.update() == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+        assert catalog.select(label="pork").iloc[0]["cycles"] == 1
+        assert catalog.record(touched) is False
+
+    selected = select_log_files(logs, profile="HP-502", label="Beef")
+    assert selected == [logs / "Meat/Beef/2025-10-03/bme690_run0.csv"]
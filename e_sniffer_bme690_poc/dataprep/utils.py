@@ -4,7 +4,7 @@ import base64
 import io
 import logging
 from pathlib import Path
-from typing import Iterable, Iterator, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import matplotlib
 import numpy as np
@@ -28,33 +28,287 @@ def drop_warmup(df: pd.DataFrame, warmup_sec: int) -> pd.DataFrame:
     return trimmed
 
 
+def _is_interpolated(dtype: np.dtype) -> bool:
+    return dtype.kind in "iuf"
+
+
+class UniformResampler:
+    """Chunked NumPy implementation of :func:`resample_uniform`.
+
+    Samples are placed on a grid anchored at the first timestamp; samples between
+    grid points are ignored, as with ``DataFrame.reindex``. Missing grid values are
+    filled by linear interpolation in time between the neighbouring valid values
+    when one of them is at most ``floor(max_gap_sec * target_hz)`` grid steps away
+    (the pandas ``limit``/``limit_direction="both"`` rule); values before the first
+    or after the last valid one take that value.
+
+    ``push`` returns the grid rows whose values can no longer change and buffers
+    the rest, so a run can be fed chunk by chunk (e.g. ``pd.read_csv(...,
+    chunksize=...)``) and memory stays bounded by the chunk size plus the current
+    gap. ``finish`` flushes the buffer. Concatenating all returned frames gives the
+    same values as :func:`resample_uniform` on the whole run, with interpolated
+    columns as float64.
+    """
+
+    def __init__(self, target_hz: float, max_gap_sec: float = 3.0) -> None:
+        if target_hz <= 0:
+            raise ValueError("target_hz must be positive")
+        self.freq_ms = int(round(1000 / target_hz))
+        limit = int(np.floor(max_gap_sec * target_hz))
+        self._limit_ms: Optional[int] = limit * self.freq_ms if limit > 0 else None
+        self.columns: Optional[List[str]] = None
+        self._numeric: Dict[str, bool] = {}
+        self._origin_ms: Optional[int] = None
+        self._next_grid_ms: Optional[int] = None
+        self._last_sample_ms: Optional[int] = None
+        self._grid_ms = np.zeros(0, dtype=np.int64)
+        self._pending: Dict[str, np.ndarray] = {}
+        # Last emitted valid value of every interpolated column, as (timestamp_ms, value).
+        self._anchors: Dict[str, Tuple[int, float]] = {}
+
+    def _empty_frame(self) -> pd.DataFrame:
+        columns = self.columns or ["timestamp_ms"]
+        return pd.DataFrame(columns=[*columns, "gap_filled", "gap_unfilled"])
+
+    def push(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add time-ordered raw samples and return the grid rows that are now final."""
+        if chunk.empty:
+            return self._empty_frame()
+        timestamps = chunk["timestamp_ms"].to_numpy(dtype=np.int64)
+        if np.any(np.diff(timestamps) <= 0) or (
+            self._last_sample_ms is not None and timestamps[0] <= self._last_sample_ms
+        ):
+            raise ValueError("Timestamps must be unique and increasing across chunks")
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self._numeric = {col: _is_interpolated(chunk[col].dtype) for col in self.columns if col != "timestamp_ms"}
+            self._pending = {
+                col: np.zeros(0, dtype=float if numeric else object) for col, numeric in self._numeric.items()
+            }
+            self._origin_ms = self._next_grid_ms = int(timestamps[0])
+        self._last_sample_ms = int(timestamps[-1])
+
+        grid = np.arange(self._next_grid_ms, timestamps[-1] + 1, self.freq_ms, dtype=np.int64)
+        on_grid = (timestamps - self._origin_ms) % self.freq_ms == 0
+        rows = (timestamps[on_grid] - self._next_grid_ms) // self.freq_ms
+        for col, numeric in self._numeric.items():
+            block = np.full(grid.size, np.nan, dtype=float if numeric else object)
+            source = chunk[col].to_numpy(dtype=float if numeric else object)
+            block[rows] = source[on_grid]
+            self._pending[col] = np.concatenate([self._pending[col], block])
+        self._grid_ms = np.concatenate([self._grid_ms, grid])
+        if grid.size:
+            self._next_grid_ms = int(grid[-1]) + self.freq_ms
+        return self._emit(final=False)
+
+    def finish(self) -> pd.DataFrame:
+        """Return the buffered rows; values after the last valid sample take its value."""
+        if self.columns is None:
+            return self._empty_frame()
+        return self._emit(final=True)
+
+    def _plan(self, col: str, final: bool) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Missing rows of ``col``, their interpolated values and the first row that is not final."""
+        grid = self._grid_ms
+        values = self._pending[col]
+        valid = ~np.isnan(values)
+        missing = np.flatnonzero(~valid)
+        xp, fp = grid[valid], values[valid]
+        if col in self._anchors:
+            anchor_ms, anchor_value = self._anchors[col]
+            xp = np.concatenate([[anchor_ms], xp])
+            fp = np.concatenate([[anchor_value], fp])
+        if not missing.size:
+            return missing, np.zeros(0), grid.size
+        right = np.searchsorted(xp, grid[missing])
+        has_right = right < xp.size
+        if not xp.size:
+            filled = np.full(missing.size, np.nan)
+            fillable = np.zeros(missing.size, dtype=bool)
+        else:
+            # Interpolating on nanosecond positions rounds exactly as pandas does on a DatetimeIndex.
+            filled = np.interp(grid[missing] * 1_000_000, xp * 1_000_000, fp)
+            if self._limit_ms is None:
+                fillable = np.ones(missing.size, dtype=bool)
+            else:
+                left_gap = grid[missing] - xp[np.maximum(right - 1, 0)]
+                right_gap = xp[np.minimum(right, xp.size - 1)] - grid[missing]
+                fillable = ((right > 0) & (left_gap <= self._limit_ms)) | (has_right & (right_gap <= self._limit_ms))
+        filled[~fillable] = np.nan
+        ready = grid.size
+        if not final:
+            # A row after the last valid value depends on samples still to come, unless
+            # it is out of reach of both its left neighbour and any future sample.
+            settled = has_right
+            if self._limit_ms is not None:
+                settled = settled | (~fillable & (grid[-1] - grid[missing] >= self._limit_ms))
+            if not settled.all():
+                ready = int(missing[np.argmin(settled)])
+        return missing, filled, ready
+
+    def _emit(self, final: bool) -> pd.DataFrame:
+        plans = {col: self._plan(col, final) for col, numeric in self._numeric.items() if numeric}
+        ready = min([self._grid_ms.size, *(plan[2] for plan in plans.values())])
+        if not ready:
+            return self._empty_frame()
+
+        grid = self._grid_ms
+        out: Dict[str, np.ndarray] = {"timestamp_ms": grid[:ready]}
+        for col, numeric in self._numeric.items():
+            values = self._pending[col]
+            out[col] = values[:ready].copy()
+            if not numeric:
+                continue
+            missing, filled, _ = plans[col]
+            emitted = missing < ready
+            out[col][missing[emitted]] = filled[emitted]
+            valid_rows = np.flatnonzero(~np.isnan(values[:ready]))
+            if valid_rows.size:
+                last = int(valid_rows[-1])
+                self._anchors[col] = (int(grid[last]), float(values[last]))
+
+        frame = pd.DataFrame({col: out[col] for col in self.columns})  # type: ignore[union-attr]
+        missing_after = np.isnan(out["gas_resistance_ohms"])
+        frame["gap_filled"] = ~missing_after & np.isnan(self._pending["gas_resistance_ohms"][:ready])
+        frame["gap_unfilled"] = missing_after
+
+        self._grid_ms = grid[ready:]
+        for col in self._pending:
+            self._pending[col] = self._pending[col][ready:]
+        return frame
+
+
+def iter_resample_uniform(
+    chunks: Iterable[pd.DataFrame], target_hz: float, max_gap_sec: float = 3.0
+) -> Iterator[pd.DataFrame]:
+    """Resample a run given as time-ordered chunks, yielding non-empty pieces of the grid."""
+    resampler = UniformResampler(target_hz, max_gap_sec=max_gap_sec)
+    for chunk in chunks:
+        piece = resampler.push(chunk)
+        if not piece.empty:
+            yield piece
+    piece = resampler.finish()
+    if not piece.empty:
+        yield piece
+
+
 def resample_uniform(
     df: pd.DataFrame, target_hz: float, max_gap_sec: float = 3.0
 ) -> Tuple[pd.DataFrame, pd.Series]:
     if df.empty:
         return df.copy(), pd.Series(dtype=bool)
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp_ms"], unit="ms")
-    df.set_index("timestamp", inplace=True)
-    freq_ms = int(round(1000 / target_hz))
-    timeline = pd.date_range(df.index.min(), df.index.max(), freq=f"{freq_ms}ms")
-    resampled = df.reindex(timeline)
-    missing_before = resampled["gas_resistance_ohms"].isna()
-    limit = int(np.floor(max_gap_sec * target_hz))
-    resampled = resampled.interpolate(
-        method="time",
-        limit=limit if limit > 0 else None,
-        limit_direction="both",
-    )
-    missing_after = resampled["gas_resistance_ohms"].isna()
-    resampled["timestamp_ms"] = (resampled.index.view("int64") // 1_000_000).astype("int64")
-    resampled.reset_index(drop=True, inplace=True)
-    resampled["gap_filled"] = (~missing_after) & missing_before
-    resampled["gap_unfilled"] = missing_after
+    order = np.argsort(df["timestamp_ms"].to_numpy(dtype=np.int64), kind="stable")
+    ordered = df.iloc[order] if np.any(np.diff(order) != 1) else df
+    if ordered["timestamp_ms"].duplicated().any():
+        raise ValueError("cannot reindex on an axis with duplicate labels")
+    resampler = UniformResampler(target_hz, max_gap_sec=max_gap_sec)
+    pieces = [piece for piece in (resampler.push(ordered), resampler.finish()) if not piece.empty]
+    resampled = pd.concat(pieces, ignore_index=True)
+    timestamps = ordered["timestamp_ms"].to_numpy(dtype=np.int64)
+    complete_grid = int(np.count_nonzero((timestamps - timestamps[0]) % resampler.freq_ms == 0)) == len(resampled)
+    for col in df.columns:
+        if col == "timestamp_ms":
+            continue
+        dtype = df[col].dtype
+        if dtype.kind == "f" or complete_grid:
+            resampled[col] = resampled[col].astype(dtype)
     quality_mask = resampled["gap_unfilled"]
     return resampled, quality_mask
 
 
+class StreamingResampler:
+    """Incremental counterpart of :func:`resample_uniform` for live streams.
+
+    Only the most recent input sample is retained, so the cost of ``push`` depends
+    on the size of the incoming chunk rather than on the length of the run. Each
+    grid point is emitted exactly once, as soon as the sample that closes its
+    interval arrives. Grid points that do not coincide with an input sample are
+    linearly interpolated in time when they lie within ``max_gap_sec`` of either
+    neighbouring sample and reported as ``gap_unfilled`` (NaN values) otherwise.
+
+    This differs from :func:`resample_uniform` for jittered input. The batch path
+    keeps only samples whose timestamps fall exactly on the grid and fills the
+    other grid points from those (within ``max_gap_sec`` counted in grid steps).
+    Off-grid samples are discarded. Here every raw sample is used and grid points
+    are interpolated between the two raw samples around them. The results match
+    when the input is already on the grid; otherwise values at off-grid
+    neighbours differ, and gaps are judged by the distance to the nearest raw sample.
+    """
+
+    def __init__(self, columns: Sequence[str], target_hz: float, max_gap_sec: float = 3.0) -> None:
+        if target_hz <= 0:
+            raise ValueError("target_hz must be positive")
+        self.columns = [col for col in columns if col != "timestamp_ms"]
+        self.freq_ms = int(round(1000 / target_hz))
+        limit = int(np.floor(max_gap_sec * target_hz))
+        self._limit_ms: Optional[int] = limit * self.freq_ms if limit > 0 else None
+        self._last_ts: Optional[int] = None
+        self._last_values: Optional[np.ndarray] = None
+        self._next_grid_ms: Optional[int] = None
+
+    @property
+    def last_timestamp_ms(self) -> Optional[int]:
+        return self._last_ts
+
+    def reset(self) -> None:
+        self._last_ts = None
+        self._last_values = None
+        self._next_grid_ms = None
+
+    def push(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Consume raw samples and return the newly completed grid rows."""
+        output_columns = ["timestamp_ms", *self.columns, "gap_filled", "gap_unfilled"]
+        if chunk.empty:
+            return pd.DataFrame(columns=output_columns)
+        timestamps = chunk["timestamp_ms"].to_numpy(dtype=np.int64)
+        values = chunk[self.columns].to_numpy(dtype=float)
+
+        grid_parts: List[np.ndarray] = []
+        value_parts: List[np.ndarray] = []
+        filled_parts: List[np.ndarray] = []
+        unfilled_parts: List[np.ndarray] = []
+        for ts, row in zip(timestamps, values):
+            ts = int(ts)
+            if self._last_ts is None or self._last_values is None or self._next_grid_ms is None:
+                grid_parts.append(np.array([ts], dtype=np.int64))
+                value_parts.append(row[np.newaxis, :])
+                filled_parts.append(np.array([False]))
+                unfilled_parts.append(np.array([False]))
+                self._last_ts, self._last_values = ts, row
+                self._next_grid_ms = ts + self.freq_ms
+                continue
+            if ts <= self._last_ts:
+                LOGGER.debug("Dropping out-of-order sample at %s ms (last %s ms)", ts, self._last_ts)
+                continue
+            grid = np.arange(self._next_grid_ms, ts + 1, self.freq_ms, dtype=np.int64)
+            if grid.size:
+                prev_ts, prev_values = self._last_ts, self._last_values
+                fraction = (grid - prev_ts) / float(ts - prev_ts)
+                interpolated = prev_values + np.outer(fraction, row - prev_values)
+                exact = grid == ts
+                interpolated[exact] = row
+                if self._limit_ms is None:
+                    reachable = np.ones(grid.size, dtype=bool)
+                else:
+                    reachable = np.minimum(grid - prev_ts, ts - grid) <= self._limit_ms
+                interpolated[~(exact | reachable)] = np.nan
+                grid_parts.append(grid)
+                value_parts.append(interpolated)
+                filled_parts.append(~exact & reachable)
+                unfilled_parts.append(~(exact | reachable))
+                self._next_grid_ms = int(grid[-1]) + self.freq_ms
+            self._last_ts, self._last_values = ts, row
+
+        if not grid_parts:
+            return pd.DataFrame(columns=output_columns)
+        grid_ms = np.concatenate(grid_parts)
+        resampled = pd.DataFrame(np.concatenate(value_parts), columns=self.columns)
+        resampled.insert(0, "timestamp_ms", grid_ms)
+        resampled["gap_filled"] = np.concatenate(filled_parts)
+        resampled["gap_unfilled"] = np.concatenate(unfilled_parts)
+        return resampled
+
+
 def baseline_correct(df: pd.DataFrame, baseline_sec: int) -> pd.DataFrame:
     df = df.copy()
     if df.empty:
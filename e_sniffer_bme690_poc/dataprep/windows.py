@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .features import RAW_COLUMNS, FeatureConfig, PrefixStats, RealTimeFeatureExtractor, window_starts
+from .io import discover_run_dirs, load_run
+from .schemas import RunMetadata
+from .utils import StreamingResampler, drop_warmup
+
+LOGGER = logging.getLogger("dataprep")
+
+# Matches the detector and live_test configuration so that offline and live features agree.
+DEFAULT_FEATURE_CONFIG = FeatureConfig(window_sec=600, stride_sec=60, baseline_sec=60, sample_rate_hz=1.0)
+
+
+def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract window-level features from recorded runs into Parquet.")
+    parser.add_argument(
+        "--data-root",
+        type=Path,
+        default=Path("data"),
+        help="Root with <date>/<specimen>/<run>/ directories holding raw.csv and metadata.json.",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path("prepared") / "features.parquet",
+        help="Destination Parquet file (default: prepared/features.parquet).",
+    )
+    parser.add_argument("--window-sec", type=int, default=DEFAULT_FEATURE_CONFIG.window_sec)
+    parser.add_argument("--stride-sec", type=int, default=DEFAULT_FEATURE_CONFIG.stride_sec)
+    parser.add_argument("--baseline-sec", type=int, default=DEFAULT_FEATURE_CONFIG.baseline_sec)
+    parser.add_argument("--sample-rate-hz", type=float, default=DEFAULT_FEATURE_CONFIG.sample_rate_hz)
+    parser.add_argument(
+        "--max-gap-sec",
+        type=float,
+        default=3.0,
+        help="Gaps up to this length are interpolated when resampling; longer gaps invalidate their windows.",
+    )
+    parser.add_argument(
+        "--drop-warmup",
+        action="store_true",
+        help="Trim each run's metadata warmup_sec before resampling (the live detector does not).",
+    )
+    parser.add_argument("--row-group-size", type=int, default=50_000, help="Rows per Parquet row group.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (default: 1).")
+    return parser.parse_args(args)
+
+
+def run_window_features(
+    run_dir: Path,
+    config: FeatureConfig,
+    max_gap_sec: float = 3.0,
+    drop_warmup_sec: bool = False,
+) -> pd.DataFrame:
+    """Window features for one run, computed exactly as the live detector would.
+
+    The raw samples go through the detector's :class:`StreamingResampler` and
+    :class:`RealTimeFeatureExtractor` in one chunk. Windows touching an unfilled
+    gap have NaN statistics and are dropped.
+    """
+    run = load_run(run_dir)
+    raw = drop_warmup(run.raw, run.metadata.warmup_sec) if drop_warmup_sec else run.raw
+    resampler = StreamingResampler(RAW_COLUMNS, target_hz=config.sample_rate_hz, max_gap_sec=max_gap_sec)
+    resampled = resampler.push(raw)
+    if resampled.empty:
+        return pd.DataFrame()
+    extractor = RealTimeFeatureExtractor(run.metadata.dict(), config)
+    frame = pd.DataFrame(extractor.ingest(resampled[RAW_COLUMNS]))
+    if frame.empty:
+        return frame
+    numeric = frame.select_dtypes("number").columns
+    valid = frame[numeric].notna().all(axis=1)
+    if not valid.all():
+        LOGGER.info("Dropping %s windows with gaps from %s", int((~valid).sum()), run_dir)
+    return frame.loc[valid].reset_index(drop=True)
+
+
+class RunPrefix:
+    """One resampled run with prefix sums ready for any window/stride/baseline.
+
+    :meth:`features` reproduces :func:`run_window_features` for a given
+    :class:`FeatureConfig` (at the sample rate the run was resampled with) without
+    touching the samples again, which makes sweeping many configurations cheap.
+    """
+
+    def __init__(self, metadata: RunMetadata, resampled: pd.DataFrame, sample_rate_hz: float) -> None:
+        self.metadata = metadata
+        self.sample_rate_hz = sample_rate_hz
+        self.timestamps = resampled["timestamp_ms"].to_numpy(dtype=np.int64)
+        self.gas = PrefixStats(resampled["gas_resistance_ohms"].to_numpy(dtype=float))
+        self.temperature = PrefixStats(resampled["temperature_C"].to_numpy(dtype=float))
+        self.humidity = PrefixStats(resampled["humidity_pct"].to_numpy(dtype=float))
+
+    def __len__(self) -> int:
+        return int(self.timestamps.size)
+
+    def _baseline(self, baseline_samples: int) -> Optional[float]:
+        # RealTimeFeatureExtractor: mean of the finite readings among the first samples.
+        if baseline_samples <= 0 or len(self) < baseline_samples:
+            return None
+        head = self.gas.values[:baseline_samples]
+        finite = head[np.isfinite(head)]
+        return float(finite.mean()) if finite.size else float("nan")
+
+    def features(self, config: FeatureConfig) -> pd.DataFrame:
+        if config.sample_rate_hz != self.sample_rate_hz:
+            raise ValueError("RunPrefix was resampled at a different sample rate")
+        size = int(round(config.window_sec * config.sample_rate_hz))
+        stride = int(round(config.stride_sec * config.sample_rate_hz))
+        # The live extractor emits a window as soon as its last sample arrives.
+        starts = window_starts(len(self), size, stride)
+        if not starts.size:
+            return pd.DataFrame()
+        count = starts.size
+        rate = config.sample_rate_hz
+        columns: Dict[str, object] = {
+            "specimen_id": [self.metadata.specimen_id] * count,
+            "run_id": [self.metadata.run_id] * count,
+            "window_start_ms": self.timestamps[starts],
+            "window_end_ms": self.timestamps[starts + size - 1],
+            "quality_class": ["clean"] * count,
+            "freshness_label": [self.metadata.label()] * count,
+            "meat_type": [self.metadata.meat_type] * count,
+            "age_days": np.full(count, self.metadata.age_days, dtype=np.int64),
+        }
+        for name, values in self.gas.stats(starts, size, rate).items():
+            columns[f"gas_{name}"] = values
+        baseline = self._baseline(int(round(config.baseline_sec * rate)))
+        if baseline is not None:
+            delta = self.gas.stats(starts, size, rate, offset=baseline)
+        else:
+            zeros = np.zeros(count)
+            delta = {name: zeros for name in ("mean", "std", "min", "max", "slope_per_s", "mean_abs_diff")}
+            delta["early_late_ratio"] = np.full(count, 1.0 if size < 5 else 0.0)
+        for name, values in delta.items():
+            columns[f"gas_delta_{name}"] = values
+        columns["temperature_mean"] = self.temperature.mean(starts, size)
+        columns["temperature_range"] = self.temperature.maximum(starts, size) - self.temperature.minimum(starts, size)
+        columns["humidity_mean"] = self.humidity.mean(starts, size)
+        columns["humidity_range"] = self.humidity.maximum(starts, size) - self.humidity.minimum(starts, size)
+        frame = pd.DataFrame(columns)
+        numeric = frame.select_dtypes("number").columns
+        return frame.loc[frame[numeric].notna().all(axis=1)].reset_index(drop=True)
+
+
+def load_run_prefix(
+    run_dir: Path,
+    sample_rate_hz: float,
+    max_gap_sec: float = 3.0,
+    drop_warmup_sec: bool = False,
+) -> RunPrefix:
+    run = load_run(run_dir)
+    raw = drop_warmup(run.raw, run.metadata.warmup_sec) if drop_warmup_sec else run.raw
+    resampler = StreamingResampler(RAW_COLUMNS, target_hz=sample_rate_hz, max_gap_sec=max_gap_sec)
+    return RunPrefix(run.metadata, resampler.push(raw), sample_rate_hz)
+
+
+def _run_worker(
+    run_dir: Path,
+    config: FeatureConfig,
+    max_gap_sec: float,
+    drop_warmup_sec: bool,
+) -> Optional[pd.DataFrame]:
+    LOGGER.info("Extracting features from %s", run_dir)
+    try:
+        return run_window_features(run_dir, config, max_gap_sec=max_gap_sec, drop_warmup_sec=drop_warmup_sec)
+    except Exception as exc:
+        LOGGER.error("Failed to process %s: %s", run_dir, exc)
+        return None
+
+
+def iter_run_features(
+    run_dirs: Sequence[Path],
+    config: FeatureConfig,
+    max_gap_sec: float = 3.0,
+    drop_warmup_sec: bool = False,
+    jobs: int = 1,
+) -> Iterable[pd.DataFrame]:
+    """Yield per-run feature frames in ``run_dirs`` order, optionally from a process pool."""
+    args = (
+        list(run_dirs),
+        [config] * len(run_dirs),
+        [max_gap_sec] * len(run_dirs),
+        [drop_warmup_sec] * len(run_dirs),
+    )
+    if jobs <= 1 or len(run_dirs) <= 1:
+        results: Iterable[Optional[pd.DataFrame]] = map(_run_worker, *args)
+        for frame in results:
+            if frame is not None and not frame.empty:
+                yield frame
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(run_dirs))) as pool:
+        for frame in pool.map(_run_worker, *args):
+            if frame is not None and not frame.empty:
+                yield frame
+
+
+def write_feature_parquet(frames: Iterable[pd.DataFrame], out_path: Path, row_group_size: int = 50_000) -> int:
+    """Stream feature frames into ``out_path`` with row groups of ``row_group_size`` rows."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    writer: Optional[pq.ParquetWriter] = None
+    schema: Optional[pa.Schema] = None
+    pending: List[pa.Table] = []
+    pending_rows = 0
+    total = 0
+
+    def flush(final: bool) -> None:
+        nonlocal pending, pending_rows
+        if not pending:
+            return
+        table = pa.concat_tables(pending)
+        full_groups = table.num_rows if final else table.num_rows - table.num_rows % row_group_size
+        if full_groups:
+            writer.write_table(table.slice(0, full_groups), row_group_size=row_group_size)  # type: ignore[union-attr]
+        rest = table.slice(full_groups)
+        pending = [rest] if rest.num_rows else []
+        pending_rows = rest.num_rows
+
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            else:
+                table = table.cast(schema)
+            pending.append(table)
+            pending_rows += table.num_rows
+            total += table.num_rows
+            if pending_rows >= row_group_size:
+                flush(final=False)
+        if writer is None:
+            LOGGER.warning("No windows were produced; writing an empty %s", out_path)
+            pd.DataFrame().to_parquet(tmp_path, index=False)
+        else:
+            flush(final=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    tmp_path.replace(out_path)
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    config = FeatureConfig(
+        window_sec=ns.window_sec,
+        stride_sec=ns.stride_sec,
+        baseline_sec=ns.baseline_sec,
+        sample_rate_hz=ns.sample_rate_hz,
+    )
+    run_dirs = discover_run_dirs(ns.data_root)
+    if not run_dirs:
+        LOGGER.warning("No runs with raw.csv and metadata.json found under %s", ns.data_root)
+    LOGGER.info("Extracting window features from %s runs with %s", len(run_dirs), asdict(config))
+
+    frames = iter_run_features(
+        run_dirs,
+        config,
+        max_gap_sec=ns.max_gap_sec,
+        drop_warmup_sec=ns.drop_warmup,
+        jobs=max(1, ns.jobs),
+    )
+    rows = write_feature_parquet(frames, ns.out, row_group_size=max(1, ns.row_group_size))
+    LOGGER.info("Wrote %s feature windows to %s", rows, ns.out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,19 +8,21 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import joblib
 import numpy as np
 import pandas as pd
 from PySide6.QtCore import QObject, QTimer
 
 from collector.profiles import Profile
 from collector.runtime import CollectorRunner, Metadata, RunConfig, build_backend
+from dataprep.features import FeatureConfig, RealTimeFeatureExtractor
 from dataprep.schemas import RunMetadata
-from dataprep.utils import resample_uniform
-from live_test.features_rt import FeatureConfig, RealTimeFeatureExtractor
+from dataprep.utils import StreamingResampler
+from training.inference import load_model
 
 from .ui import DetectorWindow
 
+RAW_COLUMNS = ["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"]
+
 STORAGE_ALIASES = {
     "refrigerated": "refrigerated",
     "fridge": "refrigerated",
@@ -53,12 +55,9 @@ class DetectorController(QObject):
         self.timer.timeout.connect(self._poll_queue)
 
         self._start_timestamp_ms: Optional[int] = None
-        self._raw_history = pd.DataFrame(
-            columns=["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"]
-        )
-        self._resampled_processed = 0
         self._extractor: Optional[RealTimeFeatureExtractor] = None
         self._feature_config = FeatureConfig(window_sec=600, stride_sec=60, baseline_sec=60, sample_rate_hz=1.0)
+        self._resampler = StreamingResampler(RAW_COLUMNS, target_hz=self._feature_config.sample_rate_hz, max_gap_sec=3.0)
         self._log_path: Optional[Path] = None
         self._log_file = None
 
@@ -73,19 +72,17 @@ class DetectorController(QObject):
             self._on_profile_changed(current_profile)
 
     def _on_model_selected(self, path: str) -> None:
-        model_path = Path(path)
-        self.model = joblib.load(model_path)
-        estimator = self.model.named_steps["model"]
-        self.classes_ = list(estimator.classes_)
-        label_map_path = model_path.parent / "label_map.json"
-        if label_map_path.exists():
-            payload = json.loads(label_map_path.read_text(encoding="utf-8"))
-            self.label_map = {int(idx): label for label, idx in payload.items()}
-        else:
-            self.label_map = {int(idx): str(idx) for idx in self.classes_}
-        self.class_names = [self.label_map.get(int(idx), str(idx)) for idx in self.classes_]
+        try:
+            loaded = load_model(Path(path))
+        except (OSError, ValueError) as exc:
+            self.view.set_status(f"Model error: {exc}")
+            return
+        self.model = loaded
+        self.classes_ = loaded.classes
+        self.label_map = loaded.label_map
+        self.class_names = loaded.class_names
         self.view.set_classes(self.class_names)
-        self.view.set_status(f"Loaded model with {len(self.class_names)} classes")
+        self.view.set_status(f"Loaded {loaded.model_name} model with {len(self.class_names)} classes")
 
     def _on_metadata_selected(self, path: str) -> None:
         meta_path = Path(path)
@@ -137,10 +134,7 @@ class DetectorController(QObject):
         self.runner_thread.start()
 
         self._start_timestamp_ms = None
-        self._raw_history = pd.DataFrame(
-            columns=["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"]
-        )
-        self._resampled_processed = 0
+        self._resampler.reset()
         self._extractor = RealTimeFeatureExtractor(metadata=self.metadata.dict(), config=self._feature_config)
 
         self._prepare_log(meta.sample_name)
@@ -266,51 +260,32 @@ class DetectorController(QObject):
         if warmup:
             return
 
-        self._append_raw_sample(sample)
-        self._process_features()
+        self._process_features(sample)
 
     def _relative_timestamp(self, timestamp_str: Optional[str]) -> int:
+        last_ts = self._resampler.last_timestamp_ms
         if not timestamp_str:
-            if self._raw_history.empty:
-                return 0
-            last_ts = int(self._raw_history["timestamp_ms"].iloc[-1])
-            return last_ts + 1000
+            return 0 if last_ts is None else last_ts + 1000
         try:
             dt = datetime.fromisoformat(str(timestamp_str).replace("Z", "+00:00"))
             ms = int(dt.timestamp() * 1000)
         except Exception:
-            if self._raw_history.empty:
-                return 0
-            last_ts = int(self._raw_history["timestamp_ms"].iloc[-1])
-            return last_ts + 1000
+            return 0 if last_ts is None else last_ts + 1000
         if self._start_timestamp_ms is None:
             self._start_timestamp_ms = ms
         return max(0, ms - self._start_timestamp_ms)
 
-    def _append_raw_sample(self, sample: Dict[str, float]) -> None:
-        chunk = pd.DataFrame([sample])
-        self._raw_history = pd.concat([self._raw_history, chunk], ignore_index=True)
-
-    def _process_features(self) -> None:
-        if self._extractor is None or self.model is None or self._raw_history.empty:
+    def _process_features(self, sample: Dict[str, float]) -> None:
+        if self._extractor is None or self.model is None:
             return
-        resampled, _ = resample_uniform(
-            self._raw_history,
-            target_hz=self._feature_config.sample_rate_hz,
-            max_gap_sec=3.0,
-        )
+        resampled = self._resampler.push(pd.DataFrame([sample]))
         if resampled.empty:
             return
-        if len(resampled) <= self._resampled_processed:
-            return
-        new_rows = resampled.iloc[self._resampled_processed :]
-        self._resampled_processed = len(resampled)
-        chunk = new_rows[["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"]]
+        chunk = resampled[RAW_COLUMNS]
         features = self._extractor.ingest(chunk)
         if not features:
             return
-        df = pd.DataFrame(features)
-        probabilities = self.model.predict_proba(df)
+        probabilities = self.model.predict_proba(features)
         for idx, row in enumerate(probabilities):
             prob_map = {self.class_names[i]: float(row[i]) for i in range(len(self.class_names))}
             winner_idx = int(np.argmax(row))
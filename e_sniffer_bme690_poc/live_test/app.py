@@ -1,30 +1,33 @@
 from __future__ import annotations
 
+import argparse
 import json
 import logging
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 
-import joblib
 import numpy as np
-import pandas as pd
 from PySide6.QtCore import QObject, QTimer
 from PySide6.QtWidgets import QApplication
 
+from dataprep.features import FeatureConfig, RealTimeFeatureExtractor
 from dataprep.schemas import RunMetadata
+from training.inference import load_model
 
-from .features_rt import FeatureConfig, ProbabilitySmoother, RealTimeFeatureExtractor
-from .streaming import ReplayCSVSource, SubprocessSource, TailCSVSource
+from .features_rt import ProbabilitySmoother
+from .streaming import ReplayCSVSource, SubprocessSource, TailArrowSource, TailCSVSource
 from .ui import LiveTestWindow
 
 LOGGER = logging.getLogger("live_test")
 
 
 class LiveController(QObject):
-    def __init__(self, view: LiveTestWindow) -> None:
+    def __init__(self, view: LiveTestWindow, logger_policy: str = "drop_oldest", logger_buffer: int = 4096) -> None:
         super().__init__()
         self.view = view
+        self.logger_policy = logger_policy
+        self.logger_buffer = logger_buffer
         self.model = None
         self.label_map: Dict[int, str] = {}
         self.csv_path: Optional[Path] = None
@@ -60,19 +63,17 @@ class LiveController(QObject):
         self.view.set_status("Metadata loaded")
 
     def _on_model_selected(self, path: str) -> None:
-        model_path = Path(path)
-        self.model = joblib.load(model_path)
-        estimator = self.model.named_steps["model"]
-        self.classes_ = list(estimator.classes_)
-        # Attempt to load label map alongside model
-        label_map_path = model_path.parent / "label_map.json"
-        if label_map_path.exists():
-            label_map = json.loads(label_map_path.read_text(encoding="utf-8"))
-            self.label_map = {int(v): k for k, v in label_map.items()}
-        else:
-            self.label_map = {int(idx): str(idx) for idx in self.classes_}
-        self.class_names = [self.label_map.get(int(idx), str(idx)) for idx in self.classes_]
-        self.view.set_status(f"Model loaded ({len(self.class_names)} classes)")
+        try:
+            loaded = load_model(Path(path))
+        except (OSError, ValueError) as exc:
+            self.view.set_status(f"Model error: {exc}")
+            return
+        self.model = loaded
+        self.classes_ = loaded.classes
+        # label_map.json is picked up from the model folder when present
+        self.label_map = loaded.label_map
+        self.class_names = loaded.class_names
+        self.view.set_status(f"Model loaded: {loaded.model_name} ({len(self.class_names)} classes)")
         self.view.set_classes(self.class_names)
 
     def _on_mode_changed(self, mode: str) -> None:
@@ -80,7 +81,16 @@ class LiveController(QObject):
         self.view.set_status(f"Mode set to {mode}")
 
     def start(self) -> None:
-        if not self.csv_path or not self.csv_path.exists():
+        subprocess_mode = self.mode == "Subprocess"
+        try:
+            logger_command = self.view.logger_command() if subprocess_mode else []
+        except ValueError as exc:
+            self.view.set_status(f"Source error: {exc}")
+            return
+        if subprocess_mode and not logger_command:
+            self.view.set_status("Logger command not set")
+            return
+        if not subprocess_mode and (not self.csv_path or not self.csv_path.exists()):
             self.view.set_status("CSV not selected")
             return
         if self.metadata is None:
@@ -93,12 +103,20 @@ class LiveController(QObject):
         config = FeatureConfig(window_sec=600, stride_sec=60, baseline_sec=60, sample_rate_hz=1.0)
         self.extractor = RealTimeFeatureExtractor(self.metadata.dict(), config)
 
-        if self.mode == "Replay CSV":
-            self.source = ReplayCSVSource(self.csv_path)
-        elif self.mode == "Tail CSV":
-            self.source = TailCSVSource(self.csv_path)
-        else:
-            self.source = SubprocessSource(["track_b_logger_stub"])
+        self._close_source()
+        try:
+            if self.mode == "Replay CSV":
+                self.source = ReplayCSVSource(self.csv_path)
+            elif self.mode == "Tail CSV" and self.csv_path.suffix.lower() == ".arrow":
+                self.source = TailArrowSource(self.csv_path)
+            elif self.mode == "Tail CSV":
+                self.source = TailCSVSource(self.csv_path)
+            else:
+                self.source = SubprocessSource(logger_command, max_buffer=self.logger_buffer, policy=self.logger_policy)
+        except (OSError, ValueError) as exc:
+            self.source = None
+            self.view.set_status(f"Source error: {exc}")
+            return
 
         alpha = self.view.alpha_spin.value()
         threshold = self.view.threshold_spin.value()
@@ -108,7 +126,9 @@ class LiveController(QObject):
         else:
             self.smoother = None
 
-        self.log_path = self.csv_path.parent / "inference_log.csv"
+        # A streamed run has no source file; its log goes to the working directory.
+        log_dir = self.csv_path.parent if self.csv_path is not None and not subprocess_mode else Path.cwd()
+        self.log_path = log_dir / "inference_log.csv"
         self._log_file = self.log_path.open("w", encoding="utf-8")
         header = ["timestamp_ms"] + self.class_names + ["winner", "window_start_ms", "window_end_ms"]
         self._log_file.write(",".join(header) + "\n")
@@ -123,6 +143,7 @@ class LiveController(QObject):
 
     def stop(self) -> None:
         self.timer.stop()
+        self._close_source()
         if self._log_file:
             self._log_file.close()
             self._log_file = None
@@ -131,6 +152,12 @@ class LiveController(QObject):
         if self.class_names:
             self.view.update_detections({name: 0.0 for name in self.class_names}, None)
 
+    def _close_source(self) -> None:
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+        self.source = None
+
     def _tick(self) -> None:
         if self.source is None or self.extractor is None or self.model is None:
             return
@@ -141,8 +168,7 @@ class LiveController(QObject):
         feature_rows = self.extractor.ingest(chunk)
         if not feature_rows:
             return
-        df = pd.DataFrame(feature_rows)
-        proba = self.model.predict_proba(df)
+        proba = self.model.predict_proba(feature_rows)
         for idx, row in enumerate(proba):
             ema_probs = row
             winner_idx = int(np.argmax(row))
@@ -166,11 +192,36 @@ class LiveController(QObject):
                 self._log_file.flush()
 
 
-def main() -> int:
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Live freshness classification from replayed or streamed runs.")
+    parser.add_argument(
+        "--logger-cmd",
+        type=str,
+        default="",
+        help="Command for Subprocess mode; it must print timestamp_ms,gas_resistance_ohms,... CSV rows on stdout.",
+    )
+    parser.add_argument(
+        "--logger-policy",
+        choices=SubprocessSource.POLICIES,
+        default="drop_oldest",
+        help="What Subprocess mode does when its row buffer is full (default: drop_oldest).",
+    )
+    parser.add_argument(
+        "--logger-buffer",
+        type=int,
+        default=4096,
+        help="Rows Subprocess mode buffers between UI ticks before the policy applies (default: 4096).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
     logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1])
     window = LiveTestWindow()
-    LiveController(window)
+    window.set_logger_command(ns.logger_cmd)
+    LiveController(window, logger_policy=ns.logger_policy, logger_buffer=ns.logger_buffer)
     window.show()
     return app.exec()
 
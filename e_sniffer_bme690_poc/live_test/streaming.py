@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import io
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Deque, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from collector.logger import ArrowLogReader
+from dataprep.io import load_run_log
+
+LOGGER = logging.getLogger("live_test")
+
 RAW_COLUMNS = [
     "timestamp_ms",
     "gas_resistance_ohms",
@@ -14,13 +27,31 @@ RAW_COLUMNS = [
 ]
 
 
+def run_log_to_raw(frame: pd.DataFrame) -> pd.DataFrame:
+    """Map collector run-log columns onto the ``RAW_COLUMNS`` layout used by live sources."""
+    timestamps = pd.to_datetime(frame["timestamp_utc"], utc=True)
+    raw = pd.DataFrame(
+        {
+            "timestamp_ms": (timestamps.astype("int64") // 1_000_000).to_numpy(),
+            "gas_resistance_ohms": frame["gas_resistance_ohm"].to_numpy(dtype=float),
+            "temperature_C": frame["sensor_temperature_C"].to_numpy(dtype=float),
+            "humidity_pct": frame["sensor_humidity_RH"].to_numpy(dtype=float),
+            "pressure_Pa": frame["pressure_Pa"].to_numpy(dtype=float),
+        }
+    )
+    return raw.dropna(subset=["gas_resistance_ohms"]).reset_index(drop=True)
+
+
 class ReplayCSVSource:
-    """Replay a static CSV file at caller-controlled pace."""
+    """Replay a static CSV file (or Arrow run log) at caller-controlled pace."""
 
     def __init__(self, path: Path, step_samples: int = 1) -> None:
         self.path = Path(path)
         self.step_samples = step_samples
-        self._data = pd.read_csv(self.path)
+        if self.path.suffix.lower() == ".arrow":
+            self._data = run_log_to_raw(load_run_log(self.path))
+        else:
+            self._data = pd.read_csv(self.path)
         if list(self._data.columns) != RAW_COLUMNS:
             raise ValueError(f"Unexpected columns in {self.path}")
         self._cursor = 0
@@ -38,35 +69,272 @@ class ReplayCSVSource:
 
 
 class TailCSVSource:
-    """Tail a growing CSV file, returning only newly written rows."""
+    """Tail a growing CSV file, returning only newly written rows.
 
-    def __init__(self, path: Path) -> None:
+    The source remembers the byte offset of the last complete line it parsed and
+    reads only what was appended since, so the cost of a tick scales with the new
+    data rather than the file size. A trailing partial line is held back until its
+    newline arrives. Truncation or replacement of the file (e.g. log rotation)
+    restarts reading from the top of the new file. With ``use_inotify`` and the
+    optional ``inotify_simple`` package, :meth:`wait` blocks on filesystem events
+    instead of polling.
+    """
+
+    def __init__(self, path: Path, use_inotify: bool = False, poll_interval: float = 0.2) -> None:
         self.path = Path(path)
-        self._last_row_count = 0
+        self.poll_interval = poll_interval
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._partial = b""
+        self._header_pending = False
+        self._inotify = None
         self._validate()
+        if use_inotify:
+            self._inotify = self._open_inotify()
 
     def _validate(self) -> None:
         if not self.path.exists():
             raise FileNotFoundError(self.path)
-        df = pd.read_csv(self.path)
-        if list(df.columns) != RAW_COLUMNS:
+        with self.path.open("rb") as fp:
+            header = fp.readline()
+            self._check_header(header)
+            size = fp.seek(0, os.SEEK_END)
+            # Start after the last complete line so a partially written row is read once finished.
+            tail_start = max(len(header), size - 65536)
+            fp.seek(tail_start)
+            tail = fp.read()
+        last_newline = tail.rfind(b"\n")
+        self._offset = tail_start + last_newline + 1 if last_newline >= 0 else tail_start
+        self._inode = self.path.stat().st_ino
+
+    def _check_header(self, header: bytes) -> None:
+        columns = [col.strip() for col in header.decode("utf-8").strip().split(",")]
+        if columns != RAW_COLUMNS:
             raise ValueError(f"Unexpected columns in {self.path}")
-        self._last_row_count = df.shape[0]
+
+    def _open_inotify(self):
+        try:
+            from inotify_simple import INotify, flags  # type: ignore
+        except Exception:  # pragma: no cover - inotify optional
+            LOGGER.warning("inotify_simple not available; TailCSVSource will poll %s", self.path)
+            return None
+        watcher = INotify()
+        mask = flags.MODIFY | flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE
+        watcher.add_watch(str(self.path.parent), mask)
+        return watcher
+
+    def _reset_if_replaced(self, stat: os.stat_result) -> None:
+        if stat.st_ino == self._inode and stat.st_size >= self._offset:
+            return
+        LOGGER.info("Detected truncation or rotation of %s; restarting from the top", self.path)
+        self._inode = stat.st_ino
+        self._offset = 0
+        self._partial = b""
+        self._header_pending = True
 
     def next_chunk(self) -> pd.DataFrame:
-        df = pd.read_csv(self.path)
-        new = df.iloc[self._last_row_count :].copy()
-        self._last_row_count = df.shape[0]
-        return new.reset_index(drop=True)
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        self._reset_if_replaced(stat)
+        if stat.st_size == self._offset:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        with self.path.open("rb") as fp:
+            fp.seek(self._offset)
+            appended = fp.read()
+        self._offset += len(appended)
+        data = self._partial + appended
+        last_newline = data.rfind(b"\n")
+        if last_newline < 0:
+            self._partial = data
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        complete, self._partial = data[: last_newline + 1], data[last_newline + 1 :]
+        if self._header_pending:
+            header_end = complete.find(b"\n")
+            self._check_header(complete[: header_end + 1])
+            complete = complete[header_end + 1 :]
+            self._header_pending = False
+        if not complete.strip():
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        return pd.read_csv(io.BytesIO(complete), header=None, names=RAW_COLUMNS)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the file may have new data or ``timeout`` seconds elapse."""
+        if self._inotify is not None:
+            events = self._inotify.read(timeout=int(timeout * 1000))
+            return any(event.name == self.path.name for event in events)
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._has_pending_bytes():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def _has_pending_bytes(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_ino != self._inode or stat.st_size != self._offset
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+class TailArrowSource:
+    """Tail a growing Arrow run log written by the collector, returning only new rows.
+
+    Only record batches appended since the previous call are decoded; a replaced
+    or truncated file is re-read from its schema message.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(self.path)
+        self._reader = ArrowLogReader(self.path)
+        self._inode: Optional[int] = self.path.stat().st_ino
+        # Like TailCSVSource, rows already on disk at start-up are skipped.
+        self._reader.read_new()
+
+    def next_chunk(self) -> pd.DataFrame:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        if stat.st_ino != self._inode or stat.st_size < self._reader.offset:
+            LOGGER.info("Detected truncation or rotation of %s; restarting from the top", self.path)
+            self._inode = stat.st_ino
+            self._reader.reset()
+        if stat.st_size == self._reader.offset:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        batches = self._reader.read_new()
+        if not batches:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        frame = pd.concat([batch.to_pandas() for batch in batches], ignore_index=True)
+        return run_log_to_raw(frame)
 
 
 class SubprocessSource:
-    """Placeholder for Track B logger integration."""
+    """Stream rows printed by a logger subprocess (e.g. the Track B logger).
+
+    The command must write ``RAW_COLUMNS`` CSV lines to stdout; a header line and
+    any non-numeric diagnostic lines are skipped. A daemon thread parses stdout
+    into a bounded buffer and :meth:`next_chunk` drains whatever is ready as one
+    columnar batch. When the consumer falls behind, ``policy`` decides what the
+    reader does with a full buffer:
+
+    - ``block``: stop reading until space frees up (backpressure reaches the logger
+      through the pipe).
+    - ``drop_oldest``: discard the oldest buffered row.
+    - ``coalesce``: average the incoming row into the newest buffered row, keeping
+      the latest timestamp.
+    """
 
-    def __init__(self, command: list[str]) -> None:
+    POLICIES = ("block", "drop_oldest", "coalesce")
+
+    def __init__(self, command: list[str], max_buffer: int = 4096, policy: str = "drop_oldest") -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unsupported backpressure policy '{policy}'")
+        if max_buffer <= 0:
+            raise ValueError("max_buffer must be positive")
         self.command = command
-        self._buffer = pd.DataFrame(columns=RAW_COLUMNS)
+        self.max_buffer = max_buffer
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self._rows: Deque[List[float]] = deque()
+        self._weights: Deque[int] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._reader = threading.Thread(target=self._read_stdout, name="SubprocessSource", daemon=True)
+        self._reader.start()
+
+    @property
+    def finished(self) -> bool:
+        """True once the subprocess has closed stdout and every line has been parsed."""
+        return not self._reader.is_alive()
+
+    def _read_stdout(self) -> None:
+        assert self._process.stdout is not None
+        try:
+            for line in self._process.stdout:
+                row = self._parse_line(line)
+                if row is not None:
+                    self._enqueue(row)
+                if self._closed:
+                    break
+        finally:
+            returncode = self._process.wait()
+            if returncode not in (0, None) and not self._closed:
+                LOGGER.warning("Logger command %s exited with code %s", self.command, returncode)
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[List[float]]:
+        parts = line.strip().split(",")
+        if len(parts) != len(RAW_COLUMNS):
+            if line.strip():
+                LOGGER.debug("Ignoring logger output: %s", line.rstrip())
+            return None
+        try:
+            return [float(part) for part in parts]
+        except ValueError:
+            # Header or diagnostic line.
+            return None
+
+    def _enqueue(self, row: List[float]) -> None:
+        with self._cond:
+            if len(self._rows) >= self.max_buffer:
+                if self.policy == "block":
+                    while len(self._rows) >= self.max_buffer and not self._closed:
+                        self._cond.wait(0.5)
+                elif self.policy == "drop_oldest":
+                    self._rows.popleft()
+                    self._weights.popleft()
+                    self.dropped += 1
+                else:
+                    weight = self._weights[-1]
+                    newest = self._rows[-1]
+                    merged = [(old * weight + new) / (weight + 1) for old, new in zip(newest[1:], row[1:])]
+                    self._rows[-1] = [row[0], *merged]
+                    self._weights[-1] = weight + 1
+                    self.coalesced += 1
+                    return
+            self._rows.append(row)
+            self._weights.append(1)
 
     def next_chunk(self) -> pd.DataFrame:
-        # TODO: implement subprocess streaming after logger is available.
-        return pd.DataFrame(columns=RAW_COLUMNS)
+        with self._cond:
+            if not self._rows:
+                return pd.DataFrame(columns=RAW_COLUMNS)
+            batch = np.asarray(self._rows, dtype=float)
+            self._rows.clear()
+            self._weights.clear()
+            self._cond.notify_all()
+        chunk = pd.DataFrame(batch, columns=RAW_COLUMNS)
+        chunk["timestamp_ms"] = chunk["timestamp_ms"].astype("int64")
+        return chunk
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:  # pragma: no cover - stubborn child
+                self._process.kill()
+        self._reader.join(timeout=2.0)
@@ -1,10 +1,13 @@
+import sys
+import time
+
 import numpy as np
 import pandas as pd
 
-from dataprep.features import compute_window_features
+from dataprep.features import FeatureConfig, RealTimeFeatureExtractor, compute_window_features
 from dataprep.schemas import RunMetadata
-
-from live_test.features_rt import FeatureConfig, ProbabilitySmoother, RealTimeFeatureExtractor
+from live_test.features_rt import ProbabilitySmoother
+from live_test.streaming import SubprocessSource, TailArrowSource, TailCSVSource
 
 
 def make_metadata():
@@ -71,3 +74,159 @@ def test_probability_smoother_hold_logic():
     assert label == 0
     ema, label = smoother.update(np.array([0.3, 0.8]))
     assert label == 1
+
+
+def test_realtime_feature_stream_matches_dataprep_windows():
+    metadata = make_metadata()
+    config = FeatureConfig(window_sec=12, stride_sec=5, baseline_sec=6, sample_rate_hz=1.0)
+    extractor = RealTimeFeatureExtractor(metadata.dict(), config)
+    rng = np.random.default_rng(7)
+    samples = 97
+    data = pd.DataFrame(
+        {
+            "timestamp_ms": np.arange(samples) * 1000,
+            "gas_resistance_ohms": 80000.0 + np.cumsum(rng.normal(0.0, 50.0, samples)),
+            "temperature_C": 25.0 + rng.normal(0.0, 0.2, samples),
+            "humidity_pct": 40.0 + rng.normal(0.0, 0.5, samples),
+            "pressure_Pa": 101325.0,
+        }
+    )
+    features = []
+    for start in range(0, samples, 7):
+        features.extend(extractor.ingest(data.iloc[start : start + 7]))
+
+    baseline = data["gas_resistance_ohms"].iloc[:6].mean()
+    reference = data.assign(gas_delta=data["gas_resistance_ohms"] - baseline, gap_filled=False, gap_unfilled=False)
+    expected = [
+        compute_window_features(reference.iloc[start : start + 12], metadata, sample_rate_hz=1.0)
+        for start in range(0, samples - 12 + 1, 5)
+    ]
+    assert len(features) == len(expected)
+    for got, want in zip(features, expected):
+        assert list(got.keys()) == list(want.keys())
+        for key, value in want.items():
+            if isinstance(value, float):
+                assert np.isclose(got[key], value, rtol=1e-7, atol=1e-7), key
+            else:
+                assert got[key] == value, key
+
+
+def test_tail_csv_source_reads_only_appended_rows(tmp_path):
+    path = tmp_path / "stream.csv"
+    header = ",".join(["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"])
+    path.write_text(header + "\n0,1.0,20.0,40.0,101325.0\n", encoding="utf-8")
+    source = TailCSVSource(path)
+    assert source.next_chunk().empty
+
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write("1000,2.0,20.1,40.1,101325.0\n2000,3.0,")
+    chunk = source.next_chunk()
+    assert chunk["timestamp_ms"].tolist() == [1000]
+
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write("20.2,40.2,101325.0\n")
+    chunk = source.next_chunk()
+    assert chunk["timestamp_ms"].tolist() == [2000]
+    assert chunk["gas_resistance_ohms"].tolist() == [3.0]
+
+
+def test_tail_csv_source_restarts_after_truncation(tmp_path):
+    path = tmp_path / "stream.csv"
+    header = ",".join(["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"])
+    path.write_text(header + "\n0,1.0,20.0,40.0,101325.0\n1000,2.0,20.0,40.0,101325.0\n", encoding="utf-8")
+    source = TailCSVSource(path)
+    path.write_text(header + "\n5,9.0,21.0,41.0,101300.0\n", encoding="utf-8")
+    chunk = source.next_chunk()
+    assert chunk["timestamp_ms"].tolist() == [5]
+    assert not source.wait(0.01)
+
+
+def _logger_command(rows: int) -> list:
+    script = (
+        "print('timestamp_ms,gas_resistance_ohms,temperature_C,humidity_pct,pressure_Pa')\n"
+        "print('logger ready')\n"
+        f"for i in range({rows}):\n"
+        "    print(f'{i * 1000},{float(i)},20.0,40.0,101325.0')\n"
+    )
+    return [sys.executable, "-c", script]
+
+
+def _wait_finished(source: SubprocessSource) -> None:
+    deadline = time.monotonic() + 10.0
+    while not source.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert source.finished
+
+
+def test_subprocess_source_drop_oldest_keeps_latest_rows():
+    source = SubprocessSource(_logger_command(50), max_buffer=10, policy="drop_oldest")
+    _wait_finished(source)
+    chunk = source.next_chunk()
+    source.close()
+    assert chunk["timestamp_ms"].tolist() == [i * 1000 for i in range(40, 50)]
+    assert source.dropped == 40
+    assert source.next_chunk().empty
+
+
+def test_subprocess_source_coalesces_overflow_into_newest_row():
+    source = SubprocessSource(_logger_command(50), max_buffer=5, policy="coalesce")
+    _wait_finished(source)
+    chunk = source.next_chunk()
+    source.close()
+    assert chunk["timestamp_ms"].tolist() == [0, 1000, 2000, 3000, 49000]
+    assert np.isclose(chunk["gas_resistance_ohms"].iloc[-1], np.mean(np.arange(4, 50)))
+
+
+def test_subprocess_source_block_policy_loses_nothing():
+    source = SubprocessSource(_logger_command(30), max_buffer=4, policy="block")
+    chunks = []
+    deadline = time.monotonic() + 10.0
+    while time.monotonic() < deadline:
+        chunk = source.next_chunk()
+        if not chunk.empty:
+            chunks.append(chunk)
+        elif source.finished:
+            # The reader may have queued its last rows after the empty drain above.
+            chunk = source.next_chunk()
+            if not chunk.empty:
+                chunks.append(chunk)
+            break
+        time.sleep(0.005)
+    source.close()
+    timestamps = pd.concat(chunks)["timestamp_ms"].tolist()
+    assert timestamps == [i * 1000 for i in range(30)]
+
+
+def test_tail_arrow_source_returns_new_batches(tmp_path):
+    from collector.logger import ArrowLogger
+
+    def row(idx):
+        return {
+            "timestamp_utc": f"2025-10-20T12:00:{idx:02d}+00:00",
+            "cycle_index": 0,
+            "step_index": idx,
+            "gas_resistance_ohm": 1000.0 + idx,
+            "sensor_temperature_C": 25.0,
+            "sensor_humidity_RH": 40.0,
+            "pressure_Pa": 101325.0,
+            "heater_heat_stable": True,
+            "sample_name": "Beef > Fresh",
+        }
+
+    path = tmp_path / "bme690_live.arrow"
+    logger = ArrowLogger(path, commit_rows=2, commit_interval_s=60.0)
+    logger.write_header()
+    logger.write_row(row(0))
+    logger.write_row(row(1))
+    deadline = time.monotonic() + 5.0
+    while path.stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    source = TailArrowSource(path)
+    assert source.next_chunk().empty
+    logger.write_row(row(2))
+    logger.close()
+    chunk = source.next_chunk()
+    assert chunk.columns.tolist() == ["timestamp_ms", "gas_resistance_ohms", "temperature_C", "humidity_pct", "pressure_Pa"]
+    assert chunk["gas_resistance_ohms"].tolist() == [1002.0]
+    assert chunk["timestamp_ms"].iloc[0] % 60000 == 2000
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import shlex
 from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
@@ -14,6 +15,7 @@ from PySide6.QtWidgets import (
     QGridLayout,
     QGroupBox,
     QLabel,
+    QLineEdit,
     QMainWindow,
     QPushButton,
     QSpinBox,
@@ -69,6 +71,8 @@ class LiveTestWindow(QMainWindow):
         self.csv_label = QLabel("CSV: <none>")
         self.meta_label = QLabel("Metadata: <none>")
         self.model_label = QLabel("Model: <none>")
+        self.logger_edit = QLineEdit()
+        self.logger_edit.setPlaceholderText("Command that prints CSV rows on stdout (Subprocess mode)")
 
         control_layout.addWidget(QLabel("Mode"), 0, 0)
         control_layout.addWidget(self.mode_combo, 0, 1)
@@ -78,6 +82,8 @@ class LiveTestWindow(QMainWindow):
         control_layout.addWidget(self.meta_label, 2, 1)
         control_layout.addWidget(self.model_button, 3, 0)
         control_layout.addWidget(self.model_label, 3, 1)
+        control_layout.addWidget(QLabel("Logger command"), 4, 0)
+        control_layout.addWidget(self.logger_edit, 4, 1)
 
         layout.addWidget(control_box)
 
@@ -156,8 +162,15 @@ class LiveTestWindow(QMainWindow):
         self.start_button.clicked.connect(self.start_requested.emit)
         self.stop_button.clicked.connect(self.stop_requested.emit)
 
+    def set_logger_command(self, command: str) -> None:
+        self.logger_edit.setText(command)
+
+    def logger_command(self) -> List[str]:
+        """The Subprocess-mode command, split like a POSIX shell would."""
+        return shlex.split(self.logger_edit.text())
+
     def _pick_csv(self) -> None:
-        path, _ = QFileDialog.getOpenFileName(self, "Select CSV", filter="CSV Files (*.csv)")
+        path, _ = QFileDialog.getOpenFileName(self, "Select CSV", filter="Run Logs (*.csv *.arrow);;CSV Files (*.csv);;Arrow Logs (*.arrow)")
         if path:
             self.csv_label.setText(f"CSV: {path}")
             self.csv_selected.emit(path)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+LOGGER = logging.getLogger("training")
+
+CACHE_VERSION = 1
+ENTRY_SUFFIX = ".joblib"
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def dataset_digest(X: pd.DataFrame, y: np.ndarray, groups: np.ndarray) -> str:
+    """Content hash of a training set: column names and dtypes, every cell, labels and groups."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in X.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(pd.util.hash_array(np.asarray(groups, dtype=object)).tobytes())
+    return digest.hexdigest()
+
+
+class PreprocessCache:
+    """Size-bounded on-disk store of fitted preprocessors and the matrices they produced.
+
+    Each entry is one ``<key>.joblib`` file holding ``{"preprocess", "train", "test"}``.
+    Keys combine the dataset digest, the fold and the preprocessing configuration, so
+    models that share a preprocessing (``rf`` and ``gbt``) reuse each other's entries.
+    Entries are written atomically and touched on every hit; once the directory holds
+    more than ``max_bytes``, the least recently used entries are deleted. Several fold
+    workers may share one directory.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def key(self, data_digest: str, fold: Union[int, str], config: Dict[str, object]) -> str:
+        payload = {
+            "version": CACHE_VERSION,
+            "sklearn": sklearn.__version__,
+            "data": data_digest,
+            "fold": fold,
+            "preprocess": config,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        path = self._path(key)
+        try:
+            entry = joblib.load(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:  # truncated or evicted under our feet
+            LOGGER.warning("Ignoring unreadable cache entry %s: %s", path, exc)
+            return None
+        LOGGER.debug("Preprocessing cache hit %s", key[:12])
+        return entry
+
+    def put(self, key: str, entry: Dict[str, object]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        joblib.dump(entry, tmp_path)
+        tmp_path.replace(path)
+        self.evict(keep=key)
+
+    def size_bytes(self) -> int:
+        total = 0
+        for path in self.root.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for path in self.root.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path.stem == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            LOGGER.debug("Evicted %s preprocessing cache entries from %s", removed, self.root)
+        return removed
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+from dataprep.manifest import file_digest
+
+LOGGER = logging.getLogger("training")
+
+COMPILED_NAME = "model_compiled.npz"
+COMPILED_VERSION = 1
+
+Features = Union[pd.DataFrame, Sequence[Mapping[str, object]]]
+
+
+class CompiledModel:
+    """Tree ensemble and preprocessing of an exported pipeline as flat NumPy node arrays.
+
+    All trees share one node table; leaves point to themselves, so a fixed number of
+    vectorised steps (the deepest tree's depth) walks every (sample, tree) pair to its
+    leaf at once. Inputs are cast to float32 and compared with float64 thresholds,
+    and leaf values are accumulated in tree order, exactly as scikit-learn does, so
+    :meth:`predict_proba` returns the pipeline's probabilities bit for bit.
+
+    Supports ``rf`` (``RandomForestClassifier``) and ``gbt``
+    (``GradientBoostingClassifier`` with the default log-loss) behind the
+    ``ColumnTransformer`` built by ``training.train.build_preprocess``.
+    """
+
+    def __init__(self, meta: Dict[str, object], arrays: Dict[str, np.ndarray]) -> None:
+        self.meta = meta
+        self.kind = str(meta["kind"])
+        self.classes = list(meta["classes"])
+        self.depth = int(meta["depth"])
+        self.categorical: List[Dict[str, object]] = list(meta["categorical"])
+        self.numeric_cols: List[str] = list(meta["numeric_cols"])
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"]
+        self.values = arrays["values"]
+        self.roots = arrays["roots"]
+        self.scaler_mean = arrays.get("scaler_mean")
+        self.scaler_scale = arrays.get("scaler_scale")
+        self.init_raw = arrays.get("init_raw")
+
+    # -- building -----------------------------------------------------------------
+
+    @classmethod
+    def from_pipeline(cls, pipeline, model_sha256: str = "") -> "CompiledModel":
+        preprocess = pipeline.named_steps["preprocess"]
+        estimator = pipeline.named_steps["model"]
+        meta: Dict[str, object] = {"version": COMPILED_VERSION, "model_sha256": model_sha256, "categorical": []}
+        arrays: Dict[str, np.ndarray] = {}
+
+        numeric_cols: List[str] = []
+        for name, transformer, columns in preprocess.transformers_:
+            if name == "remainder":
+                if transformer != "drop":
+                    raise ValueError("Only pipelines that drop remaining columns can be compiled")
+                continue
+            if type(transformer).__name__ == "OneHotEncoder":
+                if transformer.drop_idx_ is not None or getattr(transformer, "infrequent_categories_", None):
+                    raise ValueError("OneHotEncoder with drop or infrequent categories cannot be compiled")
+                for column, categories in zip(columns, transformer.categories_):
+                    meta["categorical"].append({"column": column, "categories": categories.tolist()})
+            elif transformer == "passthrough" or (
+                # A fitted ColumnTransformer stores "passthrough" as an identity FunctionTransformer.
+                type(transformer).__name__ == "FunctionTransformer"
+                and transformer.func is None
+            ):
+                numeric_cols.extend(columns)
+            elif type(transformer).__name__ == "StandardScaler":
+                numeric_cols.extend(columns)
+                size = len(columns)
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(size)
+                scale = transformer.scale_ if transformer.with_std else np.ones(size)
+                arrays["scaler_mean"] = np.asarray(mean, dtype=np.float64)
+                arrays["scaler_scale"] = np.asarray(scale, dtype=np.float64)
+            else:
+                raise ValueError(f"Cannot compile preprocessing step {name!r} ({type(transformer).__name__})")
+        if "scaler_mean" in arrays and len(arrays["scaler_mean"]) != len(numeric_cols):
+            raise ValueError("Only pipelines that scale every numeric column or none can be compiled")
+        meta["numeric_cols"] = numeric_cols
+
+        estimator_name = type(estimator).__name__
+        if estimator_name == "RandomForestClassifier":
+            meta["kind"] = "rf"
+            trees = [tree.tree_ for tree in estimator.estimators_]
+            n_classes = int(estimator.n_classes_)
+
+            def leaf_values(tree) -> np.ndarray:
+                # DecisionTreeClassifier.predict_proba normalises the leaf value per row.
+                proba = tree.value[:, 0, :n_classes]
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                return proba / normalizer
+
+        elif estimator_name == "GradientBoostingClassifier":
+            if estimator.loss != "log_loss" or estimator.init_ == "zero":
+                raise ValueError("Only log-loss GradientBoostingClassifier with the prior init can be compiled")
+            meta["kind"] = "gbt"
+            meta["learning_rate"] = float(estimator.learning_rate)
+            meta["trees_per_stage"] = int(estimator.estimators_.shape[1])
+            trees = [tree.tree_ for tree in estimator.estimators_.ravel()]
+            # The prior init does not depend on the sample; evaluate it on any row.
+            probe = np.zeros((1, estimator.n_features_in_), dtype=np.float32)
+            arrays["init_raw"] = np.asarray(estimator._raw_predict_init(probe)[0], dtype=np.float64)
+
+            def leaf_values(tree) -> np.ndarray:
+                return tree.value[:, 0, 0].astype(np.float64)
+
+        else:
+            raise ValueError(f"Cannot compile {estimator_name}; only rf and gbt models are supported")
+        meta["classes"] = [int(idx) for idx in estimator.classes_]
+        meta["depth"] = max(int(tree.max_depth) for tree in trees)
+
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        features, thresholds, lefts, rights, missing, values = [], [], [], [], [], []
+        for offset, tree in zip(offsets[:-1], trees):
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(leaf, nodes, tree.children_right + offset))
+            go_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+            missing.append(np.asarray(go_left, dtype=bool))
+            values.append(leaf_values(tree))
+        arrays.update(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            missing_left=np.ascontiguousarray(np.concatenate(missing)),
+            values=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.ascontiguousarray(offsets[:-1], dtype=np.intp),
+        )
+        return cls(meta, arrays)
+
+    def save(self, path: Path) -> None:
+        arrays = {
+            name: value
+            for name, value in {
+                "feature": self.feature,
+                "threshold": self.threshold,
+                "left": self.left,
+                "right": self.right,
+                "missing_left": self.missing_left,
+                "values": self.values,
+                "roots": self.roots,
+                "scaler_mean": self.scaler_mean,
+                "scaler_scale": self.scaler_scale,
+                "init_raw": self.init_raw,
+            }.items()
+            if value is not None
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as fh:
+            np.savez(fh, meta=np.array(json.dumps(self.meta)), **arrays)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledModel":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != COMPILED_VERSION:
+                raise ValueError(f"{path} has an unsupported version")
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta, arrays)
+
+    # -- evaluation ---------------------------------------------------------------
+
+    def transform(self, features: Features) -> np.ndarray:
+        """The ``ColumnTransformer`` output for ``features`` (a DataFrame or a list of feature rows)."""
+        if isinstance(features, pd.DataFrame):
+            column = lambda name: features[name].to_numpy()  # noqa: E731
+        else:
+            column = lambda name: np.array([row[name] for row in features], dtype=object)  # noqa: E731
+        blocks = []
+        for spec in self.categorical:
+            values = column(spec["column"])
+            blocks.append(np.stack([values == category for category in spec["categories"]], axis=1).astype(np.float64))
+        if self.numeric_cols:
+            numeric = np.stack([column(name).astype(np.float64) for name in self.numeric_cols], axis=1)
+            if self.scaler_mean is not None:
+                numeric -= self.scaler_mean
+                numeric /= self.scaler_scale
+            blocks.append(numeric)
+        return np.hstack(blocks)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node of every (sample, tree) pair for an already transformed ``X``."""
+        # Trees see float32 features; the comparison itself is done in float64.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.size))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_left[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, features: Features) -> np.ndarray:
+        leaves = self.apply(self.transform(features))
+        if self.kind == "rf":
+            # Summed tree by tree from zero, then averaged, like RandomForestClassifier.
+            per_tree = np.moveaxis(self.values[leaves], 1, 0)
+            stacked = np.concatenate([np.zeros((1,) + per_tree.shape[1:]), per_tree])
+            return np.add.reduce(np.ascontiguousarray(stacked), axis=0) / self.roots.size
+        per_stage = int(self.meta["trees_per_stage"])
+        contributions = float(self.meta["learning_rate"]) * self.values[leaves]
+        contributions = contributions.reshape(leaves.shape[0], -1, per_stage).transpose(1, 0, 2)
+        init = np.broadcast_to(self.init_raw, (1, leaves.shape[0], per_stage))
+        raw = np.add.reduce(np.ascontiguousarray(np.concatenate([init, contributions])), axis=0)
+        if per_stage == 1:
+            proba = np.empty((raw.shape[0], 2))
+            proba[:, 1] = expit(raw[:, 0])
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+        # sklearn.utils.extmath.softmax
+        raw -= np.max(raw, axis=1).reshape((-1, 1))
+        np.exp(raw, raw)
+        raw /= np.sum(raw, axis=1).reshape((-1, 1))
+        return raw
+
+
+def export_compiled(model_path: Path, out_path: Optional[Path] = None, pipeline=None) -> Optional[Path]:
+    """Write ``model_compiled.npz`` next to ``model_path``.
+
+    Returns ``None`` (and removes an older compiled file) for unsupported models.
+    """
+    model_path = Path(model_path)
+    out_path = out_path or model_path.parent / COMPILED_NAME
+    if pipeline is None:
+        pipeline = joblib.load(model_path)
+    try:
+        compiled = CompiledModel.from_pipeline(pipeline, model_sha256=file_digest(model_path))
+    except ValueError as exc:
+        LOGGER.info("Not compiling %s: %s", model_path, exc)
+        out_path.unlink(missing_ok=True)
+        return None
+    compiled.save(out_path)
+    LOGGER.info("Wrote compiled %s evaluator (%s nodes) to %s", compiled.kind, compiled.feature.size, out_path)
+    return out_path
+
+
+def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile an exported rf/gbt model.joblib into NumPy node arrays.")
+    parser.add_argument("--model", type=Path, required=True, help="Path to model.joblib")
+    parser.add_argument("--out", type=Path, default=None, help=f"Destination (default: {COMPILED_NAME} next to the model).")
+    return parser.parse_args(args)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    return 0 if export_compiled(ns.model, ns.out) is not None else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from dataprep.manifest import file_digest
+
+from .compiled import COMPILED_NAME, CompiledModel, Features
+
+LOGGER = logging.getLogger("training")
+
+ESTIMATOR_NAMES = {
+    "LogisticRegression": "logreg",
+    "RandomForestClassifier": "rf",
+    "GradientBoostingClassifier": "gbt",
+    "HistGradientBoostingClassifier": "hgbt",
+    "SGDClassifier": "sgd",
+}
+
+
+@dataclass
+class LoadedModel:
+    """A ``model.joblib`` exported by ``training.train`` plus the files saved next to it."""
+
+    path: Path
+    pipeline: Pipeline
+    model_name: str
+    classes: List[int]
+    label_map: Dict[int, str] = field(default_factory=dict)
+    compiled: Optional[CompiledModel] = None
+
+    @property
+    def class_names(self) -> List[str]:
+        return [self.label_map.get(int(idx), str(idx)) for idx in self.classes]
+
+    def predict_proba(self, features: Features):
+        """Class probabilities for a DataFrame or a list of feature rows (as the extractor emits them)."""
+        if self.compiled is not None:
+            return self.compiled.predict_proba(features)
+        if not isinstance(features, pd.DataFrame):
+            features = pd.DataFrame(list(features))
+        return self.pipeline.predict_proba(features)
+
+
+def load_compiled(model_path: Path, classes: List[int]) -> Optional[CompiledModel]:
+    """The ``model_compiled.npz`` exported for ``model_path``, unless it is missing or stale."""
+    compiled_path = model_path.parent / COMPILED_NAME
+    if not compiled_path.exists():
+        return None
+    try:
+        compiled = CompiledModel.load(compiled_path)
+    except (OSError, ValueError, KeyError) as exc:
+        LOGGER.warning("Ignoring unreadable %s: %s", compiled_path, exc)
+        return None
+    if compiled.meta.get("model_sha256") != file_digest(model_path) or compiled.classes != classes:
+        LOGGER.warning("Ignoring %s: it was compiled from a different model.joblib", compiled_path)
+        return None
+    return compiled
+
+
+def load_model(path: Path) -> LoadedModel:
+    """Load an exported pipeline (any ``training.train`` model) for the detector and live_test.
+
+    When ``training.train`` also exported ``model_compiled.npz`` for this exact file,
+    predictions go through the NumPy evaluator instead of the pipeline.
+    Raises ``ValueError`` when the file is not a pipeline with a ``model`` step that
+    predicts probabilities.
+    """
+    model_path = Path(path)
+    pipeline = joblib.load(model_path)
+    estimator = getattr(pipeline, "named_steps", {}).get("model")
+    if estimator is None or not hasattr(estimator, "predict_proba"):
+        raise ValueError(f"{model_path} is not a training.train pipeline with a probabilistic 'model' step")
+    classes = [int(idx) for idx in estimator.classes_]
+    label_map_path = model_path.parent / "label_map.json"
+    if label_map_path.exists():
+        payload = json.loads(label_map_path.read_text(encoding="utf-8"))
+        label_map = {int(idx): label for label, idx in payload.items()}
+    else:
+        label_map = {idx: str(idx) for idx in classes}
+    model_name = ESTIMATOR_NAMES.get(type(estimator).__name__, type(estimator).__name__)
+    compiled = load_compiled(model_path, classes)
+    LOGGER.info("Loaded %s model from %s%s", model_name, model_path, " (compiled)" if compiled else "")
+    return LoadedModel(model_path, pipeline, model_name, classes, label_map, compiled)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 - enables HalvingGridSearchCV
+from sklearn.model_selection import GroupKFold, HalvingGridSearchCV
+
+from .train import build_pipeline
+
+LOGGER = logging.getLogger("training")
+
+# Parameter spaces explored by ``training.train --search``; keys address the pipeline's
+# ``model`` step. The fixed defaults of ``build_estimator`` are always part of the grid.
+SEARCH_SPACES: Dict[str, Dict[str, List[object]]] = {
+    "logreg": {
+        "model__C": [0.01, 0.1, 1.0, 10.0, 100.0],
+        "model__class_weight": [None, "balanced"],
+    },
+    "rf": {
+        "model__n_estimators": [100, 200, 400],
+        "model__max_depth": [None, 8, 16],
+        "model__min_samples_leaf": [1, 2, 5],
+        "model__max_features": ["sqrt", 0.5],
+    },
+    "gbt": {
+        "model__learning_rate": [0.03, 0.1, 0.3],
+        "model__n_estimators": [100, 200],
+        "model__max_depth": [2, 3, 4],
+        "model__subsample": [0.8, 1.0],
+    },
+    "sgd": {
+        "model__alpha": [1e-5, 1e-4, 1e-3, 1e-2],
+        "model__penalty": ["l2", "elasticnet"],
+    },
+    "hgbt": {
+        "model__learning_rate": [0.05, 0.1, 0.2],
+        "model__max_iter": [100, 200, 400],
+        "model__max_leaf_nodes": [15, 31, 63],
+        "model__min_samples_leaf": [10, 20, 40],
+        "model__l2_regularization": [0.0, 1.0],
+    },
+}
+
+LEADERBOARD_COLUMNS = ["rank", "iter", "n_resources", "mean_macro_f1", "std_macro_f1", "mean_fit_time_s", "params"]
+
+
+def estimator_params(search_params: Dict[str, object]) -> Dict[str, object]:
+    """Strip the ``model__`` prefix so the parameters can be passed to ``build_estimator``."""
+    return {key.split("__", 1)[1]: value for key, value in search_params.items() if key.startswith("model__")}
+
+
+def leaderboard(cv_results: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """One row per (candidate, halving iteration), best survivors of the last iteration first."""
+    board = pd.DataFrame(
+        {
+            "iter": cv_results["iter"],
+            "n_resources": cv_results["n_resources"],
+            "mean_macro_f1": cv_results["mean_test_score"],
+            "std_macro_f1": cv_results["std_test_score"],
+            "mean_fit_time_s": cv_results["mean_fit_time"],
+            "params": [json.dumps(estimator_params(params), sort_keys=True) for params in cv_results["params"]],
+        }
+    )
+    board = board.sort_values(["iter", "mean_macro_f1"], ascending=[False, False], na_position="last", kind="stable")
+    board.insert(0, "rank", np.arange(1, len(board) + 1))
+    return board.reset_index(drop=True)[LEADERBOARD_COLUMNS]
+
+
+def run_search(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    groups: np.ndarray,
+    model_name: str,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    cv_folds: int,
+    seed: int,
+    jobs: Optional[int] = None,
+    factor: int = 3,
+    space: Optional[Dict[str, List[object]]] = None,
+) -> Tuple[Dict[str, object], pd.DataFrame]:
+    """Successive halving over ``space`` (default ``SEARCH_SPACES[model_name]``) on grouped CV.
+
+    Every round scores the surviving candidates on ``GroupKFold(cv_folds)`` with more
+    training rows and keeps the best ``1/factor`` of them; rows are subsampled within
+    each training fold, so specimens never cross folds. Candidates are fitted in
+    ``jobs`` processes (``0`` = all cores) with single-threaded estimators.
+    Returns the best estimator parameters and the leaderboard.
+    """
+    grid = dict(space if space is not None else SEARCH_SPACES[model_name])
+    pipeline = build_pipeline(model_name, categorical_cols, numeric_cols, seed=seed, n_jobs=1)
+    search = HalvingGridSearchCV(
+        pipeline,
+        grid,
+        factor=factor,
+        cv=GroupKFold(n_splits=cv_folds),
+        scoring="f1_macro",
+        refit=False,
+        return_train_score=False,
+        random_state=seed,
+        n_jobs=None if jobs is None else (-1 if jobs <= 0 else jobs),
+    )
+    search.fit(X, y, groups=groups)
+    LOGGER.info(
+        "Search finished after %s rounds (%s candidates, resources %s); best macro_f1=%.3f with %s",
+        search.n_iterations_,
+        search.n_candidates_[0],
+        search.n_resources_,
+        search.best_score_,
+        estimator_params(search.best_params_),
+    )
+    return estimator_params(search.best_params_), leaderboard(search.cv_results_)
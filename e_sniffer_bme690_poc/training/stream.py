@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .train import STREAMING_MODELS, build_estimator, build_preprocess, save_artifacts
+from .utils import feature_columns, iter_feature_batches
+
+LOGGER = logging.getLogger("training")
+
+
+class RunningMoments:
+    """Per-column count, mean and sum of squared deviations, mergeable across batches and groups."""
+
+    def __init__(self, width: int) -> None:
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        other = RunningMoments(values.shape[1])
+        other.count = len(values)
+        other.mean = values.mean(axis=0)
+        other.m2 = ((values - other.mean) ** 2).sum(axis=0)
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        # Chan et al. pairwise update.
+        total = self.count + other.count
+        if not other.count:
+            return
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta**2 * (self.count * other.count / total)
+        self.count = total
+
+    def apply_to(self, scaler: StandardScaler) -> None:
+        """Overwrite a fitted scaler's statistics with these moments."""
+        var = self.m2 / max(self.count, 1)
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = var
+        # Same constant-feature bound as StandardScaler (rounding noise on a constant column).
+        eps = np.finfo(np.float64).eps
+        constant = var <= self.count * eps * var + (self.count * self.mean * eps) ** 2
+        scale = np.sqrt(var)
+        scale[constant] = 1.0
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = self.count
+
+
+@dataclass
+class FeatureScan:
+    """What the first pass over ``features.parquet`` learns without keeping any rows."""
+
+    categorical_cols: List[str]
+    numeric_cols: List[str]
+    label_map: Dict[str, int]
+    categories: List[List[str]]
+    group_counts: Dict[str, int]
+    group_moments: Dict[str, RunningMoments] = field(default_factory=dict)
+
+    @property
+    def rows(self) -> int:
+        return int(sum(self.group_counts.values()))
+
+
+def scan_features(path: Path, group_col: str, batch_rows: int = 50_000) -> FeatureScan:
+    """Collect labels, categories, rows per group and per-group numeric moments in one pass."""
+    categorical_cols, numeric_cols = feature_columns(pq.read_schema(path))
+    columns = [group_col, "freshness_label"] + categorical_cols + numeric_cols
+    labels: set = set()
+    categories: List[set] = [set() for _ in categorical_cols]
+    group_counts: Dict[str, int] = {}
+    group_moments: Dict[str, RunningMoments] = {}
+    for batch in iter_feature_batches(path, columns, batch_rows=batch_rows):
+        labels.update(batch["freshness_label"].astype(str).unique())
+        for seen, col in zip(categories, categorical_cols):
+            seen.update(batch[col].dropna().unique())
+        numeric = batch[numeric_cols].to_numpy(dtype=np.float64)
+        groups = batch[group_col].astype(str).to_numpy()
+        for group in np.unique(groups):
+            mask = groups == group
+            group_counts[group] = group_counts.get(group, 0) + int(mask.sum())
+            group_moments.setdefault(group, RunningMoments(len(numeric_cols))).update(numeric[mask])
+    # LabelEncoder order, so label indices match the in-memory trainer.
+    label_map = {label: idx for idx, label in enumerate(sorted(labels))}
+    return FeatureScan(
+        categorical_cols,
+        numeric_cols,
+        label_map,
+        [sorted(seen) for seen in categories],
+        group_counts,
+        group_moments,
+    )
+
+
+def assign_group_folds(group_counts: Dict[str, int], cv_folds: int) -> Dict[str, int]:
+    """Group -> fold index, balanced by row count with the same greedy rule as ``GroupKFold``."""
+    names = np.array(sorted(group_counts))
+    counts = np.array([group_counts[name] for name in names])
+    order = np.argsort(counts)[::-1]
+    rows_per_fold = np.zeros(cv_folds)
+    folds: Dict[str, int] = {}
+    for index in order:
+        lightest = int(np.argmin(rows_per_fold))
+        rows_per_fold[lightest] += counts[index]
+        folds[str(names[index])] = lightest
+    return folds
+
+
+def fold_metrics_from_confusion(cm: np.ndarray) -> Tuple[float, float]:
+    """Accuracy and macro F1 (over the classes present) from a confusion matrix."""
+    total = cm.sum()
+    accuracy = float(np.trace(cm) / total) if total else float("nan")
+    tp = np.diag(cm).astype(float)
+    present = (cm.sum(axis=0) + cm.sum(axis=1)) > 0
+    denominator = cm.sum(axis=0) + cm.sum(axis=1)
+    f1 = np.divide(2 * tp, denominator, out=np.zeros_like(tp), where=denominator > 0)
+    return accuracy, float(f1[present].mean()) if present.any() else float("nan")
+
+
+def _batches(ns: argparse.Namespace, scan: FeatureScan) -> Iterator[Tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+    columns = [ns.group_col, "freshness_label"] + scan.categorical_cols + scan.numeric_cols
+    for batch in iter_feature_batches(ns.input_path, columns, batch_rows=max(1, ns.batch_rows)):
+        y = batch["freshness_label"].astype(str).map(scan.label_map).to_numpy(dtype=np.int64)
+        yield batch[scan.categorical_cols + scan.numeric_cols], y, batch[ns.group_col].astype(str).to_numpy()
+
+
+def run_streaming(ns: argparse.Namespace) -> int:
+    """Out-of-core counterpart of ``run_training`` for models with ``partial_fit``.
+
+    One scan pass, then ``--epochs`` passes in which every fold model and the final
+    model each take a ``partial_fit`` step per batch, then one pass that scores the
+    held-out folds. Memory is bounded by ``--batch-rows`` plus per-group statistics.
+    """
+    if ns.model not in STREAMING_MODELS:
+        raise ValueError(f"--streaming needs an incrementally trainable model: {', '.join(STREAMING_MODELS)}")
+    scan = scan_features(ns.input_path, ns.group_col, batch_rows=max(1, ns.batch_rows))
+    if len(scan.group_counts) < ns.cv_folds:
+        raise ValueError("Number of groups is smaller than cv-folds.")
+    LOGGER.info("Scanned %s rows in %s groups, %s classes", scan.rows, len(scan.group_counts), len(scan.label_map))
+    group_folds = assign_group_folds(scan.group_counts, ns.cv_folds)
+    classes = np.arange(len(scan.label_map))
+    n_jobs = -1 if ns.jobs is None or ns.jobs <= 0 else ns.jobs
+
+    # Index k < cv_folds is fold k + 1 (trained without its groups); the last one is the final model.
+    template = build_preprocess(scan.categorical_cols, scan.numeric_cols, ns.model, categories=scan.categories or None)
+    first_X, _, _ = next(_batches(ns, scan))
+    preprocessors = []
+    for k in range(ns.cv_folds + 1):
+        moments = RunningMoments(len(scan.numeric_cols))
+        for group, fold in group_folds.items():
+            if fold != k:
+                moments.merge(scan.group_moments[group])
+        # Fitting on one batch sets up the transformer; the scaler then takes the streamed statistics.
+        preprocess = clone(template).fit(first_X)
+        scaler = preprocess.named_transformers_.get("num")
+        if isinstance(scaler, StandardScaler):
+            moments.apply_to(scaler)
+        preprocessors.append(preprocess)
+    estimators = [
+        build_estimator(ns.model, ns.seed + (k + 1 if k < ns.cv_folds else 0), n_jobs=n_jobs)
+        for k in range(ns.cv_folds + 1)
+    ]
+
+    rng = np.random.default_rng(ns.seed)
+    for epoch in range(1, max(1, ns.epochs) + 1):
+        LOGGER.info("Epoch %s/%s", epoch, max(1, ns.epochs))
+        for X, y, groups in _batches(ns, scan):
+            order = rng.permutation(len(y))
+            X, y, groups = X.iloc[order], y[order], groups[order]
+            fold_of = pd.Series(groups).map(group_folds).to_numpy()
+            for k, (preprocess, estimator) in enumerate(zip(preprocessors, estimators)):
+                mask = fold_of != k
+                if mask.any():
+                    estimator.partial_fit(preprocess.transform(X[mask]), y[mask], classes=classes)
+
+    confusions = np.zeros((ns.cv_folds, len(classes), len(classes)), dtype=np.int64)
+    for X, y, groups in _batches(ns, scan):
+        fold_of = pd.Series(groups).map(group_folds).to_numpy()
+        for k in range(ns.cv_folds):
+            mask = fold_of == k
+            if mask.any():
+                preds = estimators[k].predict(preprocessors[k].transform(X[mask]))
+                np.add.at(confusions[k], (y[mask], preds), 1)
+
+    fold_metrics = []
+    for k, cm in enumerate(confusions, start=1):
+        acc, f1 = fold_metrics_from_confusion(cm)
+        fold_metrics.append({"fold": k, "accuracy": acc, "macro_f1": f1})
+    pooled = confusions.sum(axis=0)
+    overall_accuracy, overall_f1 = fold_metrics_from_confusion(pooled)
+    LOGGER.info("CV accuracy=%.3f macro_f1=%.3f", overall_accuracy, overall_f1)
+
+    final_pipeline = Pipeline(steps=[("preprocess", preprocessors[-1]), ("model", estimators[-1])])
+    metrics_payload = {
+        "model": ns.model,
+        "params": {},
+        "streaming": {"epochs": max(1, ns.epochs), "batch_rows": ns.batch_rows, "rows": scan.rows},
+        "timestamp_utc": datetime.utcnow().isoformat(),
+        "accuracy": overall_accuracy,
+        "macro_f1": overall_f1,
+        "folds": fold_metrics,
+    }
+    save_artifacts(ns, final_pipeline, metrics_payload, scan.label_map, pooled)
+    return 0
@@ -72,3 +72,374 @@ def test_pipeline_trains_on_synthetic_data():
     pipeline.fit(X, y)
     probs = pipeline.predict_proba(X)
     assert probs.shape == (X.shape[0], len(np.unique(y)))
+
+
+def test_tune_windows_reports_accuracy_against_first_prediction(tmp_path):
+    import json
+
+    from dataprep.schemas import RunMetadata
+    from training.tune_windows import main as tune_main
+
+    rng = np.random.default_rng(3)
+    for idx in range(4):
+        run_dir = tmp_path / "data" / "2025-10-20" / f"SPEC-{idx}" / f"RUN-{idx}"
+        run_dir.mkdir(parents=True)
+        aged = idx % 2 == 1
+        samples = 400
+        pd.DataFrame(
+            {
+                "timestamp_ms": np.arange(samples) * 1000,
+                "gas_resistance_ohms": (60000.0 if aged else 90000.0) + rng.normal(0.0, 300.0, samples),
+                "temperature_C": 25.0 + rng.normal(0.0, 0.2, samples),
+                "humidity_pct": 40.0 + rng.normal(0.0, 0.5, samples),
+                "pressure_Pa": 101325.0,
+            }
+        ).to_csv(run_dir / "raw.csv", index=False)
+        metadata = RunMetadata(
+            specimen_id=f"SPEC-{idx}",
+            meat_type="beef",
+            cut="ribeye",
+            age_days=4 if aged else 0,
+            storage_condition="fridge",
+            mass_g=100.0,
+            jar_id="JAR-1",
+            run_id=f"RUN-{idx}",
+            operator="OP",
+            protocol_version="1.0",
+            heater_profile_id="HP",
+            sample_rate_hz=1.0,
+            room_temp_C=21.0,
+            room_rh_pct=40.0,
+        )
+        (run_dir / "metadata.json").write_text(metadata.json(), encoding="utf-8")
+
+    out = tmp_path / "tuning"
+    args = ["--data-root", str(tmp_path / "data"), "--out", str(out), "--window-sec", "30,120"]
+    args += ["--stride-sec", "30", "--baseline-sec", "10", "--model", "logreg", "--cv-folds", "4"]
+    assert tune_main(args) == 0
+
+    results = pd.read_csv(out / "tuning.csv")
+    assert sorted(results["window_sec"]) == [30, 120]
+    assert set(results["time_to_first_prediction_s"]) == {30, 120}
+    assert results["accuracy"].between(0.0, 1.0).all()
+    assert results["pareto"].any()
+    payload = json.loads((out / "tuning.json").read_text())
+    assert len(payload["results"]) == 2
+
+
+def make_noisy_features_df(specimens: int = 6, windows: int = 10) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    frames = []
+    for idx in range(specimens):
+        frame = pd.concat([make_features_df().iloc[:1]] * windows, ignore_index=True)
+        frame["specimen_id"] = f"S{idx}"
+        frame["freshness_label"] = "fresh" if idx % 2 == 0 else "aged"
+        frame["meat_type"] = "beef" if idx % 3 else "pork"
+        frame["gas_mean"] = (1.0 if idx % 2 == 0 else 1.5) + rng.normal(0.0, 0.4, windows)
+        frame["gas_std"] = rng.normal(0.1, 0.05, windows)
+        frame["age_days"] = idx
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_parallel_cross_validation_matches_serial():
+    from training.train import cross_validate, precompute_folds, split_cpu_budget
+
+    df = make_noisy_features_df()
+    X, y, groups, cat_cols, num_cols, _ = prepare_dataset(df, group_col="specimen_id")
+
+    folds = precompute_folds(X, y, groups, cat_cols, num_cols, cv_folds=3)
+    assert [fold.fold for fold in folds] == [1, 2, 3]
+    assert sum(fold.y_test.size for fold in folds) == len(y)
+    assert folds[0].train_numeric.flags.f_contiguous
+    assert list(folds[0].train_frame().columns) == list(X.columns)
+
+    assert split_cpu_budget(8, 3) == (3, 2)
+    assert split_cpu_budget(2, 5) == (2, 1)
+
+    for model in ("logreg", "rf"):
+        serial = cross_validate(X, y, groups, model, cat_cols, num_cols, cv_folds=3, seed=5)
+        parallel = cross_validate(X, y, groups, model, cat_cols, num_cols, cv_folds=3, seed=5, jobs=4)
+        assert serial[0] == parallel[0]
+        assert serial[2] == parallel[2]
+        assert list(serial[3]) == list(parallel[3])
+        assert list(serial[4]) == list(parallel[4])
+
+
+def test_preprocess_cache_is_shared_across_models_and_bounded(tmp_path):
+    from training.cache import PreprocessCache, dataset_digest
+    from training.train import cross_validate
+
+    df = make_noisy_features_df()
+    X, y, groups, cat_cols, num_cols, _ = prepare_dataset(df, group_col="specimen_id")
+    cache = PreprocessCache(tmp_path / "cache")
+
+    for model in ("rf", "gbt", "logreg"):
+        plain = cross_validate(X, y, groups, model, cat_cols, num_cols, cv_folds=3, seed=5)
+        cached = cross_validate(X, y, groups, model, cat_cols, num_cols, cv_folds=3, seed=5, cache=cache)
+        assert plain[2] == cached[2]
+        assert list(plain[4]) == list(cached[4])
+    # rf and gbt share the passthrough preprocessing; logreg adds scaled entries.
+    entries = sorted(cache.root.glob("*.joblib"))
+    assert len(entries) == 6
+
+    rerun = cross_validate(X, y, groups, "rf", cat_cols, num_cols, cv_folds=3, seed=5, cache=cache, jobs=3)
+    assert rerun[2] == cross_validate(X, y, groups, "rf", cat_cols, num_cols, cv_folds=3, seed=5)[2]
+    assert sorted(cache.root.glob("*.joblib")) == entries
+
+    changed = X.copy()
+    changed.loc[0, "gas_mean"] += 1.0
+    assert dataset_digest(changed, y, groups) != dataset_digest(X, y, groups)
+
+    newest = max(entries, key=lambda path: path.stat().st_mtime_ns)
+    cache.max_bytes = newest.stat().st_size
+    cache.evict(keep=newest.stem)
+    assert [path.name for path in cache.root.glob("*.joblib")] == [newest.name]
+
+
+def test_run_training_with_cache_reuses_entries(tmp_path):
+    import json
+
+    import joblib
+
+    from training.train import main as train_main
+
+    features = tmp_path / "prepared" / "features.parquet"
+    features.parent.mkdir()
+    make_noisy_features_df().to_parquet(features, index=False)
+    args = ["--in", str(features), "--model", "rf", "--cv-folds", "3", "--cache-dir", str(tmp_path / "cache")]
+
+    assert train_main(args + ["--out", str(tmp_path / "first")]) == 0
+    entries = sorted((tmp_path / "cache").glob("*.joblib"))
+    assert len(entries) == 4  # three folds plus the full training set
+    assert train_main(args + ["--out", str(tmp_path / "second")]) == 0
+    assert sorted((tmp_path / "cache").glob("*.joblib")) == entries
+
+    first = json.loads((tmp_path / "first" / "metrics.json").read_text())
+    second = json.loads((tmp_path / "second" / "metrics.json").read_text())
+    assert first["folds"] == second["folds"]
+    X = make_noisy_features_df()
+    model_a = joblib.load(tmp_path / "first" / "model.joblib")
+    model_b = joblib.load(tmp_path / "second" / "model.joblib")
+    np.testing.assert_array_equal(model_a.predict_proba(X), model_b.predict_proba(X))
+
+
+def test_search_halves_candidates_and_writes_leaderboard(tmp_path):
+    import json
+
+    from training.search import SEARCH_SPACES, run_search
+    from training.train import main as train_main
+
+    df = make_noisy_features_df(specimens=6, windows=20)
+    X, y, groups, cat_cols, num_cols, _ = prepare_dataset(df, group_col="specimen_id")
+    space = {"model__C": [0.01, 0.1, 1.0, 10.0], "model__class_weight": [None, "balanced"]}
+    params, board = run_search(X, y, groups, "logreg", cat_cols, num_cols, cv_folds=3, seed=1, factor=2, space=space)
+    assert set(params) == {"C", "class_weight"}
+    assert board["iter"].max() >= 1
+    # Each round keeps at most half of the candidates and gives them more rows.
+    per_round = board.groupby("iter").agg(candidates=("params", "size"), rows=("n_resources", "first"))
+    assert per_round["candidates"].is_monotonic_decreasing
+    assert per_round["rows"].is_monotonic_increasing
+    assert json.loads(board.loc[0, "params"]) == params
+    for model, grid in SEARCH_SPACES.items():
+        defaults = build_pipeline(model, cat_cols, num_cols, seed=0).get_params()
+        assert all(defaults[key] in values for key, values in grid.items())
+
+    features = tmp_path / "prepared" / "features.parquet"
+    features.parent.mkdir()
+    df.to_parquet(features, index=False)
+    out = tmp_path / "model"
+    args = ["--in", str(features), "--out", str(out), "--model", "logreg", "--cv-folds", "3", "--search", "--jobs", "2"]
+    assert train_main(args) == 0
+    leaderboard = pd.read_csv(out / "search_leaderboard.csv")
+    assert len(leaderboard) >= len(SEARCH_SPACES["logreg"]["model__C"]) * 2
+    metrics = json.loads((out / "metrics.json").read_text())
+    assert metrics["params"] == json.loads(leaderboard.loc[0, "params"])
+
+
+def test_hgbt_uses_native_categoricals_and_loads_for_inference(tmp_path):
+    import json
+
+    from training.inference import load_model
+    from training.train import main as train_main
+
+    df = make_noisy_features_df(specimens=6, windows=40)
+    X, y, groups, cat_cols, num_cols, label_map = prepare_dataset(df, group_col="specimen_id")
+    pipeline = build_pipeline("hgbt", cat_cols, num_cols, seed=3)
+    pipeline.fit(X, y)
+    estimator = pipeline.named_steps["model"]
+    assert estimator.is_categorical_.tolist() == [True] * len(cat_cols) + [False] * len(num_cols)
+    assert not estimator.do_early_stopping_ and estimator.n_iter_ == 200
+    assert pipeline.named_steps["preprocess"].transform(X).shape[1] == len(cat_cols) + len(num_cols)
+    unseen = X.head(2).assign(meat_type="lamb")
+    assert pipeline.predict_proba(unseen).shape == (2, len(label_map))
+
+    features = tmp_path / "prepared" / "features.parquet"
+    features.parent.mkdir()
+    df.to_parquet(features, index=False)
+    out = tmp_path / "model"
+    assert train_main(["--in", str(features), "--out", str(out), "--model", "hgbt", "--cv-folds", "3", "--jobs", "2"]) == 0
+    assert json.loads((out / "metrics.json").read_text())["model"] == "hgbt"
+
+    loaded = load_model(out / "model.joblib")
+    assert loaded.model_name == "hgbt"
+    assert sorted(loaded.class_names) == ["aged", "fresh"]
+    np.testing.assert_array_equal(loaded.predict_proba(X), loaded.pipeline.predict_proba(X))
+
+
+def test_compiled_evaluator_matches_pipeline_probabilities(tmp_path):
+    import joblib
+
+    from training.compiled import COMPILED_NAME, CompiledModel
+    from training.inference import load_model
+    from training.train import main as train_main
+
+    df = make_noisy_features_df(specimens=6, windows=30)
+    df["freshness_label"] = np.where(df["gas_mean"] > 1.4, "aged", np.where(df["gas_mean"] > 1.0, "fresh", "tainted"))
+    X, y, groups, cat_cols, num_cols, _ = prepare_dataset(df, group_col="specimen_id")
+    rows = X.head(5).assign(meat_type=["beef", "pork", "lamb", "beef", "pork"]).to_dict("records")
+
+    for model in ("rf", "gbt"):
+        pipeline = build_pipeline(model, cat_cols, num_cols, seed=2, n_jobs=1).fit(X, y)
+        compiled = CompiledModel.from_pipeline(pipeline)
+        np.testing.assert_array_equal(compiled.predict_proba(X), pipeline.predict_proba(X))
+        np.testing.assert_array_equal(compiled.predict_proba(rows), pipeline.predict_proba(pd.DataFrame(rows)))
+        binary = build_pipeline(model, cat_cols, num_cols, seed=2, n_jobs=1).fit(X, y == 0)
+        np.testing.assert_array_equal(CompiledModel.from_pipeline(binary).predict_proba(X), binary.predict_proba(X))
+
+    features = tmp_path / "prepared" / "features.parquet"
+    features.parent.mkdir()
+    df.to_parquet(features, index=False)
+    out = tmp_path / "model"
+    assert train_main(["--in", str(features), "--out", str(out), "--model", "rf", "--cv-folds", "3"]) == 0
+    assert (out / COMPILED_NAME).exists()
+    loaded = load_model(out / "model.joblib")
+    assert loaded.compiled is not None
+    reference = joblib.load(out / "model.joblib").set_params(model__n_jobs=1)
+    np.testing.assert_array_equal(loaded.predict_proba(rows), reference.predict_proba(pd.DataFrame(rows)))
+
+    # A model.joblib that no longer matches the compiled arrays falls back to the pipeline.
+    joblib.dump(build_pipeline("gbt", cat_cols, num_cols, seed=2).fit(X, y), out / "model.joblib")
+    assert load_model(out / "model.joblib").compiled is None
+    assert train_main(["--in", str(features), "--out", str(out), "--model", "logreg", "--cv-folds", "3"]) == 0
+    assert not (out / COMPILED_NAME).exists()
+
+
+def test_streaming_training_matches_group_folds_and_fold_scalers(tmp_path):
+    import json
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from sklearn.preprocessing import StandardScaler
+
+    from training.inference import load_model
+    from training.stream import assign_group_folds, scan_features
+    from training.train import main as train_main
+
+    df = make_noisy_features_df(specimens=7, windows=30)
+    df = df.iloc[np.random.default_rng(0).permutation(len(df))].reset_index(drop=True)
+    features = tmp_path / "prepared" / "features.parquet"
+    features.parent.mkdir()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), features, row_group_size=25)
+
+    scan = scan_features(features, "specimen_id", batch_rows=16)
+    X, y, groups, cat_cols, num_cols, label_map = prepare_dataset(df, group_col="specimen_id")
+    assert (scan.categorical_cols, scan.numeric_cols, scan.label_map) == (cat_cols, num_cols, label_map)
+    assert scan.rows == len(df)
+
+    folds = assign_group_folds(scan.group_counts, 3)
+    for k, (_, test_idx) in enumerate(GroupKFold(n_splits=3).split(X, y, groups=groups)):
+        assert {group for group, fold in folds.items() if fold == k} == set(groups[test_idx])
+
+    out = tmp_path / "model"
+    args = ["--in", str(features), "--out", str(out), "--model", "sgd", "--cv-folds", "3"]
+    assert train_main(args + ["--streaming", "--epochs", "3", "--batch-rows", "16"]) == 0
+    metrics = json.loads((out / "metrics.json").read_text())
+    assert metrics["streaming"]["rows"] == len(df)
+    assert [fold["fold"] for fold in metrics["folds"]] == [1, 2, 3]
+    assert 0.0 <= metrics["accuracy"] <= 1.0
+
+    loaded = load_model(out / "model.joblib")
+    assert loaded.model_name == "sgd"
+    scaler = loaded.pipeline.named_steps["preprocess"].named_transformers_["num"]
+    reference = StandardScaler().fit(X[num_cols])
+    np.testing.assert_allclose(scaler.mean_, reference.mean_)
+    np.testing.assert_allclose(scaler.scale_, reference.scale_)
+    assert loaded.predict_proba(X.head(3)).shape == (3, len(label_map))
+
+
+def test_update_warm_starts_and_writes_next_version(tmp_path):
+    import json
+
+    import pytest
+
+    from training.inference import load_model
+    from training.train import main as train_main
+    from training.update import main as update_main
+
+    df = make_noisy_features_df(specimens=8, windows=20)
+    old, new = df[df["specimen_id"] <= "S5"], df[df["specimen_id"] > "S5"]
+    old_path, new_path = tmp_path / "old.parquet", tmp_path / "new.parquet"
+    old.to_parquet(old_path, index=False)
+    new.to_parquet(new_path, index=False)
+
+    for model, extra in (("rf", ["--add-estimators", "10"]), ("sgd", ["--epochs", "2"])):
+        model_dir = tmp_path / "models" / model
+        assert train_main(["--in", str(old_path), "--out", str(model_dir), "--model", model, "--cv-folds", "3"]) == 0
+        args = ["--model-dir", str(model_dir), "--in", str(new_path), "--eval", str(old_path)]
+        assert update_main(args + extra) == 0
+        updated = model_dir.parent / f"{model}-v2"
+        metrics = json.loads((updated / "metrics.json").read_text())
+        assert metrics["version"] == 2
+        assert metrics["parent"] == str(model_dir)
+        assert set(metrics["before"]) == set(metrics["after"]) == {"update_data", "eval"}
+        loaded = load_model(updated / "model.joblib")
+        assert loaded.model_name == model
+        assert loaded.predict_proba(new.head(3)).shape == (3, 2)
+        if model == "rf":
+            assert len(loaded.pipeline.named_steps["model"].estimators_) == 200 + 10
+            assert loaded.compiled is not None
+
+        # Updating the update continues the version chain.
+        assert update_main(["--model-dir", str(updated), "--in", str(new_path)] + extra) == 0
+        assert json.loads((model_dir.parent / f"{model}-v3" / "metrics.json").read_text())["version"] == 3
+
+    unseen = new.assign(freshness_label="rotten")
+    unseen.to_parquet(new_path, index=False)
+    with pytest.raises(ValueError, match="rotten"):
+        update_main(["--model-dir", str(tmp_path / "models" / "rf"), "--in", str(new_path)])
+
+
+def test_update_single_specimen_replays_old_rows(tmp_path):
+    import json
+
+    import pytest
+
+    from training.train import main as train_main
+    from training.update import main as update_main
+    from training.update import sample_replay
+
+    df = make_noisy_features_df(specimens=7, windows=20)
+    old, new = df[df["specimen_id"] != "S6"], df[df["specimen_id"] == "S6"]
+    assert new["freshness_label"].nunique() == 1
+    old_path, new_path = tmp_path / "old.parquet", tmp_path / "new.parquet"
+    old.to_parquet(old_path, index=False)
+    new.to_parquet(new_path, index=False)
+
+    replay = sample_replay(old, rows=10, seed=0)
+    assert set(replay["freshness_label"]) == set(old["freshness_label"])
+    assert abs(len(replay) - 10) <= 1
+
+    for model in ("rf", "gbt", "hgbt"):
+        model_dir = tmp_path / "models" / model
+        assert train_main(["--in", str(old_path), "--out", str(model_dir), "--model", model, "--cv-folds", "3"]) == 0
+        args = ["--model-dir", str(model_dir), "--in", str(new_path), "--add-estimators", "10"]
+        with pytest.raises(ValueError, match="--replay"):
+            update_main(args)
+        assert update_main(args + ["--replay", str(old_path)]) == 0
+        metrics = json.loads((model_dir.parent / f"{model}-v2" / "metrics.json").read_text())
+        assert metrics["update"]["replayed_windows"] == pytest.approx(len(new), abs=1)
+        assert metrics["after"]["update_data"]["accuracy"] >= metrics["before"]["update_data"]["accuracy"]
+        # v2 exists, so a second update of the v1 model is written and recorded as v3.
+        assert update_main(args + ["--replay", str(old_path)]) == 0
+        assert json.loads((model_dir.parent / f"{model}-v3" / "metrics.json").read_text())["version"] == 3
@@ -3,50 +3,119 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
 from sklearn.model_selection import GroupKFold
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
 
+from .cache import DEFAULT_MAX_BYTES, PreprocessCache, dataset_digest
+from .compiled import export_compiled
 from .plots import save_confusion_matrix, save_feature_importances
 from .utils import load_features, prepare_dataset, update_split_metadata
 
 LOGGER = logging.getLogger("training")
 
+MODEL_CHOICES = ["logreg", "rf", "gbt", "hgbt", "sgd"]
+# Models with partial_fit, usable with --streaming.
+STREAMING_MODELS = ["sgd"]
+
 
 def parse_args(args: List[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Train meat freshness classifiers.")
     parser.add_argument("--in", dest="input_path", type=Path, required=True, help="Path to features.parquet")
     parser.add_argument("--out", dest="output_dir", type=Path, required=True, help="Directory for trained model.")
     parser.add_argument("--group-col", type=str, default="specimen_id", help="Grouping column for CV.")
-    parser.add_argument("--model", choices=["logreg", "rf", "gbt"], default="rf", help="Model type.")
+    parser.add_argument("--model", choices=MODEL_CHOICES, default="rf", help="Model type.")
     parser.add_argument("--cv-folds", type=int, default=5, help="Number of GroupKFold splits.")
     parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="CPU budget shared by parallel folds and the estimator (0 = all cores; default: serial folds).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Reuse fitted preprocessors and transformed fold matrices stored here across runs and models.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        help="Size bound of --cache-dir; least recently used entries are evicted (default: 1024).",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Tune the model with successive halving on grouped CV before training (see training.search).",
+    )
+    parser.add_argument("--search-factor", type=int, default=3, help="Candidates kept per halving round: 1/factor.")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Train out of core, one Parquet row group at a time (requires --model sgd; see training.stream).",
+    )
+    parser.add_argument("--epochs", type=int, default=5, help="Passes over the data in --streaming mode.")
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="Rows per partial_fit batch in --streaming mode.")
     return parser.parse_args(args)
 
 
-def build_preprocess(categorical_cols: List[str], numeric_cols: List[str], model_name: str) -> ColumnTransformer:
+def preprocess_config(model_name: str) -> Dict[str, str]:
+    """How ``build_preprocess`` treats each column kind for ``model_name``; part of the cache key."""
+    return {
+        # Histogram boosting splits on category codes natively.
+        "categorical": "ordinal" if model_name == "hgbt" else "onehot",
+        "numeric": "standard" if model_name in ("logreg", "sgd") else "passthrough",
+    }
+
+
+def build_preprocess(
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    model_name: str,
+    categories: Optional[List[List[str]]] = None,
+) -> ColumnTransformer:
+    """Column preprocessing for ``model_name``; ``categories`` fixes the known values per categorical column."""
+    config = preprocess_config(model_name)
     transformers = []
-    if categorical_cols:
+    if categorical_cols and config["categorical"] == "ordinal":
+        # Unseen categories become NaN, which the model routes like a missing value.
+        transformers.append(
+            (
+                "cat",
+                OrdinalEncoder(
+                    categories=categories or "auto", handle_unknown="use_encoded_value", unknown_value=np.nan
+                ),
+                categorical_cols,
+            )
+        )
+    elif categorical_cols:
         transformers.append(
             (
                 "cat",
-                OneHotEncoder(handle_unknown="ignore", sparse_output=False),
+                OneHotEncoder(categories=categories or "auto", handle_unknown="ignore", sparse_output=False),
                 categorical_cols,
             )
         )
     if numeric_cols:
-        if model_name == "logreg":
+        if config["numeric"] == "standard":
             transformers.append(("num", StandardScaler(), numeric_cols))
         else:
             transformers.append(("num", "passthrough", numeric_cols))
@@ -55,69 +124,374 @@ def build_preprocess(categorical_cols: List[str], numeric_cols: List[str], model
     return ColumnTransformer(transformers=transformers, sparse_threshold=0.0)
 
 
-def build_pipeline(model_name: str, categorical_cols: List[str], numeric_cols: List[str], seed: int) -> Pipeline:
-    preprocess = build_preprocess(categorical_cols, numeric_cols, model_name)
+def build_estimator(
+    model_name: str,
+    seed: int,
+    n_jobs: int = -1,
+    params: Optional[Dict[str, object]] = None,
+    categorical_count: int = 0,
+):
+    """Unfitted estimator for ``model_name``.
+
+    ``categorical_count`` is the number of leading ordinal-encoded columns that
+    ``build_preprocess`` emits for ``hgbt``.
+    """
     if model_name == "logreg":
         estimator = LogisticRegression(max_iter=1000, solver="lbfgs")
     elif model_name == "rf":
-        estimator = RandomForestClassifier(n_estimators=200, random_state=seed, n_jobs=-1)
+        estimator = RandomForestClassifier(n_estimators=200, random_state=seed, n_jobs=n_jobs)
     elif model_name == "gbt":
         estimator = GradientBoostingClassifier(random_state=seed)
+    elif model_name == "sgd":
+        # Logistic loss so that predict_proba is available; fits incrementally with partial_fit.
+        estimator = SGDClassifier(loss="log_loss", random_state=seed, n_jobs=n_jobs)
+    elif model_name == "hgbt":
+        # No built-in early stopping: its validation split is drawn by row, so windows of the
+        # same specimen land on both sides and the leaked score keeps improving. The iteration
+        # count is fixed instead, and --search tunes it on grouped folds.
+        estimator = HistGradientBoostingClassifier(
+            max_iter=200,
+            early_stopping=False,
+            categorical_features=list(range(categorical_count)) or None,
+            random_state=seed,
+        )
     else:  # pragma: no cover - guarded by argparse choices
         raise ValueError(f"Unsupported model type: {model_name}")
+    if params:
+        estimator.set_params(**params)
+    return estimator
+
+
+def build_pipeline(
+    model_name: str,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    seed: int,
+    n_jobs: int = -1,
+    params: Optional[Dict[str, object]] = None,
+) -> Pipeline:
     return Pipeline(
         steps=[
-            ("preprocess", preprocess),
-            ("model", estimator),
+            ("preprocess", build_preprocess(categorical_cols, numeric_cols, model_name)),
+            (
+                "model",
+                build_estimator(model_name, seed, n_jobs=n_jobs, params=params, categorical_count=len(categorical_cols)),
+            ),
         ]
     )
 
 
+def thread_limit(model_name: str, n_jobs: int):
+    """Context capping the OpenMP threads of ``hgbt``, which has no ``n_jobs`` parameter."""
+    if model_name == "hgbt" and n_jobs > 0:
+        return threadpool_limits(limits=n_jobs, user_api="openmp")
+    return nullcontext()
+
+
+def cached_preprocess(
+    cache: PreprocessCache,
+    data_digest: str,
+    fold: str,
+    model_name: str,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    train: Callable[[], pd.DataFrame],
+    test: Optional[Callable[[], pd.DataFrame]] = None,
+) -> Dict[str, object]:
+    """Fitted preprocessor plus transformed train/test matrices, from ``cache`` when possible.
+
+    ``train`` and ``test`` build the input frames and are only called on a miss.
+    """
+    config = dict(preprocess_config(model_name), categorical_cols=categorical_cols, numeric_cols=numeric_cols)
+    key = cache.key(data_digest, fold, config)
+    entry = cache.get(key)
+    if entry is None:
+        preprocess = build_preprocess(categorical_cols, numeric_cols, model_name)
+        entry = {
+            "preprocess": preprocess,
+            "train": preprocess.fit_transform(train()),
+            "test": preprocess.transform(test()) if test is not None else None,
+        }
+        cache.put(key, entry)
+    return entry
+
+
+@dataclass
+class FoldData:
+    """One GroupKFold split with its train/test rows gathered into contiguous arrays."""
+
+    fold: int
+    numeric_cols: List[str]
+    categorical_cols: List[str]
+    train_numeric: np.ndarray
+    train_categorical: np.ndarray
+    y_train: np.ndarray
+    test_numeric: np.ndarray
+    test_categorical: np.ndarray
+    y_test: np.ndarray
+
+    def _frame(self, numeric: np.ndarray, categorical: np.ndarray) -> pd.DataFrame:
+        # The Fortran-ordered matrix becomes the frame's float block without a copy.
+        frame = pd.DataFrame(numeric, columns=self.numeric_cols, copy=False)
+        for idx, col in enumerate(self.categorical_cols):
+            frame.insert(idx, col, categorical[:, idx])
+        return frame
+
+    def train_frame(self) -> pd.DataFrame:
+        return self._frame(self.train_numeric, self.train_categorical)
+
+    def test_frame(self) -> pd.DataFrame:
+        return self._frame(self.test_numeric, self.test_categorical)
+
+
+def precompute_folds(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    groups: np.ndarray,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    cv_folds: int,
+) -> List[FoldData]:
+    """Split once and gather every fold's rows, so fold workers never re-slice ``X``.
+
+    The numeric columns become one Fortran-ordered float64 matrix per side, which
+    :meth:`FoldData.train_frame` wraps without copying; the categorical columns stay
+    an object matrix.
+    """
+    numeric = X[numeric_cols].to_numpy(dtype=np.float64)
+    categorical = X[categorical_cols].astype(object).to_numpy()
+    y = np.ascontiguousarray(y)
+    folds = []
+    gkf = GroupKFold(n_splits=cv_folds)
+    for fold_idx, (train_idx, test_idx) in enumerate(gkf.split(X, y, groups=groups), start=1):
+        folds.append(
+            FoldData(
+                fold=fold_idx,
+                numeric_cols=list(numeric_cols),
+                categorical_cols=list(categorical_cols),
+                train_numeric=np.asfortranarray(numeric[train_idx]),
+                train_categorical=categorical[train_idx],
+                y_train=y[train_idx],
+                test_numeric=np.asfortranarray(numeric[test_idx]),
+                test_categorical=categorical[test_idx],
+                y_test=y[test_idx],
+            )
+        )
+    return folds
+
+
+def split_cpu_budget(jobs: int, n_folds: int) -> Tuple[int, int]:
+    """Divide ``jobs`` CPUs into (fold worker processes, estimator ``n_jobs`` per fold)."""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    fold_workers = max(1, min(jobs, n_folds))
+    return fold_workers, max(1, jobs // fold_workers)
+
+
+def _fit_fold(
+    fold: FoldData,
+    model_name: str,
+    seed: int,
+    n_jobs: int,
+    cache: Optional[PreprocessCache] = None,
+    data_digest: Optional[str] = None,
+    n_folds: int = 0,
+    params: Optional[Dict[str, object]] = None,
+) -> np.ndarray:
+    if cache is None or data_digest is None:
+        pipeline = build_pipeline(
+            model_name, fold.categorical_cols, fold.numeric_cols, seed=seed + fold.fold, n_jobs=n_jobs, params=params
+        )
+        with thread_limit(model_name, n_jobs):
+            pipeline.fit(fold.train_frame(), fold.y_train)
+            return pipeline.predict(fold.test_frame())
+    entry = cached_preprocess(
+        cache,
+        data_digest,
+        f"{fold.fold}/{n_folds}",
+        model_name,
+        fold.categorical_cols,
+        fold.numeric_cols,
+        train=fold.train_frame,
+        test=fold.test_frame,
+    )
+    estimator = build_estimator(
+        model_name, seed + fold.fold, n_jobs=n_jobs, params=params, categorical_count=len(fold.categorical_cols)
+    )
+    with thread_limit(model_name, n_jobs):
+        estimator.fit(entry["train"], fold.y_train)
+        return estimator.predict(entry["test"])
+
+
+def cross_validate(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    groups: np.ndarray,
+    model_name: str,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+    cv_folds: int,
+    seed: int,
+    jobs: Optional[int] = None,
+    cache: Optional[PreprocessCache] = None,
+    data_digest: Optional[str] = None,
+    params: Optional[Dict[str, object]] = None,
+) -> Tuple[float, float, List[Dict[str, float]], List[int], List[int]]:
+    """Grouped K-fold CV; returns overall accuracy, macro F1, per-fold metrics and pooled predictions.
+
+    With ``jobs`` left at ``None`` the folds are fitted one after another and the
+    estimator uses every core. Otherwise ``jobs`` CPUs (``0`` = all) are split by
+    :func:`split_cpu_budget` between fold worker processes and the estimator. The
+    pooled predictions are in fold order either way.
+
+    With a ``cache``, each fold's fitted preprocessor and transformed matrices are
+    looked up by ``data_digest`` (computed when omitted), fold and preprocessing
+    configuration before anything is fitted. ``params`` override the estimator's
+    defaults (e.g. the winner of ``training.search``).
+    """
+    folds = precompute_folds(X, y, groups, categorical_cols, numeric_cols, cv_folds)
+    if cache is not None and data_digest is None:
+        data_digest = dataset_digest(X, y, groups)
+    if jobs is None:
+        fold_workers, n_jobs = 1, -1
+    else:
+        fold_workers, n_jobs = split_cpu_budget(jobs, len(folds))
+
+    if fold_workers <= 1:
+        predictions = []
+        for fold in folds:
+            LOGGER.info("Fold %s/%s", fold.fold, cv_folds)
+            predictions.append(_fit_fold(fold, model_name, seed, n_jobs, cache, data_digest, len(folds), params))
+    else:
+        LOGGER.info("Fitting %s folds in %s processes (n_jobs=%s each)", len(folds), fold_workers, n_jobs)
+        with ProcessPoolExecutor(max_workers=fold_workers) as pool:
+            predictions = list(
+                pool.map(
+                    _fit_fold,
+                    folds,
+                    [model_name] * len(folds),
+                    [seed] * len(folds),
+                    [n_jobs] * len(folds),
+                    [cache] * len(folds),
+                    [data_digest] * len(folds),
+                    [len(folds)] * len(folds),
+                    [params] * len(folds),
+                )
+            )
+
+    y_true: List[int] = []
+    y_pred: List[int] = []
+    fold_metrics = []
+    for fold, preds in zip(folds, predictions):
+        acc = accuracy_score(fold.y_test, preds)
+        f1 = f1_score(fold.y_test, preds, average="macro")
+        fold_metrics.append({"fold": fold.fold, "accuracy": acc, "macro_f1": f1})
+        y_true.extend(fold.y_test)
+        y_pred.extend(preds)
+
+    overall_accuracy = accuracy_score(y_true, y_pred)
+    overall_f1 = f1_score(y_true, y_pred, average="macro")
+    return overall_accuracy, overall_f1, fold_metrics, y_true, y_pred
+
+
 def run_training(ns: argparse.Namespace) -> int:
     logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
     features_path: Path = ns.input_path
     output_dir: Path = ns.output_dir
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    if ns.streaming:
+        from .stream import run_streaming
+
+        return run_streaming(ns)
+
     features_df = load_features(features_path)
     X, y, groups, categorical_cols, numeric_cols, label_map = prepare_dataset(features_df, group_col=ns.group_col)
 
     if len(np.unique(groups)) < ns.cv_folds:
         raise ValueError("Number of groups is smaller than cv-folds.")
 
-    gkf = GroupKFold(n_splits=ns.cv_folds)
-
-    y_true: List[int] = []
-    y_pred: List[int] = []
-    fold_metrics = []
-
-    for fold_idx, (train_idx, test_idx) in enumerate(gkf.split(X, y, groups=groups), start=1):
-        LOGGER.info("Fold %s/%s", fold_idx, ns.cv_folds)
-        pipeline = build_pipeline(ns.model, categorical_cols, numeric_cols, seed=ns.seed + fold_idx)
-        pipeline.fit(X.iloc[train_idx], y[train_idx])
-        preds = pipeline.predict(X.iloc[test_idx])
-        acc = accuracy_score(y[test_idx], preds)
-        f1 = f1_score(y[test_idx], preds, average="macro")
-        fold_metrics.append({"fold": fold_idx, "accuracy": acc, "macro_f1": f1})
-        y_true.extend(y[test_idx])
-        y_pred.extend(preds)
-
-    overall_accuracy = accuracy_score(y_true, y_pred)
-    overall_f1 = f1_score(y_true, y_pred, average="macro")
+    cache: Optional[PreprocessCache] = None
+    data_digest: Optional[str] = None
+    if ns.cache_dir is not None:
+        cache = PreprocessCache(ns.cache_dir, max_bytes=max(0, ns.cache_max_mb) << 20)
+        data_digest = dataset_digest(X, y, groups)
+
+    params: Dict[str, object] = {}
+    if ns.search:
+        from .search import run_search
+
+        params, board = run_search(
+            X,
+            y,
+            groups,
+            ns.model,
+            categorical_cols,
+            numeric_cols,
+            cv_folds=ns.cv_folds,
+            seed=ns.seed,
+            jobs=ns.jobs,
+            factor=ns.search_factor,
+        )
+        board.to_csv(output_dir / "search_leaderboard.csv", index=False)
+        LOGGER.info("Wrote search leaderboard to %s", output_dir / "search_leaderboard.csv")
+
+    overall_accuracy, overall_f1, fold_metrics, y_true, y_pred = cross_validate(
+        X,
+        y,
+        groups,
+        ns.model,
+        categorical_cols,
+        numeric_cols,
+        cv_folds=ns.cv_folds,
+        seed=ns.seed,
+        jobs=ns.jobs,
+        cache=cache,
+        data_digest=data_digest,
+        params=params,
+    )
 
     LOGGER.info("CV accuracy=%.3f macro_f1=%.3f", overall_accuracy, overall_f1)
 
-    final_pipeline = build_pipeline(ns.model, categorical_cols, numeric_cols, seed=ns.seed)
-    final_pipeline.fit(X, y)
+    final_jobs = -1 if ns.jobs is None or ns.jobs <= 0 else ns.jobs
+    if cache is None or data_digest is None:
+        final_pipeline = build_pipeline(
+            ns.model, categorical_cols, numeric_cols, seed=ns.seed, n_jobs=final_jobs, params=params
+        )
+        with thread_limit(ns.model, final_jobs):
+            final_pipeline.fit(X, y)
+    else:
+        entry = cached_preprocess(cache, data_digest, "all", ns.model, categorical_cols, numeric_cols, train=lambda: X)
+        estimator = build_estimator(
+            ns.model, ns.seed, n_jobs=final_jobs, params=params, categorical_count=len(categorical_cols)
+        )
+        with thread_limit(ns.model, final_jobs):
+            estimator.fit(entry["train"], y)
+        final_pipeline = Pipeline(steps=[("preprocess", entry["preprocess"]), ("model", estimator)])
 
-    feature_names = list(get_feature_names(final_pipeline))
     metrics_payload = {
         "model": ns.model,
+        "params": params,
         "timestamp_utc": datetime.utcnow().isoformat(),
         "accuracy": overall_accuracy,
         "macro_f1": overall_f1,
         "folds": fold_metrics,
     }
+    cm = confusion_matrix(y_true, y_pred, labels=list(range(len(label_map))))
+    save_artifacts(ns, final_pipeline, metrics_payload, label_map, cm)
+    return 0
+
+
+def save_artifacts(
+    ns: argparse.Namespace,
+    final_pipeline: Pipeline,
+    metrics_payload: Dict[str, object],
+    label_map: Dict[str, int],
+    cm: np.ndarray,
+) -> None:
+    """Write the model folder (model, metrics, feature list, label map, reports) and update split.json."""
+    output_dir: Path = ns.output_dir
+    feature_names = list(get_feature_names(final_pipeline))
     metrics_path = output_dir / "metrics.json"
     metrics_path.write_text(json.dumps(metrics_payload, indent=2), encoding="utf-8")
 
@@ -129,10 +503,10 @@ def run_training(ns: argparse.Namespace) -> int:
 
     model_path = output_dir / "model.joblib"
     joblib.dump(final_pipeline, model_path)
+    export_compiled(model_path, pipeline=final_pipeline)
 
     report_dir = output_dir / "reports"
     report_dir.mkdir(parents=True, exist_ok=True)
-    cm = confusion_matrix(y_true, y_pred, labels=list(range(len(label_map))))
     class_labels = [label for label, _ in sorted(label_map.items(), key=lambda kv: kv[1])]
     save_confusion_matrix(report_dir / "confusion_matrix.png", cm, class_labels)
 
@@ -141,7 +515,7 @@ def run_training(ns: argparse.Namespace) -> int:
         importances = model_step.feature_importances_
         save_feature_importances(report_dir / "feature_importances.png", feature_names, importances)
 
-    prepared_root = features_path.parent
+    prepared_root = ns.input_path.parent
     update_split_metadata(
         prepared_root,
         {
@@ -152,7 +526,6 @@ def run_training(ns: argparse.Namespace) -> int:
     )
 
     LOGGER.info("Saved model artifacts to %s", output_dir)
-    return 0
 
 
 def get_feature_names(pipeline: Pipeline) -> List[str]:
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from dataprep.features import FeatureConfig
+from dataprep.io import discover_run_dirs
+from dataprep.windows import DEFAULT_FEATURE_CONFIG, RunPrefix, load_run_prefix
+
+from .train import MODEL_CHOICES, cross_validate
+from .utils import prepare_dataset
+
+LOGGER = logging.getLogger("training")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Grid-search FeatureConfig window/stride/baseline against grouped cross-validation."
+    )
+    parser.add_argument("--data-root", type=Path, default=Path("data"), help="Run directories (raw.csv + metadata.json).")
+    parser.add_argument("--out", type=Path, required=True, help="Directory for tuning.csv and tuning.json.")
+    parser.add_argument("--window-sec", type=_int_list, default=[120, 300, 600], help="Comma-separated window lengths.")
+    parser.add_argument("--stride-sec", type=_int_list, default=[30, 60], help="Comma-separated strides.")
+    parser.add_argument("--baseline-sec", type=_int_list, default=[30, 60], help="Comma-separated baseline lengths.")
+    parser.add_argument("--sample-rate-hz", type=float, default=DEFAULT_FEATURE_CONFIG.sample_rate_hz)
+    parser.add_argument("--max-gap-sec", type=float, default=3.0)
+    parser.add_argument("--group-col", type=str, default="specimen_id", help="Grouping column for CV.")
+    parser.add_argument("--model", choices=MODEL_CHOICES, default="rf", help="Model type.")
+    parser.add_argument("--cv-folds", type=int, default=5, help="Number of GroupKFold splits.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes used to load and resample runs.")
+    return parser.parse_args(args)
+
+
+def load_prefixes(
+    run_dirs: Sequence[Path],
+    sample_rate_hz: float,
+    max_gap_sec: float,
+    jobs: int = 1,
+) -> List[RunPrefix]:
+    """Resample every run once and build its prefix sums."""
+    rates = [sample_rate_hz] * len(run_dirs)
+    gaps = [max_gap_sec] * len(run_dirs)
+    if jobs <= 1:
+        return list(map(load_run_prefix, run_dirs, rates, gaps))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(load_run_prefix, run_dirs, rates, gaps))
+
+
+def evaluate_config(
+    prefixes: Sequence[RunPrefix],
+    config: FeatureConfig,
+    model_name: str,
+    group_col: str,
+    cv_folds: int,
+    seed: int,
+) -> Dict[str, object]:
+    frames = [frame for frame in (prefix.features(config) for prefix in prefixes) if not frame.empty]
+    result: Dict[str, object] = {
+        "window_sec": config.window_sec,
+        "stride_sec": config.stride_sec,
+        "baseline_sec": config.baseline_sec,
+        # The detector emits its first prediction once the first window is full.
+        "time_to_first_prediction_s": config.window_sec,
+        "windows": int(sum(len(frame) for frame in frames)),
+        "accuracy": float("nan"),
+        "macro_f1": float("nan"),
+    }
+    if not frames:
+        LOGGER.warning("No windows for %s; runs are shorter than the window", config)
+        return result
+    features = pd.concat(frames, ignore_index=True)
+    X, y, groups, categorical_cols, numeric_cols, _ = prepare_dataset(features, group_col=group_col)
+    if len(np.unique(groups)) < cv_folds or len(np.unique(y)) < 2:
+        LOGGER.warning("Skipping %s: not enough groups or classes for %s-fold CV", config, cv_folds)
+        return result
+    accuracy, macro_f1, _, _, _ = cross_validate(
+        X, y, groups, model_name, categorical_cols, numeric_cols, cv_folds=cv_folds, seed=seed
+    )
+    result["accuracy"] = float(accuracy)
+    result["macro_f1"] = float(macro_f1)
+    return result
+
+
+def mark_pareto(results: pd.DataFrame) -> pd.Series:
+    """Flag configurations no other one beats on both accuracy and time to first prediction."""
+    flags = []
+    for _, row in results.iterrows():
+        dominated = (
+            (results["accuracy"] >= row["accuracy"])
+            & (results["time_to_first_prediction_s"] <= row["time_to_first_prediction_s"])
+            & (
+                (results["accuracy"] > row["accuracy"])
+                | (results["time_to_first_prediction_s"] < row["time_to_first_prediction_s"])
+            )
+        ).any()
+        flags.append(bool(np.isfinite(row["accuracy"]) and not dominated))
+    return pd.Series(flags, index=results.index)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    ns.out.mkdir(parents=True, exist_ok=True)
+
+    run_dirs = discover_run_dirs(ns.data_root)
+    if not run_dirs:
+        raise FileNotFoundError(f"No runs with raw.csv and metadata.json under {ns.data_root}")
+    LOGGER.info("Resampling %s runs at %s Hz", len(run_dirs), ns.sample_rate_hz)
+    prefixes = load_prefixes(run_dirs, ns.sample_rate_hz, ns.max_gap_sec, jobs=max(1, ns.jobs))
+
+    rows = []
+    grid = list(itertools.product(ns.window_sec, ns.stride_sec, ns.baseline_sec))
+    for idx, (window_sec, stride_sec, baseline_sec) in enumerate(grid, start=1):
+        config = FeatureConfig(
+            window_sec=window_sec,
+            stride_sec=stride_sec,
+            baseline_sec=baseline_sec,
+            sample_rate_hz=ns.sample_rate_hz,
+        )
+        LOGGER.info("Config %s/%s: window=%ss stride=%ss baseline=%ss", idx, len(grid), window_sec, stride_sec, baseline_sec)
+        rows.append(evaluate_config(prefixes, config, ns.model, ns.group_col, ns.cv_folds, ns.seed))
+
+    results = pd.DataFrame(rows)
+    results["pareto"] = mark_pareto(results)
+    results = results.sort_values(["accuracy", "time_to_first_prediction_s"], ascending=[False, True], na_position="last")
+    results.to_csv(ns.out / "tuning.csv", index=False)
+    payload = {
+        "model": ns.model,
+        "group_column": ns.group_col,
+        "cv_folds": ns.cv_folds,
+        "seed": ns.seed,
+        "sample_rate_hz": ns.sample_rate_hz,
+        "results": json.loads(results.to_json(orient="records")),
+    }
+    (ns.out / "tuning.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    for row in results.itertuples():
+        LOGGER.info(
+            "window=%4ss stride=%3ss baseline=%3ss first_prediction=%4ss accuracy=%.3f macro_f1=%.3f%s",
+            row.window_sec,
+            row.stride_sec,
+            row.baseline_sec,
+            row.time_to_first_prediction_s,
+            row.accuracy,
+            row.macro_f1,
+            "  *pareto" if row.pareto else "",
+        )
+    LOGGER.info("Wrote tuning results to %s", ns.out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
+
+from dataprep.manifest import file_digest
+
+from .inference import ESTIMATOR_NAMES
+from .train import save_artifacts
+from .utils import load_features
+
+LOGGER = logging.getLogger("training")
+
+# Parameter a warm start raises, and how many trees/stages the fitted model already has.
+WARM_START_PARAMS = {
+    "rf": ("n_estimators", lambda estimator: len(estimator.estimators_)),
+    "gbt": ("n_estimators", lambda estimator: int(estimator.n_estimators_)),
+    "hgbt": ("max_iter", lambda estimator: int(estimator.n_iter_)),
+}
+
+
+def read_version(model_dir: Path) -> int:
+    """Version recorded in ``metrics.json`` (1 for a model from a full training run)."""
+    metrics_path = model_dir / "metrics.json"
+    if not metrics_path.exists():
+        return 1
+    return int(json.loads(metrics_path.read_text(encoding="utf-8")).get("version", 1))
+
+
+def next_version_dir(model_dir: Path, version: int) -> Tuple[Path, int]:
+    """``models/exp`` -> ``models/exp-v2`` (``exp-v2`` -> ``exp-v3``), skipping existing directories.
+
+    Returns the directory and the version number it was named after.
+    """
+    base = re.sub(r"-v\d+$", "", model_dir.name)
+    candidate = model_dir.parent / f"{base}-v{version}"
+    while candidate.exists():
+        version += 1
+        candidate = model_dir.parent / f"{base}-v{version}"
+    return candidate, version
+
+
+def parse_args(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Update a trained sklearn model with newly prepared runs instead of retraining from scratch."
+    )
+    parser.add_argument("--model-dir", type=Path, required=True, help="Folder with model.joblib and label_map.json.")
+    parser.add_argument("--in", dest="input_path", type=Path, required=True, help="features.parquet of the new runs.")
+    parser.add_argument("--out", dest="output_dir", type=Path, default=None, help="Default: <model-dir>-v<N+1>.")
+    parser.add_argument("--group-col", type=str, default="specimen_id", help="Grouping column recorded in split.json.")
+    parser.add_argument("--epochs", type=int, default=5, help="partial_fit passes over the new runs (sgd).")
+    parser.add_argument(
+        "--add-estimators",
+        type=int,
+        default=50,
+        help="Trees (rf) or boosting stages (gbt, hgbt) fitted on the new runs and added to the model.",
+    )
+    parser.add_argument(
+        "--replay",
+        dest="replay_path",
+        type=Path,
+        default=None,
+        help="features.parquet the model was trained on; a class-stratified sample is mixed into the update.",
+    )
+    parser.add_argument(
+        "--replay-ratio",
+        type=float,
+        default=1.0,
+        help="Replayed rows per new row (every class gets at least one).",
+    )
+    parser.add_argument("--eval", dest="eval_path", type=Path, default=None, help="Features to score before/after.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    return parser.parse_args(args)
+
+
+def encode_labels(df: pd.DataFrame, label_map: Dict[str, int]) -> np.ndarray:
+    """Labels as the model's class indices; labels the model has never seen need a full retrain."""
+    labels = df["freshness_label"].astype(str)
+    unknown = sorted(set(labels) - set(label_map))
+    if unknown:
+        raise ValueError(f"Labels {unknown} are not in the model's label_map; retrain with training.train")
+    return labels.map(label_map).to_numpy(dtype=np.int64)
+
+
+def sample_replay(replay_df: pd.DataFrame, rows: int, seed: int) -> pd.DataFrame:
+    """About ``rows`` rows of ``replay_df`` in its class proportions, with at least one row per class."""
+    if replay_df.empty:
+        return replay_df
+    share = min(1.0, rows / len(replay_df))
+    parts = [
+        frame.sample(n=min(len(frame), max(1, int(round(len(frame) * share)))), random_state=seed)
+        for _, frame in replay_df.groupby("freshness_label", sort=True)
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def score(pipeline, X: pd.DataFrame, y: np.ndarray) -> Dict[str, float]:
+    preds = pipeline.predict(X)
+    return {"accuracy": float(accuracy_score(y, preds)), "macro_f1": float(f1_score(y, preds, average="macro"))}
+
+
+def update_pipeline(
+    pipeline,
+    model_name: str,
+    X: pd.DataFrame,
+    y: np.ndarray,
+    epochs: int,
+    add_estimators: int,
+    seed: int,
+):
+    """Continue training ``pipeline``'s estimator on ``X``/``y``; the fitted preprocessing is kept as is.
+
+    ``partial_fit`` estimators (``sgd``) take ``epochs`` shuffled passes. Tree
+    ensembles are warm-started: ``add_estimators`` new trees (``rf``) or boosting
+    stages (``gbt``, ``hgbt``) are fitted on the new rows and appended.
+    """
+    estimator = pipeline.named_steps["model"]
+    Xt = pipeline.named_steps["preprocess"].transform(X)
+    if hasattr(estimator, "partial_fit"):
+        rng = np.random.default_rng(seed)
+        for _ in range(max(1, epochs)):
+            order = rng.permutation(len(y))
+            estimator.partial_fit(Xt[order], y[order], classes=estimator.classes_)
+        return pipeline
+    if model_name not in WARM_START_PARAMS:
+        raise ValueError(f"{model_name} models cannot be updated incrementally; retrain with training.train")
+    missing = sorted(set(estimator.classes_.tolist()) - set(np.unique(y).tolist()))
+    if missing:
+        # Warm-started trees are fitted against the classes present in y, which must match the model's.
+        raise ValueError(
+            f"{model_name} warm start needs every class in the update rows; missing class indices {missing}. "
+            "Pass the original features with --replay."
+        )
+    param, fitted_size = WARM_START_PARAMS[model_name]
+    current = fitted_size(estimator)
+    overrides = {"warm_start": True, param: current + max(1, add_estimators)}
+    if model_name == "hgbt":
+        # If enabled through --search/params, early stopping would compare against the first
+        # fit's validation history and stop at once.
+        overrides["early_stopping"] = False
+    restore = {key: estimator.get_params()[key] for key in overrides if key != param}
+    estimator.set_params(**overrides)
+    estimator.fit(Xt, y)
+    estimator.set_params(**restore)
+    return pipeline
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    model_path = ns.model_dir / "model.joblib"
+    pipeline = joblib.load(model_path)
+    estimator = pipeline.named_steps["model"]
+    model_name = ESTIMATOR_NAMES.get(type(estimator).__name__, type(estimator).__name__)
+    label_map: Dict[str, int] = json.loads((ns.model_dir / "label_map.json").read_text(encoding="utf-8"))
+    parent_version = read_version(ns.model_dir)
+    version = parent_version + 1
+    if ns.output_dir is None:
+        ns.output_dir, version = next_version_dir(ns.model_dir, version)
+    ns.model = model_name
+
+    columns: List[str] = list(pipeline.named_steps["preprocess"].feature_names_in_)
+    new_df = load_features(ns.input_path)
+    X_new, y_new = new_df[columns], encode_labels(new_df, label_map)
+    evaluations: List[Tuple[str, pd.DataFrame, np.ndarray]] = [("update_data", X_new, y_new)]
+    if ns.eval_path is not None:
+        eval_df = load_features(ns.eval_path)
+        evaluations.append(("eval", eval_df[columns], encode_labels(eval_df, label_map)))
+    before = {name: score(pipeline, X, y) for name, X, y in evaluations}
+
+    # New runs are often a single specimen (one label); replayed old rows keep every class in the
+    # update so warm-started trees and partial_fit steps do not drift towards the new label alone.
+    X_fit, y_fit = X_new, y_new
+    replayed = 0
+    if ns.replay_path is not None:
+        replay_df = sample_replay(load_features(ns.replay_path), int(round(len(y_new) * ns.replay_ratio)), ns.seed)
+        replayed = len(replay_df)
+        X_fit = pd.concat([X_new, replay_df[columns]], ignore_index=True)
+        y_fit = np.concatenate([y_new, encode_labels(replay_df, label_map)])
+
+    LOGGER.info(
+        "Updating %s model v%s with %s new and %s replayed windows", model_name, parent_version, len(y_new), replayed
+    )
+    update_pipeline(pipeline, model_name, X_fit, y_fit, ns.epochs, ns.add_estimators, ns.seed)
+    after = {name: score(pipeline, X, y) for name, X, y in evaluations}
+    for name in before:
+        LOGGER.info(
+            "%s: accuracy %.3f -> %.3f, macro_f1 %.3f -> %.3f",
+            name,
+            before[name]["accuracy"],
+            after[name]["accuracy"],
+            before[name]["macro_f1"],
+            after[name]["macro_f1"],
+        )
+
+    y_pred = pipeline.predict(X_new)
+    incremental = hasattr(pipeline.named_steps["model"], "partial_fit")
+    metrics_payload = {
+        "model": model_name,
+        "version": version,
+        "parent": str(ns.model_dir),
+        "parent_sha256": file_digest(model_path),
+        "update": {
+            "features": str(ns.input_path),
+            "windows": int(len(y_new)),
+            "replay": str(ns.replay_path) if ns.replay_path is not None else None,
+            "replayed_windows": int(replayed),
+            "epochs": ns.epochs if incremental else None,
+            "added_estimators": None if incremental else ns.add_estimators,
+        },
+        "timestamp_utc": datetime.utcnow().isoformat(),
+        "accuracy": after["update_data"]["accuracy"],
+        "macro_f1": after["update_data"]["macro_f1"],
+        "before": before,
+        "after": after,
+    }
+    cm = confusion_matrix(y_new, y_pred, labels=list(range(len(label_map))))
+    ns.output_dir.mkdir(parents=True, exist_ok=True)
+    save_artifacts(ns, pipeline, metrics_payload, label_map, cm)
+    LOGGER.info("Wrote updated model v%s to %s", version, ns.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from sklearn.preprocessing import LabelEncoder
 
 ID_COLUMNS = {"specimen_id", "run_id", "window_start_ms", "window_end_ms", "freshness_label"}
@@ -18,6 +20,36 @@ def load_features(path: Path) -> pd.DataFrame:
     return pd.read_parquet(path)
 
 
+def iter_feature_batches(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    batch_rows: int = 50_000,
+) -> Iterator[pd.DataFrame]:
+    """Yield ``features.parquet`` in frames of at most ``batch_rows`` rows, reading only ``columns``.
+
+    Row groups are decoded one at a time, so memory does not grow with the file.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Features parquet not found: {path}")
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_rows, columns=list(columns) if columns is not None else None):
+        yield batch.to_pandas()
+
+
+def feature_columns(schema: pa.Schema) -> Tuple[List[str], List[str]]:
+    """Categorical and numeric feature columns of a features schema, chosen like ``prepare_dataset``."""
+    names = list(schema.names)
+    categorical_cols = [col for col in CATEGORICAL_CANDIDATES if col in names]
+    numeric_cols = [
+        field.name
+        for field in schema
+        if field.name not in ID_COLUMNS
+        and field.name not in categorical_cols
+        and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_boolean(field.type))
+    ]
+    return categorical_cols, numeric_cols
+
+
 def prepare_dataset(df: pd.DataFrame, group_col: str) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, List[str], List[str], Dict[str, int]]:
     if "freshness_label" not in df.columns:
         raise ValueError("features parquet must include 'freshness_label' column")
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import fnmatch
+import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -10,27 +12,144 @@ import torch
 from sklearn.model_selection import GroupShuffleSplit
 from torch.utils.data import Dataset
 
+from dataprep.layout import list_partitions, resolve_snapshot
+
+
+SHARD_INDEX = Path("sequences") / "index.json"
+
+
+class ShardedSignals:
+    """Read-only ``(samples, steps, features)`` view over several ``.npy`` shards.
+
+    Integer, slice and index-array lookups are resolved shard by shard, so only
+    the requested rows are read from the (usually memory-mapped) shards.
+    """
+
+    ndim = 3
+
+    def __init__(self, shards: Sequence[np.ndarray]) -> None:
+        if not shards:
+            raise ValueError("ShardedSignals needs at least one shard")
+        self._shards = list(shards)
+        self._offsets = np.concatenate([[0], np.cumsum([shard.shape[0] for shard in self._shards])])
+        self.shape = (int(self._offsets[-1]),) + tuple(self._shards[0].shape[1:])
+        self.dtype = self._shards[0].dtype
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray, Sequence[int]]) -> np.ndarray:
+        if isinstance(key, (int, np.integer)):
+            row = int(key) + (self.shape[0] if key < 0 else 0)
+            if not 0 <= row < self.shape[0]:
+                raise IndexError(f"index {key} is out of bounds for {self.shape[0]} samples")
+            shard = int(np.searchsorted(self._offsets, row, side="right")) - 1
+            return self._shards[shard][row - self._offsets[shard]]
+        if isinstance(key, slice):
+            rows = np.arange(self.shape[0])[key]
+        else:
+            rows = np.asarray(key)
+            if rows.dtype == bool:
+                rows = np.flatnonzero(rows)
+            rows = np.where(rows < 0, rows + self.shape[0], rows).astype(np.int64)
+        out = np.empty((rows.shape[0],) + self.shape[1:], dtype=self.dtype)
+        shard_ids = np.searchsorted(self._offsets, rows, side="right") - 1
+        for shard in np.unique(shard_ids):
+            mask = shard_ids == shard
+            out[mask] = self._shards[shard][rows[mask] - self._offsets[shard]]
+        return out
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy: Optional[bool] = None) -> np.ndarray:
+        full = np.concatenate(self._shards, axis=0)
+        return full if dtype is None else full.astype(dtype)
+
+
+Signals = Union[np.ndarray, ShardedSignals]
+
 
 @dataclass
 class PreparedDataset:
-    signals: np.ndarray
+    signals: Signals
     labels: np.ndarray
     feature_names: Tuple[str, ...]
     label_map: Dict[str, int]
     metadata: pd.DataFrame
 
 
-def load_prepared_dir(prepared_dir: Path) -> PreparedDataset:
+def _load_sharded_signals(prepared_dir: Path, mmap: bool) -> Tuple[Signals, np.ndarray, Tuple[str, ...]]:
+    index_path = prepared_dir / SHARD_INDEX
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    shard_dir = index_path.parent
+    mmap_mode = "r" if mmap else None
+    shards: List[np.ndarray] = [np.load(shard_dir / entry["file"], mmap_mode=mmap_mode) for entry in index["shards"]]
+    feature_names = tuple(index["feature_names"])
+    if not shards:
+        signals: Signals = np.zeros((0, index["steps_per_cycle"], len(feature_names)), dtype=np.float32)
+    elif len(shards) == 1:
+        signals = shards[0]
+    else:
+        signals = ShardedSignals(shards)
+    labels = np.load(shard_dir / "labels.npy")
+    return signals, labels, feature_names
+
+
+def resolve_partition(prepared_dir: Path, profile: Optional[str] = None) -> Path:
+    """Return the prepared directory to load for ``profile``.
+
+    ``profile`` is matched (as a glob) against each partition's profile name,
+    profile hash and key; it must select exactly one partition. Without a
+    profile, a partitioned directory is only accepted if it holds a single
+    partition. Only ``partitions.json`` is read, so other profiles' tensors are
+    never opened.
+    """
+    partitions = list_partitions(prepared_dir)
+    if not partitions:
+        if profile is not None:
+            raise ValueError(f"{prepared_dir} is not partitioned by profile; omit the profile selection")
+        return prepared_dir
+    if profile is None:
+        matches = partitions
+    else:
+        matches = [
+            entry
+            for entry in partitions
+            if any(
+                fnmatch.fnmatchcase(str(entry.get(field) or ""), profile)
+                for field in ("profile_name", "profile_hash", "key")
+            )
+        ]
+    if len(matches) != 1:
+        keys = ", ".join(str(entry["key"]) for entry in (matches or partitions))
+        if not matches:
+            raise FileNotFoundError(f"No partition in {prepared_dir} matches profile '{profile}'; available: {keys}")
+        raise ValueError(f"Select one partition of {prepared_dir} with a profile name, hash or key: {keys}")
+    return prepared_dir / str(matches[0]["dir"])
+
+
+def load_prepared_dir(prepared_dir: Path, mmap: bool = True, profile: Optional[str] = None) -> PreparedDataset:
+    """Load the tensors, index and label map written by ``dataprep.build``.
+
+    Sharded ``.npy`` output (``sequences/index.json``) is preferred and opened
+    with ``mmap_mode="r"`` unless ``mmap`` is False; otherwise the compressed
+    ``sequences.npz`` is read into memory. For a directory partitioned by
+    profile, ``profile`` selects the partition (see :func:`resolve_partition`),
+    and a directory kept up to date by ``dataprep.build --watch`` is read from
+    the snapshot its ``CURRENT`` pointer names at the time of the call.
+    """
+    prepared_dir = resolve_snapshot(resolve_partition(prepared_dir, profile))
     sequences_path = prepared_dir / "sequences.npz"
     index_path = prepared_dir / "index.csv"
     label_map_path = prepared_dir / "label_map.json"
 
-    if not sequences_path.exists():
-        raise FileNotFoundError(f"Missing sequences.npz at {sequences_path}")
-    npz = np.load(sequences_path)
-    signals = npz["signals"]
-    labels = npz["labels"]
-    feature_names = tuple(npz["feature_names"].astype(str).tolist())
+    if (prepared_dir / SHARD_INDEX).exists():
+        signals, labels, feature_names = _load_sharded_signals(prepared_dir, mmap)
+    else:
+        if not sequences_path.exists():
+            raise FileNotFoundError(f"Missing sequences.npz at {sequences_path}")
+        npz = np.load(sequences_path)
+        signals = npz["signals"]
+        labels = npz["labels"]
+        feature_names = tuple(npz["feature_names"].astype(str).tolist())
 
     if not index_path.exists():
         raise FileNotFoundError(f"Missing index.csv at {index_path}")
@@ -54,6 +173,16 @@ def load_prepared_dir(prepared_dir: Path) -> PreparedDataset:
     )
 
 
+def split_groups(dataset: PreparedDataset) -> pd.Series:
+    """Grouping used for validation splits: specimen, else sample name, else one group per row."""
+    groups = dataset.metadata.get("specimen_id")
+    if groups is None:
+        groups = dataset.metadata.get("sample_name")
+    if groups is None:
+        groups = pd.Series(range(len(dataset.labels)))
+    return groups
+
+
 def train_val_split(
     dataset: PreparedDataset,
     val_fraction: float,
@@ -62,42 +191,73 @@ def train_val_split(
     if not 0.0 < val_fraction < 1.0:
         raise ValueError("val_fraction must be in (0, 1).")
 
-    groups = dataset.metadata.get("specimen_id")
-    if groups is None:
-        groups = dataset.metadata.get("sample_name")
-    if groups is None:
-        groups = pd.Series(range(len(dataset.labels)))
+    groups = split_groups(dataset)
 
     splitter = GroupShuffleSplit(n_splits=1, test_size=val_fraction, random_state=seed)
-    train_idx, val_idx = next(splitter.split(dataset.signals, dataset.labels, groups=groups))
+    placeholder = np.zeros((len(dataset.labels), 1))  # avoid materialising memory-mapped signals
+    train_idx, val_idx = next(splitter.split(placeholder, dataset.labels, groups=groups))
     return train_idx, val_idx
 
 
 class SequenceDataset(Dataset[Tuple[torch.Tensor, torch.Tensor]]):
+    """Normalised ``(features, steps)`` tensors for the rows in ``indices``.
+
+    Rows are read from ``signals`` on access, so a memory-mapped dataset is never
+    copied into RAM as a whole.
+    """
+
     def __init__(
         self,
-        signals: np.ndarray,
+        signals: Signals,
         labels: np.ndarray,
         feature_means: np.ndarray,
         feature_stds: np.ndarray,
+        indices: Optional[np.ndarray] = None,
     ) -> None:
-        self._signals = signals.astype(np.float32)
-        self._labels = labels.astype(np.int64)
+        self._signals = signals
+        self._indices = np.arange(signals.shape[0]) if indices is None else np.asarray(indices, dtype=np.int64)
+        self._labels = np.asarray(labels, dtype=np.int64)
         self._feature_means = feature_means.astype(np.float32)
         self._feature_stds = np.where(feature_stds == 0.0, 1.0, feature_stds).astype(np.float32)
 
     def __len__(self) -> int:
-        return self._signals.shape[0]
+        return self._indices.shape[0]
 
     def __getitem__(self, idx: int) -> Tuple[torch.Tensor, torch.Tensor]:
-        window = self._signals[idx]
+        row = int(self._indices[idx])
+        window = np.asarray(self._signals[row], dtype=np.float32)
         norm = (window - self._feature_means) / self._feature_stds
         tensor = torch.from_numpy(norm).permute(1, 0)  # (features, steps)
-        label = torch.tensor(self._labels[idx], dtype=torch.int64)
+        label = torch.tensor(self._labels[row], dtype=torch.int64)
         return tensor, label
 
 
-def compute_normalisation(signals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-    feature_means = signals.mean(axis=(0, 1))
-    feature_stds = signals.std(axis=(0, 1))
-    return feature_means, feature_stds
+def compute_normalisation(
+    signals: Signals,
+    indices: Optional[np.ndarray] = None,
+    chunk_rows: int = 4096,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-feature mean and std over ``signals[indices]``, read ``chunk_rows`` at a time.
+
+    Chunk statistics are merged with Chan's parallel update, so memory stays
+    bounded by the chunk size and the result matches a single-pass computation.
+    """
+    rows = np.arange(signals.shape[0]) if indices is None else np.asarray(indices, dtype=np.int64)
+    features = signals.shape[2]
+    count = 0
+    mean = np.zeros(features, dtype=np.float64)
+    m2 = np.zeros(features, dtype=np.float64)
+    for start in range(0, rows.shape[0], chunk_rows):
+        block = np.asarray(signals[rows[start : start + chunk_rows]], dtype=np.float64).reshape(-1, features)
+        block_count = block.shape[0]
+        block_mean = block.mean(axis=0)
+        block_m2 = ((block - block_mean) ** 2).sum(axis=0)
+        delta = block_mean - mean
+        total = count + block_count
+        mean = mean + delta * (block_count / total)
+        m2 = m2 + block_m2 + delta**2 * (count * block_count / total)
+        count = total
+    if count == 0:
+        nan = np.full(features, np.nan, dtype=np.float32)
+        return nan, nan.copy()
+    return mean.astype(np.float32), np.sqrt(m2 / count).astype(np.float32)
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 
 from training_cnn.data import (
+    SequenceDataset,
+    ShardedSignals,
     compute_normalisation,
     load_prepared_dir,
     train_val_split,
@@ -55,3 +57,130 @@ def test_compute_normalisation(tmp_path):
     means, stds = compute_normalisation(dataset.signals)
     assert means.shape == (dataset.signals.shape[2],)
     assert stds.shape == means.shape
+
+
+def test_load_prepared_dir_memory_maps_npy_shards(tmp_path):
+    from dataprep.build import _write_outputs
+
+    rng = np.random.default_rng(0)
+    signals = rng.normal(loc=1000.0, scale=5.0, size=(7, 4, 5)).astype(np.float32)
+    labels = np.array([0, 1, 0, 1, 0, 1, 0], dtype=np.int64)
+    metadata_rows = [{"specimen_id": f"spec-{i // 2}", "target_label": "AB"[i % 2]} for i in range(7)]
+    _write_outputs(tmp_path, signals, labels, metadata_rows, {"A": 0, "B": 1}, sequence_format="npy", shard_size=3)
+    assert not (tmp_path / "sequences.npz").exists()
+    assert sorted(p.name for p in (tmp_path / "sequences").glob("signals_*.npy")) == [
+        "signals_00000.npy",
+        "signals_00001.npy",
+        "signals_00002.npy",
+    ]
+
+    dataset = load_prepared_dir(tmp_path)
+    assert isinstance(dataset.signals, ShardedSignals)
+    assert dataset.signals.shape == signals.shape
+    np.testing.assert_array_equal(dataset.signals[4], signals[4])
+    np.testing.assert_array_equal(dataset.signals[np.array([6, 0, 3])], signals[[6, 0, 3]])
+    np.testing.assert_array_equal(dataset.signals[1:5], signals[1:5])
+    np.testing.assert_array_equal(np.asarray(dataset.signals), signals)
+    np.testing.assert_array_equal(dataset.labels, labels)
+
+    train_idx = np.array([0, 2, 3, 5, 6])
+    means, stds = compute_normalisation(dataset.signals, train_idx, chunk_rows=2)
+    np.testing.assert_allclose(means, signals[train_idx].astype(np.float64).mean(axis=(0, 1)), rtol=1e-6)
+    np.testing.assert_allclose(stds, signals[train_idx].astype(np.float64).std(axis=(0, 1)), rtol=1e-5)
+
+    ds = SequenceDataset(dataset.signals, dataset.labels, means, stds, indices=train_idx)
+    tensor, label = ds[1]
+    assert len(ds) == 5
+    assert tuple(tensor.shape) == (5, 4)
+    assert int(label) == labels[2]
+
+
+def test_profile_partitions_are_built_and_loaded_without_other_profiles(tmp_path, monkeypatch):
+    from dataprep import build
+    from training_cnn.data import list_partitions, resolve_partition
+
+    from dataprep.tests.test_dataprep import _make_cycle_dataframe
+
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    layouts = [("HP-502", "aaa111", 10, "Beef"), ("HP-502", "aaa111", 10, "Pork"), ("HP-322", "bbb222", 4, "Beef")]
+    for idx, (profile, profile_hash, steps, label) in enumerate(layouts):
+        frame = _make_cycle_dataframe(steps=steps)
+        frame["profile_name"] = profile
+        frame["profile_hash"] = profile_hash
+        frame["sample_name"] = f"Meat > {label}"
+        frame.to_csv(logs / f"bme690_run{idx}.csv", index=False)
+
+    out = tmp_path / "prepared"
+    assert build.main(["--logs-root", str(logs), "--out", str(out), "--partition-by-profile"]) == 0
+    partitions = {entry["profile_name"]: entry for entry in list_partitions(out)}
+    assert partitions["HP-502"]["steps_per_cycle"] == 10 and partitions["HP-502"]["samples"] == 4
+    assert partitions["HP-322"]["steps_per_cycle"] == 4 and partitions["HP-322"]["samples"] == 2
+
+    # Rebuilding one profile must not parse the other profile's logs.
+    parsed = []
+    original = build.load_run_log
+    monkeypatch.setattr(build, "load_run_log", lambda path, columns=None: parsed.append(path) or original(path, columns))
+    assert build.main(["--logs-root", str(logs), "--out", str(out), "--partition-by-profile", "--profile", "HP-322", "--full-rebuild"]) == 0
+    assert parsed == [logs / "bme690_run2.csv"]
+    assert len(list_partitions(out)) == 2
+
+    dataset = load_prepared_dir(out, profile="HP-502")
+    assert dataset.signals.shape == (4, 10, 5)
+    assert set(dataset.metadata["target_label"]) == {"Beef", "Pork"}
+    assert resolve_partition(out, "bbb*") == out / partitions["HP-322"]["dir"]
+    try:
+        load_prepared_dir(out)
+    except ValueError as exc:
+        assert "HP-322" in str(exc)
+    else:
+        raise AssertionError("a partitioned directory needs a profile")
+
+
+def test_watch_mode_publishes_snapshots_atomically(tmp_path):
+    from dataprep import build
+    from dataprep.tests.test_dataprep import _make_cycle_dataframe
+
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    out = tmp_path / "prepared"
+
+    def write_log(idx):
+        frame = _make_cycle_dataframe(steps=4)
+        frame["sample_name"] = f"Meat > Label{idx % 2}"
+        frame.to_csv(logs / f"bme690_run{idx}.csv", index=False)
+
+    write_log(0)
+    build.main(["--logs-root", str(logs), "--out", str(out)])
+    assert (out / "sequences.npz").exists()
+
+    ns = build.parse_args(["--logs-root", str(logs), "--out", str(out), "--watch"])
+    rebuilds = []
+
+    def rebuild():
+        rebuilds.append(
+            build.build_prepared(build.discover_log_files(logs), ns.out, None, drop_unstable=False, snapshot=True)
+        )
+
+    build.watch_logs(logs, rebuild, interval=0.0, max_polls=2)
+    assert rebuilds == [2]  # the second poll saw no change
+    first = (out / "CURRENT").read_text(encoding="utf-8")
+    assert not (out / "sequences.npz").exists()  # flat outputs are replaced by the snapshot
+    assert load_prepared_dir(out).signals.shape == (2, 4, 5)
+
+    write_log(1)
+    write_log(2)
+    build.watch_logs(logs, rebuild, interval=0.0, max_polls=1)
+    second = (out / "CURRENT").read_text(encoding="utf-8")
+    assert second != first and rebuilds == [2, 6]
+    dataset = load_prepared_dir(out)
+    assert dataset.signals.shape == (6, 4, 5)
+    assert len(dataset.metadata) == 6
+    assert (out / first).exists()  # the previous snapshot stays for readers that already resolved it
+
+    write_log(3)
+    build.watch_logs(logs, rebuild, interval=0.0, max_polls=1)
+    assert not (out / first).exists()
+    assert sorted(p.name for p in (out / build.SNAPSHOT_DIR).iterdir()) == sorted(
+        [Path(second).name, Path((out / "CURRENT").read_text(encoding="utf-8")).name]
+    )
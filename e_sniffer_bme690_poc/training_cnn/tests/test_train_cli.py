@@ -53,3 +53,86 @@ def test_train_main_produces_artifacts(tmp_path, monkeypatch):
     assert (out_dir / "model.pt").exists()
     assert (out_dir / "metrics.json").exists()
     assert (out_dir / "training_curves.png").exists()
+
+
+def test_update_fine_tunes_into_next_version(tmp_path, monkeypatch):
+    import pytest
+
+    from training_cnn import update as update_cli
+
+    prepared_dir = _create_prepared(tmp_path)
+    model_dir = tmp_path / "models" / "cnn"
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+    common = ["--epochs", "2", "--batch-size", "4", "--val-fraction", "0.3"]
+    assert train_cli.main(["--prepared-dir", str(prepared_dir), "--out", str(model_dir)] + common) == 0
+
+    # New runs whose label indices are swapped relative to the model's label_map.
+    new_dir = tmp_path / "new"
+    new_dir.mkdir()
+    npz = np.load(prepared_dir / "sequences.npz")
+    np.savez_compressed(
+        new_dir / "sequences.npz",
+        signals=npz["signals"] + 0.5,
+        labels=1 - npz["labels"],
+        feature_names=npz["feature_names"],
+    )
+    (new_dir / "index.csv").write_text((prepared_dir / "index.csv").read_text())
+    (new_dir / "label_map.json").write_text(json.dumps({"B": 0, "A": 1}), encoding="utf-8")
+
+    assert update_cli.main(["--model-dir", str(model_dir), "--prepared-dir", str(new_dir)] + common) == 0
+    updated = model_dir.parent / "cnn-v2"
+    parent = torch.load(model_dir / "model.pt")
+    checkpoint = torch.load(updated / "model.pt")
+    assert checkpoint["label_map"] == {"A": 0, "B": 1}
+    assert checkpoint["feature_means"] == parent["feature_means"]
+    assert checkpoint["config"]["version"] == 2
+    assert checkpoint["config"]["parent"] == str(model_dir)
+    metrics = json.loads((updated / "metrics.json").read_text())
+    assert metrics["version"] == 2 and "before" in metrics
+    assert update_cli.remap_labels(update_cli.load_prepared_dir(new_dir), parent["label_map"]).tolist() == (
+        npz["labels"].tolist()
+    )
+
+    (new_dir / "label_map.json").write_text(json.dumps({"B": 0, "C": 1}), encoding="utf-8")
+    with pytest.raises(ValueError, match="C"):
+        update_cli.main(["--model-dir", str(updated), "--prepared-dir", str(new_dir)] + common)
+
+
+def test_update_with_a_single_new_specimen(tmp_path, monkeypatch):
+    from training_cnn import update as update_cli
+
+    prepared_dir = _create_prepared(tmp_path)
+    model_dir = tmp_path / "models" / "cnn"
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+    common = ["--epochs", "2", "--batch-size", "4", "--val-fraction", "0.3"]
+    assert train_cli.main(["--prepared-dir", str(prepared_dir), "--out", str(model_dir)] + common) == 0
+
+    # Two sequences of one specimen: no group split is possible.
+    new_dir = tmp_path / "new"
+    new_dir.mkdir()
+    npz = np.load(prepared_dir / "sequences.npz")
+    np.savez_compressed(
+        new_dir / "sequences.npz",
+        signals=npz["signals"][:2],
+        labels=npz["labels"][:2],
+        feature_names=npz["feature_names"],
+    )
+    pd.DataFrame({"specimen_id": ["spec-new"] * 2, "sample_name": ["new-0", "new-1"]}).to_csv(
+        new_dir / "index.csv", index=False
+    )
+    (new_dir / "label_map.json").write_text(json.dumps({"A": 0, "B": 1}), encoding="utf-8")
+
+    base = ["--model-dir", str(model_dir), "--prepared-dir", str(new_dir)] + common
+    assert update_cli.main(base) == 0
+    metrics = json.loads((tmp_path / "models" / "cnn-v2" / "metrics.json").read_text())
+    assert metrics["validation"] == "none" and metrics["version"] == 2
+    assert metrics["epochs_ran"] == metrics["best_epoch"] == 2
+    assert metrics["train_indices"] == [0, 1] and metrics["val_indices"] == []
+
+    assert update_cli.main(base + ["--replay-dir", str(prepared_dir)]) == 0
+    metrics = json.loads((tmp_path / "models" / "cnn-v3" / "metrics.json").read_text())
+    # cnn-v2 already exists, so the second update of the v1 model becomes v3.
+    assert metrics["validation"] == "replay" and metrics["version"] == 3
+    assert metrics["before"]["val_loss"] is not None
+    config = torch.load(tmp_path / "models" / "cnn-v3" / "model.pt")["config"]
+    assert config["replay_dir"] == str(prepared_dir) and config["version"] == 3
@@ -17,6 +17,8 @@ from .data import (
     SequenceDataset,
     compute_normalisation,
     load_prepared_dir,
+    resolve_partition,
+    resolve_snapshot,
     train_val_split,
 )
 from .model import SequenceCNN
@@ -30,7 +32,7 @@ def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
         "--prepared-dir",
         type=Path,
         required=True,
-        help="Directory that contains sequences.npz, index.csv, label_map.json.",
+        help="Directory that contains sequences.npz (or sequences/ shards), index.csv, label_map.json.",
     )
     parser.add_argument(
         "--out",
@@ -38,6 +40,12 @@ def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
         required=True,
         help="Directory to write model checkpoints and metrics.",
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="Partition to train on when --prepared-dir was built with --partition-by-profile (name, hash or key).",
+    )
     parser.add_argument("--epochs", type=int, default=40)
     parser.add_argument("--batch-size", type=int, default=32)
     parser.add_argument("--learning-rate", type=float, default=1e-3)
@@ -54,15 +62,12 @@ def prepare_datasets(
     seed: int,
 ) -> Tuple[SequenceDataset, SequenceDataset, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     train_idx, val_idx = train_val_split(prepared, val_fraction, seed=seed)
-    train_signals = prepared.signals[train_idx]
-    val_signals = prepared.signals[val_idx]
-    train_labels = prepared.labels[train_idx]
-    val_labels = prepared.labels[val_idx]
 
-    feature_means, feature_stds = compute_normalisation(train_signals)
+    # Datasets index into prepared.signals lazily so memory-mapped shards stay on disk.
+    feature_means, feature_stds = compute_normalisation(prepared.signals, train_idx)
 
-    train_ds = SequenceDataset(train_signals, train_labels, feature_means, feature_stds)
-    val_ds = SequenceDataset(val_signals, val_labels, feature_means, feature_stds)
+    train_ds = SequenceDataset(prepared.signals, prepared.labels, feature_means, feature_stds, indices=train_idx)
+    val_ds = SequenceDataset(prepared.signals, prepared.labels, feature_means, feature_stds, indices=val_idx)
     return train_ds, val_ds, feature_means, feature_stds, train_idx, val_idx
 
 
@@ -148,7 +153,10 @@ def main(argv: List[str] | None = None) -> int:
     ns = parse_args(argv)
     logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
     LOGGER.info("Loading prepared dataset from %s", ns.prepared_dir)
-    prepared = load_prepared_dir(ns.prepared_dir)
+    prepared_dir = resolve_snapshot(resolve_partition(ns.prepared_dir, ns.profile))
+    if prepared_dir != ns.prepared_dir:
+        LOGGER.info("Using %s", prepared_dir)
+    prepared = load_prepared_dir(prepared_dir)
     out_dir: Path = ns.out
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -225,6 +233,7 @@ def main(argv: List[str] | None = None) -> int:
                 "val_fraction": ns.val_fraction,
                 "seed": ns.seed,
                 "best_epoch": best_epoch,
+                "prepared_dir": str(prepared_dir),
             },
         },
         model_path,
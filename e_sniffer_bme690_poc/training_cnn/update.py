@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+
+from dataprep.manifest import file_digest
+from training.update import next_version_dir
+
+from .data import (
+    PreparedDataset,
+    SequenceDataset,
+    load_prepared_dir,
+    resolve_partition,
+    resolve_snapshot,
+    split_groups,
+    train_val_split,
+)
+from .model import SequenceCNN
+from .train import evaluate_epoch, plot_history, train_epoch
+
+LOGGER = logging.getLogger("training_cnn")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fine-tune a trained 1D CNN on newly prepared BME690 sequences.")
+    parser.add_argument("--model-dir", type=Path, required=True, help="Directory with the model.pt to update.")
+    parser.add_argument(
+        "--prepared-dir",
+        type=Path,
+        required=True,
+        help="Prepared directory with the new runs (same features and labels as the model).",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Default: <model-dir>-v<N+1>.")
+    parser.add_argument("--profile", type=str, default=None, help="Partition to use from a partitioned --prepared-dir.")
+    parser.add_argument(
+        "--replay-dir",
+        type=Path,
+        default=None,
+        help="Prepared directory of runs the model was trained on; used as the validation set, so all new runs train.",
+    )
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-4, help="Lower than training so updates stay small.")
+    parser.add_argument(
+        "--weight-decay",
+        type=float,
+        default=None,
+        help="Default: the value the model was trained with.",
+    )
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--patience", type=int, default=3, help="Epochs to wait for val improvement before stopping.")
+    return parser.parse_args(argv)
+
+
+def remap_labels(prepared: PreparedDataset, label_map: Dict[str, int]) -> np.ndarray:
+    """Labels of ``prepared`` as indices of the checkpoint's ``label_map`` (matched by name)."""
+    present = {int(idx) for idx in np.unique(prepared.labels)}
+    names = {idx: name for name, idx in prepared.label_map.items()}
+    unknown = sorted(names.get(idx, str(idx)) for idx in present if names.get(idx) not in label_map)
+    if unknown:
+        raise ValueError(f"Labels {unknown} are not in the model's label_map; retrain with training_cnn.train")
+    lookup = np.full(max(present | set(names)) + 1, -1, dtype=np.int64)
+    for name, idx in prepared.label_map.items():
+        lookup[idx] = label_map.get(name, -1)
+    return lookup[np.asarray(prepared.labels, dtype=np.int64)]
+
+
+def load_matching(prepared_dir: Path, profile: str | None, checkpoint: Dict) -> Tuple[PreparedDataset, np.ndarray]:
+    """A prepared dataset with the checkpoint's features, and its labels as checkpoint indices."""
+    prepared = load_prepared_dir(prepared_dir, profile=profile)
+    if list(prepared.feature_names) != list(checkpoint["feature_names"]):
+        raise ValueError(
+            f"Prepared features {list(prepared.feature_names)} do not match the model's {checkpoint['feature_names']}"
+        )
+    return prepared, remap_labels(prepared, checkpoint["label_map"])
+
+
+def _finite(value: float) -> float | None:
+    # Epochs without a validation set are NaN; metrics.json stores them as null.
+    return float(value) if np.isfinite(value) else None
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    model_path = ns.model_dir / "model.pt"
+    checkpoint = torch.load(model_path, map_location="cpu")
+    parent_config = dict(checkpoint.get("config", {}))
+    parent_version = int(parent_config.get("version", 1))
+    version = parent_version + 1
+    out_dir: Path = ns.out
+    if out_dir is None:
+        out_dir, version = next_version_dir(ns.model_dir, version)
+
+    prepared_dir = resolve_snapshot(resolve_partition(ns.prepared_dir, ns.profile))
+    LOGGER.info("Loading new runs from %s", prepared_dir)
+    prepared, labels = load_matching(prepared_dir, None, checkpoint)
+    label_map: Dict[str, int] = checkpoint["label_map"]
+
+    # Keep the normalisation the model was trained with; refitting it would shift every input.
+    feature_means = np.asarray(checkpoint["feature_means"], dtype=np.float32)
+    feature_stds = np.asarray(checkpoint["feature_stds"], dtype=np.float32)
+    all_idx = np.arange(len(labels))
+    empty_idx = np.zeros(0, dtype=np.int64)
+    if ns.replay_dir is not None:
+        replay, replay_labels = load_matching(ns.replay_dir, ns.profile, checkpoint)
+        LOGGER.info("Validating on %s replayed sequences from %s", len(replay_labels), ns.replay_dir)
+        train_idx, val_idx = all_idx, empty_idx
+        val_ds = SequenceDataset(replay.signals, replay_labels, feature_means, feature_stds)
+    elif split_groups(prepared).nunique() >= 2:
+        train_idx, val_idx = train_val_split(prepared, ns.val_fraction, seed=ns.seed)
+        val_ds = SequenceDataset(prepared.signals, labels, feature_means, feature_stds, indices=val_idx)
+    else:
+        # A single new specimen cannot be split by group: train on all of it for --epochs.
+        LOGGER.warning(
+            "New runs hold a single group and no --replay-dir was given; training %s epochs without validation",
+            ns.epochs,
+        )
+        train_idx, val_idx = all_idx, empty_idx
+        val_ds = None
+    train_ds = SequenceDataset(prepared.signals, labels, feature_means, feature_stds, indices=train_idx)
+
+    torch.manual_seed(ns.seed)
+    np.random.seed(ns.seed)
+    train_loader = DataLoader(train_ds, batch_size=ns.batch_size, shuffle=True)
+    val_loader = DataLoader(val_ds, batch_size=ns.batch_size, shuffle=False) if val_ds is not None else None
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = SequenceCNN(input_channels=len(feature_means), num_classes=len(label_map))
+    model.load_state_dict(checkpoint["state_dict"])
+    model.to(device)
+    criterion = nn.CrossEntropyLoss()
+    weight_decay = ns.weight_decay if ns.weight_decay is not None else float(parent_config.get("weight_decay", 1e-4))
+    optimizer = torch.optim.Adam(model.parameters(), lr=ns.learning_rate, weight_decay=weight_decay)
+
+    before_loss, before_acc = float("nan"), float("nan")
+    if val_loader is not None:
+        before_loss, before_acc = evaluate_epoch(model, val_loader, criterion, device)
+        LOGGER.info("Model v%s: val_loss=%.4f val_acc=%.3f", parent_version, before_loss, before_acc)
+
+    history: Dict[str, List[float]] = {"train_loss": [], "val_loss": [], "train_acc": [], "val_acc": []}
+    # Epoch 0 is the parent model: an update that never beats it on the new runs keeps its weights.
+    best_val_loss = before_loss
+    best_state = copy.deepcopy(model.state_dict())
+    best_epoch = 0
+    patience_counter = 0
+    for epoch in range(1, ns.epochs + 1):
+        train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+        val_loss, val_acc = float("nan"), float("nan")
+        if val_loader is not None:
+            val_loss, val_acc = evaluate_epoch(model, val_loader, criterion, device)
+        history["train_loss"].append(train_loss)
+        history["val_loss"].append(val_loss)
+        history["train_acc"].append(train_acc)
+        history["val_acc"].append(val_acc)
+        LOGGER.info(
+            "Epoch %s/%s train_loss=%.4f val_loss=%.4f train_acc=%.3f val_acc=%.3f",
+            epoch,
+            ns.epochs,
+            train_loss,
+            val_loss,
+            train_acc,
+            val_acc,
+        )
+        if val_loader is None:
+            best_state, best_epoch = copy.deepcopy(model.state_dict()), epoch
+        elif val_loss < best_val_loss:
+            best_val_loss = val_loss
+            best_state = copy.deepcopy(model.state_dict())
+            best_epoch = epoch
+            patience_counter = 0
+        else:
+            patience_counter += 1
+            if patience_counter >= ns.patience:
+                LOGGER.info("Early stopping at epoch %s (no improvement for %s epochs).", epoch, ns.patience)
+                break
+    if best_epoch == 0 and ns.epochs > 0:
+        LOGGER.warning("Fine-tuning did not improve the validation loss; v%s keeps the parent weights", version)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    torch.save(
+        {
+            "state_dict": best_state,
+            "feature_means": checkpoint["feature_means"],
+            "feature_stds": checkpoint["feature_stds"],
+            "feature_names": checkpoint["feature_names"],
+            "label_map": label_map,
+            "config": {
+                **parent_config,
+                "epochs": ns.epochs,
+                "batch_size": ns.batch_size,
+                "learning_rate": ns.learning_rate,
+                "weight_decay": weight_decay,
+                "val_fraction": ns.val_fraction,
+                "seed": ns.seed,
+                "best_epoch": best_epoch,
+                "prepared_dir": str(prepared_dir),
+                "replay_dir": str(ns.replay_dir) if ns.replay_dir is not None else None,
+                "version": version,
+                "parent": str(ns.model_dir),
+                "parent_sha256": file_digest(model_path),
+            },
+        },
+        out_dir / "model.pt",
+    )
+    LOGGER.info("Saved model v%s to %s", version, out_dir / "model.pt")
+
+    metrics = {
+        "version": version,
+        "parent": str(ns.model_dir),
+        "epochs_ran": len(history["train_loss"]),
+        "best_epoch": best_epoch,
+        "history": {key: [_finite(value) for value in values] for key, values in history.items()},
+        "before": {"val_loss": _finite(before_loss), "val_acc": _finite(before_acc)},
+        "validation": "replay" if ns.replay_dir is not None else ("none" if val_loader is None else "split"),
+        "best_val_loss": _finite(history["val_loss"][best_epoch - 1] if best_epoch > 0 else before_loss),
+        "best_val_acc": _finite(history["val_acc"][best_epoch - 1] if best_epoch > 0 else before_acc),
+        "train_indices": train_idx.tolist(),
+        "val_indices": val_idx.tolist(),
+        "label_map": label_map,
+        "device": str(device),
+    }
+    (out_dir / "metrics.json").write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    if history["train_loss"]:
+        plot_history(out_dir / "training_curves.png", history)
+    LOGGER.info("Wrote update artefacts to %s", out_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
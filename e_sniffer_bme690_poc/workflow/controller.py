@@ -112,8 +112,12 @@ class WorkflowController(QObject):
             if not data_path.exists() or not data_path.is_dir():
                 self.view.show_error(f"Prepared directory not found: {data_path}")
                 return
-            if not (data_path / "sequences.npz").exists():
-                self.view.show_error("sequences.npz is missing from the prepared directory.")
+            if not any((data_path / name).exists() for name in ("sequences.npz", "sequences/index.json", "partitions.json", "CURRENT")):
+                self.view.show_error("sequences.npz (or sequences/index.json) is missing from the prepared directory.")
+                return
+            profile = config.get("profile")
+            if (data_path / "partitions.json").exists() and not profile:
+                self.view.show_error("The prepared directory is partitioned by profile; select a partition.")
                 return
             args = [
                 "-m",
@@ -135,6 +139,8 @@ class WorkflowController(QObject):
                 "--seed",
                 str(config["seed"]),
             ]
+            if profile:
+                args.extend(["--profile", str(profile)])
 
         self.view.set_training_running(True)
         self.view.set_training_status("Status: running...")
@@ -24,6 +24,8 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from dataprep.layout import list_partitions, resolve_snapshot
+
 
 class WorkflowWindow(QMainWindow):
     dataprep_requested = Signal(dict)
@@ -98,6 +100,7 @@ class WorkflowWindow(QMainWindow):
         self.label_data_source = QLabel("Prepared directory")
         self.edit_training_source = QLineEdit("")
         self.edit_training_source.textChanged.connect(self._update_training_button_state)
+        self.edit_training_source.textChanged.connect(self._refresh_partitions)
         self.btn_browse_training_source = QPushButton("Browse...")
         self.btn_browse_training_source.clicked.connect(self._browse_training_source)
 
@@ -127,6 +130,10 @@ class WorkflowWindow(QMainWindow):
         self.spin_seed.setValue(42)
 
         # CNN fields
+        self.label_partition = QLabel("Partition")
+        self.combo_partition = QComboBox()
+        self.combo_partition.setToolTip("Profile partition to train on (prepared with --partition-by-profile).")
+
         self.label_epochs = QLabel("Epochs")
         self.spin_epochs = QSpinBox()
         self.spin_epochs.setRange(1, 500)
@@ -177,22 +184,24 @@ class WorkflowWindow(QMainWindow):
         training_layout.addWidget(self.label_cv, 5, 0)
         training_layout.addWidget(self.spin_cv, 5, 1)
 
-        training_layout.addWidget(self.label_epochs, 6, 0)
-        training_layout.addWidget(self.spin_epochs, 6, 1)
-        training_layout.addWidget(self.label_batch, 7, 0)
-        training_layout.addWidget(self.spin_batch, 7, 1)
-        training_layout.addWidget(self.label_lr, 8, 0)
-        training_layout.addWidget(self.double_lr, 8, 1)
-        training_layout.addWidget(self.label_val_fraction, 9, 0)
-        training_layout.addWidget(self.double_val_fraction, 9, 1)
-        training_layout.addWidget(self.label_patience, 10, 0)
-        training_layout.addWidget(self.spin_patience, 10, 1)
-
-        training_layout.addWidget(self.label_seed, 11, 0)
-        training_layout.addWidget(self.spin_seed, 11, 1)
-
-        training_layout.addWidget(self.btn_run_training, 12, 0, 1, 1)
-        training_layout.addWidget(self.label_training_status, 12, 1, 1, 2)
+        training_layout.addWidget(self.label_partition, 6, 0)
+        training_layout.addWidget(self.combo_partition, 6, 1)
+        training_layout.addWidget(self.label_epochs, 7, 0)
+        training_layout.addWidget(self.spin_epochs, 7, 1)
+        training_layout.addWidget(self.label_batch, 8, 0)
+        training_layout.addWidget(self.spin_batch, 8, 1)
+        training_layout.addWidget(self.label_lr, 9, 0)
+        training_layout.addWidget(self.double_lr, 9, 1)
+        training_layout.addWidget(self.label_val_fraction, 10, 0)
+        training_layout.addWidget(self.double_val_fraction, 10, 1)
+        training_layout.addWidget(self.label_patience, 11, 0)
+        training_layout.addWidget(self.spin_patience, 11, 1)
+
+        training_layout.addWidget(self.label_seed, 12, 0)
+        training_layout.addWidget(self.spin_seed, 12, 1)
+
+        training_layout.addWidget(self.btn_run_training, 13, 0, 1, 1)
+        training_layout.addWidget(self.label_training_status, 13, 1, 1, 2)
 
         layout.addWidget(training_group)
 
@@ -205,6 +214,8 @@ class WorkflowWindow(QMainWindow):
             self.spin_cv,
         ]
         self._cnn_widgets = [
+            self.label_partition,
+            self.combo_partition,
             self.label_epochs,
             self.spin_epochs,
             self.label_batch,
@@ -216,6 +227,7 @@ class WorkflowWindow(QMainWindow):
             self.label_patience,
             self.spin_patience,
         ]
+        self._refresh_partitions()
         self._update_training_mode_fields()
 
         log_group = QGroupBox("Pipeline Log")
@@ -296,10 +308,31 @@ class WorkflowWindow(QMainWindow):
                     "learning_rate": self.double_lr.value(),
                     "val_fraction": self.double_val_fraction.value(),
                     "patience": self.spin_patience.value(),
+                    "profile": self.combo_partition.currentData(),
                 }
             )
         self.training_requested.emit(config)
 
+    def _refresh_partitions(self) -> None:
+        """List the partitions of a prepared directory built with ``--partition-by-profile``."""
+        previous = self.combo_partition.currentData()
+        self.combo_partition.clear()
+        source = Path(self.edit_training_source.text().strip()).expanduser()
+        try:
+            partitions = list_partitions(source) if source.is_dir() else []
+        except (OSError, ValueError, KeyError):
+            partitions = []
+        if not partitions:
+            self.combo_partition.addItem("(not partitioned)", None)
+        for entry in partitions:
+            key = str(entry["key"])
+            label = f"{entry.get('profile_name') or 'unnamed'} - {entry.get('steps_per_cycle', '?')} steps ({key})"
+            self.combo_partition.addItem(label, key)
+        self.combo_partition.setEnabled(bool(partitions) and not self._training_running)
+        index = self.combo_partition.findData(previous)
+        if index >= 0:
+            self.combo_partition.setCurrentIndex(index)
+
     def _update_training_button_state(self) -> None:
         text = self.edit_training_source.text().strip()
         self.btn_run_training.setEnabled(bool(text) and not self._training_running)
@@ -371,8 +404,11 @@ class WorkflowWindow(QMainWindow):
         QMessageBox.critical(self, "Workflow error", message, QMessageBox.StandardButton.Ok)
 
     def notify_dataprep_complete(self, prepared_dir: Path) -> None:
-        sequences_path = prepared_dir / "sequences.npz"
-        summary_path = prepared_dir / "summary.json"
+        output_dir = resolve_snapshot(prepared_dir)
+        sequences_path = output_dir / "sequences.npz"
+        if not sequences_path.exists() and (output_dir / "sequences" / "index.json").exists():
+            sequences_path = output_dir / "sequences"
+        summary_path = output_dir / "summary.json"
         if sequences_path.exists():
             self.edit_training_source.setText(str(prepared_dir))
             models_root = Path("models").resolve()